@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import models, notebooks, websocket
+from app.api.v1.endpoints import models, notebooks, trending, websocket
 
 api_router = APIRouter()
 
 api_router.include_router(models.router, prefix="/models", tags=["models"])
 api_router.include_router(notebooks.router, prefix="/notebooks", tags=["notebooks"])
+api_router.include_router(trending.router, prefix="/trending", tags=["trending"])
 api_router.include_router(websocket.router, prefix="/ws", tags=["websocket"])
\ No newline at end of file
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Query
 from typing import List, Optional
-from app.services.huggingface import HuggingFaceService
+from app.services.huggingface import hf_service
 from app.models.notebook import ModelInfo
 
 router = APIRouter()
-hf_service = HuggingFaceService()
 
 @router.get("/popular", response_model=List[ModelInfo])
 async def get_popular_models():
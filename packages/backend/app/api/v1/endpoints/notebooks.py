@@ -1,40 +1,160 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse, Response
 # from app.tasks.notebook_tasks import generate_notebook_task  # DISABLED: Using direct invocation
 from app.services.progress_tracker import progress_tracker
-from app.core.database import db
+from app.services.job_scheduler import job_scheduler, QueueFullError
+from app.services.job_dedup import job_deduplicator
+from app.services.stage_stats import stage_stats, measure_stage
+from app.services.profiler import task_profiler
+from app.services.notebook_store import notebook_store
+from app.services.notebook_cache import notebook_cache
+from app.services.trending import trending_service
+from app.core.http_cache import IDENTITY, etag_matches, format_etag, negotiate_encoding, versions_for_encoding
+from app.core.tracing import start_span, current_trace_id
+from app.core.config import settings
 from app.models.notebook import (
     NotebookGenerationRequest,
     NotebookGenerationResponse,
     TaskStatus,
-    NotebookResponse
+    NotebookResponse,
+    NotebookSummary,
+    NotebookPage,
+    NotebookOutline,
+    NotebookCells
 )
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Literal, Optional
 import uuid
+import math
+import time
 import asyncio
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/generate", response_model=NotebookGenerationResponse)
-async def generate_notebook(request: NotebookGenerationRequest, background_tasks: BackgroundTasks):
+async def generate_notebook(
+    request: NotebookGenerationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
+):
     """Start notebook generation task (direct invocation version)"""
     # Generate task ID
     task_id = str(uuid.uuid4())
 
-    # Start notebook generation in background task (direct invocation)
-    background_tasks.add_task(generate_notebook_direct, task_id, request.hf_model_id)
+    # Replay the original submission for a retried request
+    if idempotency_key:
+        existing = progress_tracker.claim_idempotency_key(
+            idempotency_key,
+            {"task_id": task_id, "hf_model_id": request.hf_model_id, "validation": request.validation},
+            settings.IDEMPOTENCY_TTL_SECONDS
+        )
+        if existing:
+            return _replay_idempotent_request(idempotency_key, existing, request)
+
+    try:
+        return _start_generation(
+            task_id, request.hf_model_id, request.validation,
+            profile=task_profiler.is_requested(profile_token)
+        )
+    except HTTPException:
+        # Rejected submissions did no work, so the client may retry with the same key
+        if idempotency_key:
+            progress_tracker.release_idempotency_key(idempotency_key)
+        raise
+
+def _replay_idempotent_request(idempotency_key: str, record: Dict[str, Any],
+                               request: NotebookGenerationRequest) -> NotebookGenerationResponse:
+    """Build the response for a duplicate submission without doing any work"""
+    if (record.get("hf_model_id"), record.get("validation", "full")) != (request.hf_model_id, request.validation):
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+
+    if record.get("status") not in ("completed", "failed"):
+        # Copy a finished result into the record so it outlives the progress entry
+        result = progress_tracker.get_task_result(record["task_id"])
+        if result and result.get("status") in ("completed", "failed"):
+            record["status"] = result["status"]
+            record["share_id"] = result.get("share_id")
+            progress_tracker.update_idempotency_record(idempotency_key, record)
+
+    return NotebookGenerationResponse(
+        task_id=record["task_id"],
+        estimated_time=0 if record.get("status") else _estimate_time(
+            job_scheduler.queue_depth, request.hf_model_id, request.validation
+        ),
+        status=record.get("status", "processing"),
+        share_id=record.get("share_id")
+    )
+
+def _estimate_time(position: int, hf_model_id: str, validation: str) -> int:
+    """Seconds until a job at queue `position` completes, from historical stage durations"""
+    wait = job_scheduler.estimate_wait(position)
+    return int(math.ceil(wait + stage_stats.expected_duration(hf_model_id, validation)))
+
+def _start_generation(task_id: str, hf_model_id: str, validation: str,
+                      profile: bool = False) -> NotebookGenerationResponse:
+    """Attach to an in-flight job or queue a new one"""
+    # Attach to an identical generation that is already queued or running
+    dedup_key = job_deduplicator.make_key(hf_model_id, validation)
+    inflight_job = job_deduplicator.claim(dedup_key, task_id)
+    if inflight_job.task_id != task_id:
+        progress_tracker.link_task(task_id, inflight_job.task_id, hf_model_id=hf_model_id)
+        return NotebookGenerationResponse(
+            task_id=task_id,
+            estimated_time=job_deduplicator.remaining_time(inflight_job)
+        )
+
+    # Shed load when the predicted queue wait is already too long
+    predicted_wait = job_scheduler.estimate_wait(job_scheduler.queue_depth)
+    if predicted_wait > settings.MAX_PREDICTED_WAIT_SECONDS:
+        job_deduplicator.release(dedup_key, task_id)
+        raise HTTPException(
+            status_code=429,
+            detail="Notebook generation is overloaded, please retry later",
+            headers={"Retry-After": str(int(math.ceil(predicted_wait - settings.MAX_PREDICTED_WAIT_SECONDS)) or 1)}
+        )
+
+    # Queue notebook generation on the bounded in-process scheduler
+    try:
+        position = job_scheduler.submit(task_id, generate_notebook_direct, task_id, hf_model_id, validation, profile)
+    except QueueFullError as e:
+        job_deduplicator.release(dedup_key, task_id)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many notebook generations in progress, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    progress_tracker.update_progress(task_id, {
+        "status": "processing",
+        "current_step": f"Queued for generation (position {position + 1})",
+        "progress": 0
+    }, hf_model_id=hf_model_id)
+
+    estimated_time = _estimate_time(position, hf_model_id, validation)
+    inflight_job.expected_done_at = time.monotonic() + estimated_time
 
     return NotebookGenerationResponse(
         task_id=task_id,
-        estimated_time=60  # Longer timeout for direct invocation
+        estimated_time=estimated_time
     )
 
-async def generate_notebook_direct(task_id: str, hf_model_id: str):
+async def generate_notebook_direct(task_id: str, hf_model_id: str, validation: str = "full", profile: bool = False):
     """Direct invocation version of notebook generation (replaces Celery task)"""
+    with task_profiler.profile(task_id, "generate", enabled=profile), \
+            start_span("notebook.generate", {"task.id": task_id, "hf.model_id": hf_model_id, "validation.mode": validation}):
+        await _run_generation(task_id, hf_model_id, validation)
+
+async def _run_generation(task_id: str, hf_model_id: str, validation: str):
+    timings: Dict[str, float] = {}
+    pipeline_tag = None
     try:
         # Import here to avoid circular imports
         from app.services.notebook_generator import NotebookGenerator
-        from app.services.huggingface import HuggingFaceService
+        from app.services.huggingface import hf_service
         from app.services.notebook_validator import NotebookValidator
 
         # Update initial progress
@@ -44,9 +164,6 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
             "progress": 10
         })
 
-        # Initialize services
-        hf_service = HuggingFaceService()
-
         # Step 1: Get model info
         progress_tracker.update_progress(task_id, {
             "status": "processing",
@@ -54,14 +171,16 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
             "progress": 20
         })
 
-        print(f"[DEBUG] Attempting to get model info for: {hf_model_id}")
-        model_info = await hf_service.get_model_info(hf_model_id)
-        print(f"[DEBUG] Model info result: {model_info is not None}")
-        if model_info:
-            print(f"[DEBUG] Model info keys: {list(model_info.keys()) if isinstance(model_info, dict) else type(model_info)}")
+        with start_span("generation.fetch") as span, measure_stage(timings, "fetch"):
+            model_info = await hf_service.get_model_info(hf_model_id)
+            span.set_attribute("model.found", model_info is not None)
+            if not model_info:
+                raise ValueError(f"Model {hf_model_id} not found")
+            readme_content = await hf_service.get_model_readme(hf_model_id)
+            span.set_attribute("readme.length", len(readme_content or ""))
 
-        if not model_info:
-            raise ValueError(f"Model {hf_model_id} not found")
+        pipeline_tag = model_info.pipeline_tag
+        stage_stats.remember_pipeline_tag(hf_model_id, pipeline_tag)
 
         # Step 2: Generate notebook content
         progress_tracker.update_progress(task_id, {
@@ -71,17 +190,9 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
         })
 
         generator = NotebookGenerator()
-        print(f"[DEBUG] Starting notebook generation for: {hf_model_id}")
-        notebook_data = await generator.generate_notebook(hf_model_id)
-        print(f"[DEBUG] Notebook generation completed. Data type: {type(notebook_data)}")
-        if isinstance(notebook_data, dict):
-            print(f"[DEBUG] Notebook data keys: {list(notebook_data.keys())}")
-            if "cells" in notebook_data:
-                print(f"[DEBUG] Notebook cells count: {len(notebook_data['cells'])}")
-            else:
-                print(f"[DEBUG] No 'cells' key found in notebook data")
-        else:
-            print(f"[DEBUG] Notebook data is not a dict: {notebook_data}")
+        with start_span("generation.render") as span, measure_stage(timings, "render"):
+            notebook_data = generator.render_notebook(hf_model_id, model_info, readme_content)
+            span.set_attribute("notebook.cells", len(notebook_data["notebook_content"]["cells"]))
 
         # Step 3: Validate notebook execution
         progress_tracker.update_progress(task_id, {
@@ -91,21 +202,31 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
         })
 
         validator = NotebookValidator()
-        validation_result = await validator.validate_notebook(
-            notebook_data["notebook_content"],
-            hf_model_id
-        )
+        with start_span("generation.validate") as span, measure_stage(timings, "validate"):
+            validation_result = await validator.validate_notebook(
+                notebook_data["notebook_content"],
+                hf_model_id,
+                runtime=validation == "full"
+            )
+            span.set_attributes({
+                "validation.status": validation_result["overall_status"],
+                "validation.syntax_errors": len(validation_result["syntax_errors"]),
+                "validation.runtime_errors": len(validation_result["runtime_errors"])
+            })
 
-        print(f"[DEBUG] Validation result: {validation_result}")
         if validation_result["overall_status"] != "success":
+            logger.info(
+                "Notebook for %s failed validation: %d syntax errors, %d runtime errors",
+                hf_model_id, len(validation_result["syntax_errors"]), len(validation_result["runtime_errors"])
+            )
             # If validation fails, include validation details in the response
-            print(f"[DEBUG] Validation failed - Syntax errors: {len(validation_result.get('syntax_errors', []))}, Runtime errors: {len(validation_result.get('runtime_errors', []))}")
             progress_tracker.update_progress(task_id, {
                 "status": "failed",
                 "current_step": f"Notebook validation failed: {len(validation_result['syntax_errors'])} syntax errors, {len(validation_result['runtime_errors'])} runtime errors",
                 "progress": 0,
                 "validation_errors": validation_result,
-                "error": "Generated notebook failed validation"
+                "error": "Generated notebook failed validation",
+                "timings": _timings_record(timings, pipeline_tag, validation)
             })
             return
 
@@ -133,19 +254,14 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
             "syntax_errors": len(validation_result["syntax_errors"]),
             "runtime_errors": len(validation_result["runtime_errors"]),
             "model_loading_success": validation_result["model_loading_success"],
-            "validation_timestamp": validation_result["validation_timestamp"]
+            "validation_timestamp": validation_result["validation_timestamp"],
+            "mode": validation
         }
+        # The persist stage is still running, its time is kept with the task state
+        enhanced_metadata["timings"] = {"stages": dict(timings), "trace_id": current_trace_id()}
 
-        query = """
-        INSERT INTO notebooks (share_id, hf_model_id, notebook_content, metadata)
-        VALUES (%s, %s, %s, %s)
-        RETURNING id, created_at
-        """
-
-        result = db.execute_single_query(
-            query,
-            (share_id, hf_model_id, json.dumps(notebook_data["notebook_content"]), json.dumps(enhanced_metadata))
-        )
+        with start_span("generation.persist", {"notebook.share_id": share_id}), measure_stage(timings, "persist"):
+            result = notebook_store.insert(share_id, hf_model_id, notebook_data["notebook_content"], enhanced_metadata)
 
         # Step 7: Complete
         progress_tracker.update_progress(task_id, {
@@ -160,10 +276,12 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
                 "syntax_errors": len(validation_result["syntax_errors"]),
                 "runtime_errors": len(validation_result["runtime_errors"]),
                 "model_loading_success": validation_result["model_loading_success"]
-            }
+            },
+            "timings": _timings_record(timings, pipeline_tag, validation)
         })
 
     except Exception as e:
+        logger.exception("Generation task %s for %s failed", task_id, hf_model_id)
         # Update task status to failed
         import traceback
         progress_tracker.update_progress(task_id, {
@@ -173,6 +291,20 @@ async def generate_notebook_direct(task_id: str, hf_model_id: str):
             "error": str(e),
             "traceback": traceback.format_exc()
         })
+    finally:
+        # Feed the ETA estimates with every stage that ran
+        stage_stats.record(pipeline_tag, "miss", validation, timings)
+        # Later requests for this model start a fresh generation
+        job_deduplicator.release(job_deduplicator.make_key(hf_model_id, validation), task_id)
+
+def _timings_record(timings: Dict[str, float], pipeline_tag: Optional[str], validation: str) -> Dict[str, Any]:
+    """Stage timings in the shape stored with the task state"""
+    return {
+        "stages": dict(timings),
+        "pipeline_tag": pipeline_tag,
+        "cache_status": "miss",
+        "validation": validation
+    }
 
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
@@ -213,85 +345,208 @@ async def get_task_status(task_id: str):
     else:
         raise HTTPException(status_code=404, detail="Task not found")
 
+@router.get("/task/{task_id}/profile")
+async def get_task_profile(
+    task_id: str,
+    format: Literal["text", "pstats"] = "text",
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
+):
+    """Download the cProfile capture of a profiled generation"""
+    if not task_profiler.can_download(profile_token):
+        raise HTTPException(status_code=403, detail="Profiling is not enabled for this client")
+
+    task_id = progress_tracker.resolve_task_id(task_id)
+    if format == "pstats":
+        payload = task_profiler.export(task_id)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="No profile for this task")
+        return Response(
+            content=payload,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename={task_id}.prof"}
+        )
+
+    report = task_profiler.report(task_id, sort=sort)
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profile for this task")
+    return PlainTextResponse(report)
+
+@router.get("/queue")
+async def get_queue_stats():
+    """Get generation queue depth, wait-time metrics and stage duration estimates"""
+    stats = job_scheduler.get_stats()
+    stats["stage_estimates"] = stage_stats.snapshot()
+    return stats
+
+@router.get("", response_model=NotebookPage)
+async def list_notebooks(
+    hf_model_id: Optional[str] = Query(None, description="Only notebooks for this model"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """List notebook summaries, newest first"""
+    try:
+        rows, next_cursor = notebook_store.list_summaries(limit, cursor=cursor, hf_model_id=hf_model_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return NotebookPage(items=[NotebookSummary(**row) for row in rows], next_cursor=next_cursor)
+
+def _share_page_version(content_hash: Optional[str], download_count: int) -> Optional[str]:
+    # The page shows the download count, so it is part of the version
+    return f"{content_hash}-{download_count}" if content_hash else None
+
 @router.get("/{share_id}", response_model=NotebookResponse)
-async def get_notebook(share_id: str):
+async def get_notebook(
+    share_id: str,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding")
+):
     """Get notebook metadata by share ID"""
-    query = """
-    SELECT id, created_at, share_id, hf_model_id, notebook_content, metadata, download_count
-    FROM notebooks
-    WHERE share_id = %s
-    """
+    encoding = negotiate_encoding(accept_encoding)
+    cache_headers = {"Cache-Control": f"public, max-age={settings.NOTEBOOK_CACHE_MAX_AGE}", "Vary": "Accept-Encoding"}
+
+    cached = notebook_cache.get(share_id)
+    if cached is None:
+        # Revalidation only needs the version, not the notebook itself
+        if if_none_match:
+            row = notebook_store.get_version(share_id)
+            if not row:
+                raise HTTPException(status_code=404, detail="Notebook not found")
+            version = _share_page_version(row["content_hash"], row["download_count"])
+            if version and etag_matches(if_none_match, format_etag(version, encoding)):
+                trending_service.record_view(share_id)
+                notebook_store.record_access(share_id)
+                return Response(status_code=304, headers={"ETag": format_etag(version, encoding), **cache_headers})
+
+        # Built from the stored JSON text; no parse, validation or re-encode of the notebook
+        result = notebook_store.get_page(share_id)
+
+        if not result:
+            raise HTTPException(status_code=404, detail="Notebook not found")
+
+        cached = notebook_cache.put(
+            share_id, result["body"], _share_page_version(result["content_hash"], result["download_count"])
+        )
+
+    trending_service.record_view(share_id)
+    notebook_store.record_access(share_id)
+    headers = {"Vary": "Accept-Encoding"}
+    if cached.version:
+        etag = format_etag(cached.version, encoding)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, **cache_headers})
+        headers.update({"ETag": etag, **cache_headers})
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=notebook_cache.encoded(share_id, cached, encoding), media_type="application/json", headers=headers
+    )
 
-    result = db.execute_single_query(query, (share_id,))
+@router.get("/{share_id}/download")
+async def download_notebook(
+    share_id: str,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding")
+):
+    """Download notebook as .ipynb file"""
+    encoding = negotiate_encoding(accept_encoding)
+    # Caches keep the file but revalidate every download, so each one is counted
+    cache_headers = {"Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+
+    # A client that has this version already is counted and answered with 304
+    cached_hash = notebook_store.count_download_if_unchanged(share_id, versions_for_encoding(if_none_match, encoding))
+    if cached_hash:
+        trending_service.record_download(share_id)
+        notebook_store.record_access(share_id)
+        return Response(status_code=304, headers={"ETag": format_etag(cached_hash, encoding), **cache_headers})
+
+    # The stored bytes are served as-is, without JSON encoding
+    result = notebook_store.get_download(share_id, encoding)
 
     if not result:
         raise HTTPException(status_code=404, detail="Notebook not found")
 
-    return NotebookResponse(
-        id=result["id"],
-        created_at=result["created_at"],
-        share_id=result["share_id"],
-        hf_model_id=result["hf_model_id"],
-        notebook_content=result["notebook_content"],
-        metadata=result["metadata"],
-        download_count=result["download_count"]
+    notebook_store.count_download(share_id)
+    trending_service.record_download(share_id)
+    notebook_store.record_access(share_id)
+
+    filename = f"{result['hf_model_id'].replace('/', '_')}_notebook.ipynb"
+
+    headers = {"Content-Disposition": f"attachment; filename={filename}", **cache_headers}
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    if result["content_hash"]:
+        headers["ETag"] = format_etag(result["content_hash"], encoding)
+
+    return Response(
+        content=result["body"],
+        media_type="application/x-ipynb+json",
+        headers=headers
     )
 
-@router.get("/{share_id}/download")
-async def download_notebook(share_id: str):
-    """Download notebook as .ipynb file"""
-    query = """
-    SELECT notebook_content, hf_model_id, download_count
-    FROM notebooks
-    WHERE share_id = %s
-    """
+def _content_response(result: Dict[str, Any], if_none_match: Optional[str]) -> Response:
+    # Outlines and cells change only with the content, so its hash is the version
+    headers = {"Cache-Control": f"public, max-age={settings.NOTEBOOK_CACHE_MAX_AGE}"}
+    if result["content_hash"]:
+        headers["ETag"] = format_etag(result["content_hash"])
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    return Response(content=result["body"], media_type="application/json", headers=headers)
 
-    result = db.execute_single_query(query, (share_id,))
+@router.get("/{share_id}/summary", response_model=NotebookSummary)
+async def get_notebook_summary(share_id: str, response: Response):
+    """Get notebook metadata and cell count without the notebook content"""
+    result = notebook_store.get_summary(share_id)
 
     if not result:
         raise HTTPException(status_code=404, detail="Notebook not found")
 
-    # Increment download count
-    update_query = "UPDATE notebooks SET download_count = download_count + 1 WHERE share_id = %s"
-    db.execute_query(update_query, (share_id,))
+    response.headers["Cache-Control"] = f"public, max-age={settings.NOTEBOOK_CACHE_MAX_AGE}"
+    return NotebookSummary(**result)
 
-    # Return file content
-    from fastapi.responses import Response
-    import json
+@router.get("/{share_id}/outline", response_model=NotebookOutline)
+async def get_notebook_outline(
+    share_id: str,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+):
+    """Get the type and first line of every cell"""
+    result = notebook_store.get_outline(share_id)
 
-    notebook_content = result["notebook_content"]
-    hf_model_id = result["hf_model_id"]
+    if not result:
+        raise HTTPException(status_code=404, detail="Notebook not found")
 
-    # Convert notebook_content to JSON string if it's a dict
-    if isinstance(notebook_content, dict):
-        notebook_json = json.dumps(notebook_content, indent=2)
-    else:
-        notebook_json = notebook_content
+    notebook_store.record_access(share_id)
 
-    filename = f"{hf_model_id.replace('/', '_')}_notebook.ipynb"
+    return _content_response(result, if_none_match)
 
-    return Response(
-        content=notebook_json,
-        media_type="application/x-ipynb+json",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+@router.get("/{share_id}/cells", response_model=NotebookCells)
+async def get_notebook_cells(
+    share_id: str,
+    start: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+):
+    """Get a range of cells, starting at index `start`"""
+    result = notebook_store.get_cells(share_id, start, limit)
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Notebook not found")
+
+    notebook_store.record_access(share_id)
+
+    return _content_response(result, if_none_match)
 
 @router.get("/{share_id}/validation")
 async def get_notebook_validation(share_id: str):
     """Get notebook validation results by share ID"""
-    query = """
-    SELECT metadata, notebook_content
-    FROM notebooks
-    WHERE share_id = %s
-    """
-
-    result = db.execute_single_query(query, (share_id,))
+    # Validation results live in metadata; the notebook content is not read
+    result = notebook_store.get_summary(share_id)
 
     if not result:
         raise HTTPException(status_code=404, detail="Notebook not found")
 
     metadata = result["metadata"]
-    notebook_content = result["notebook_content"]
 
     # Extract validation information from metadata
     validation_info = metadata.get("validation", {}) if metadata else {}
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Query
+from typing import Literal
+from app.services.trending import trending_service
+from app.models.notebook import TrendingResponse
+
+router = APIRouter()
+
+@router.get("", response_model=TrendingResponse)
+async def get_trending(
+    window: Literal["day", "week", "month"] = "week",
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Get the most viewed and downloaded notebooks of a time window"""
+    return TrendingResponse(window=window, **trending_service.top(window, limit))
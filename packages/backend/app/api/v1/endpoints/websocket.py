@@ -1,6 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.progress_tracker import progress_tracker
 from app.models.notebook import TaskStatus, ProgressUpdate
+from app.core.metrics import WEBSOCKET_CONNECTIONS
 import json
 import asyncio
 
@@ -10,6 +11,7 @@ router = APIRouter()
 async def websocket_progress(websocket: WebSocket, task_id: str):
     """WebSocket endpoint for real-time progress updates"""
     await websocket.accept()
+    WEBSOCKET_CONNECTIONS.inc()
 
     try:
         # Send initial status
@@ -77,4 +79,6 @@ async def websocket_progress(websocket: WebSocket, task_id: str):
             )
             await websocket.send_text(ProgressUpdate(data=error_status.dict()).json())
         except:
-            pass  # Connection might already be closed
\ No newline at end of file
+            pass  # Connection might already be closed
+    finally:
+        WEBSOCKET_CONNECTIONS.dec()
\ No newline at end of file
@@ -0,0 +1,12 @@
+import redis
+from typing import Optional
+from app.core.config import settings
+
+_redis_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """Return the shared Redis client, creating it on first use"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
@@ -1,34 +1,22 @@
 from celery import Celery
 from app.core.config import settings
 import logging
-import traceback
-import sys
-
-# Set up comprehensive logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('/tmp/celery_worker.log')
-    ]
-)
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
 # Create Celery instance
 try:
-    logger.info(f"Initializing Celery with Redis URL: {settings.REDIS_URL}")
+    logger.debug("Initializing Celery with Redis URL %s", settings.REDIS_URL)
     celery_app = Celery(
         "alacard_backend",
         broker=settings.REDIS_URL,
         backend=settings.REDIS_URL,
-        include=["app.tasks.notebook_tasks"]
+        include=["app.tasks.notebook_tasks", "app.tasks.maintenance_tasks"]
     )
-    logger.info("Celery instance created successfully")
-except Exception as e:
-    logger.error(f"Failed to create Celery instance: {e}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
+except Exception:
+    logger.exception("Failed to create Celery instance")
     raise
 
 # Configure Celery
@@ -48,6 +36,38 @@ celery_app.conf.update(
     worker_log_color=False,
 )
 
+# Route pipeline stages so validation workers scale separately from I/O workers.
+# The entry task only checks for a reusable notebook before fanning out, so it
+# always runs on the fast lane; static validation is moved to the fast lane
+# when the chain is built.
+celery_app.conf.task_routes = {
+    "app.tasks.notebook_tasks.generate_notebook_task": {"queue": settings.CELERY_FAST_QUEUE},
+    "app.tasks.notebook_tasks.fetch_model_stage": {"queue": settings.CELERY_IO_QUEUE},
+    "app.tasks.notebook_tasks.render_notebook_stage": {"queue": settings.CELERY_IO_QUEUE},
+    "app.tasks.notebook_tasks.validate_notebook_stage": {"queue": settings.CELERY_VALIDATION_QUEUE},
+    "app.tasks.notebook_tasks.persist_notebook_stage": {"queue": settings.CELERY_IO_QUEUE},
+    "app.tasks.maintenance_tasks.*": {"queue": settings.CELERY_IO_QUEUE},
+}
+
+# Periodic maintenance, run by `celery -A app.core.celery_app beat`
+celery_app.conf.beat_schedule = {
+    "create-notebook-partitions": {
+        "task": "app.tasks.maintenance_tasks.create_notebook_partitions",
+        "schedule": 24 * 3600,
+    },
+}
+if settings.ARCHIVE_ENABLED:
+    celery_app.conf.beat_schedule["archive-idle-notebooks"] = {
+        "task": "app.tasks.maintenance_tasks.archive_idle_notebooks",
+        "schedule": settings.ARCHIVE_INTERVAL_SECONDS,
+    }
+
+LANE_CONCURRENCY = {
+    settings.CELERY_FAST_QUEUE: settings.CELERY_FAST_CONCURRENCY,
+    settings.CELERY_IO_QUEUE: settings.CELERY_IO_CONCURRENCY,
+    settings.CELERY_VALIDATION_QUEUE: settings.CELERY_VALIDATION_CONCURRENCY,
+}
+
 # Add database connection test
 @celery_app.task(bind=True)
 def test_db_connection(self):
@@ -56,11 +76,11 @@ def test_db_connection(self):
         from app.core.database import db
         # Test basic connection
         result = db.execute_query("SELECT 1 as test, version() as version")
-        logger.info(f"Database connection test successful: {result}")
+        logger.info("Database connection test successful: %s", result)
 
         # Test if card_presets table exists and has data
         presets_result = db.execute_query("SELECT COUNT(*) as count FROM public.card_presets")
-        logger.info(f"Card presets table test successful: {presets_result}")
+        logger.info("Card presets table test successful: %s", presets_result)
 
         return {
             "status": "success",
@@ -68,8 +88,7 @@ def test_db_connection(self):
             "presets_test": presets_result
         }
     except Exception as e:
-        logger.error(f"Database connection test failed: {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Database connection test failed")
         return {"status": "error", "error": str(e)}
 
 # Worker ready signal
@@ -80,26 +99,82 @@ def worker_ready():
     return {"status": "ready"}
 
 # Connect worker signals
-from celery.signals import worker_ready, worker_init, worker_shutdown
+from celery.signals import (
+    before_task_publish, celeryd_init, setup_logging, task_prerun, worker_ready, worker_init,
+    worker_shutdown, worker_process_init, worker_process_shutdown
+)
+from app.core.worker_loop import get_worker_loop, close_worker_loop
+from app.core.metrics import CELERY_QUEUE_WAIT_SECONDS, mark_process_dead
+from app.core.logging_config import configure_logging
+
+@setup_logging.connect
+def setup_logging_handler(**kwargs):
+    """Use the application's queue-backed logging instead of Celery's"""
+    configure_logging()
+
+@celeryd_init.connect
+def lane_concurrency_handler(sender=None, conf=None, options=None, **kwargs):
+    """Size the pool from the lanes a worker consumes unless -c was given"""
+    options = options or {}
+    if options.get("concurrency"):
+        return
+    queues = options.get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    lane_limits = [LANE_CONCURRENCY[queue] for queue in queues if queue in LANE_CONCURRENCY]
+    if lane_limits:
+        conf.worker_concurrency = sum(lane_limits)
+        logger.info("Worker %s consuming %s with concurrency %d", sender, queues, conf.worker_concurrency)
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    """Record when a task was published, for the lane wait histogram"""
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+@task_prerun.connect
+def observe_queue_wait(task=None, **kwargs):
+    """Observe how long a task waited in its lane before a worker started it"""
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is None:
+        return
+    queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+    CELERY_QUEUE_WAIT_SECONDS.labels(queue, task.name.rsplit(".", 1)[-1]).observe(
+        max(0.0, time.time() - enqueued_at)
+    )
 
 @worker_ready.connect
 def worker_ready_handler(sender=None, **kwargs):
     """Called when worker is ready"""
-    logger.info(f"Worker {sender} is ready and accepting tasks")
+    logger.info("Worker %s is ready and accepting tasks", sender)
     # Test database connection when worker is ready
     try:
         from app.core.database import db
         result = db.execute_query("SELECT 1 as test")
-        logger.info(f"Database connection confirmed on worker startup: {result}")
+        logger.info("Database connection confirmed on worker startup: %s", result)
     except Exception as e:
-        logger.error(f"Database connection failed on worker startup: {e}")
+        logger.error("Database connection failed on worker startup: %s", e)
 
 @worker_init.connect
 def worker_init_handler(sender=None, **kwargs):
     """Called when worker is initializing"""
-    logger.info(f"Worker {sender} is initializing...")
+    logger.info("Worker %s is initializing...", sender)
 
 @worker_shutdown.connect
 def worker_shutdown_handler(sender=None, **kwargs):
     """Called when worker is shutting down"""
-    logger.info(f"Worker {sender} is shutting down")
\ No newline at end of file
+    logger.info("Worker %s is shutting down", sender)
+    # Solo/threads pools run tasks in the main process
+    close_worker_loop()
+
+@worker_process_init.connect
+def worker_process_init_handler(**kwargs):
+    """Start logging and the long-lived event loop for a prefork child process"""
+    configure_logging()
+    get_worker_loop()
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(pid=None, **kwargs):
+    """Close pooled connections and the event loop of a prefork child process"""
+    close_worker_loop()
+    mark_process_dead(pid or os.getpid())
\ No newline at end of file
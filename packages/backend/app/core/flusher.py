@@ -0,0 +1,39 @@
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class BackgroundFlusher:
+    """Daemon thread calling `flush` every `interval` seconds, or as soon as it is woken"""
+
+    def __init__(self, name: str, interval: float, flush: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self._flush = flush
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def ensure_running(self):
+        """Start the thread in this process unless it is already running"""
+        # Threads do not survive fork, so prefork workers start their own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Flush now instead of at the end of the interval"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self._flush()
+            except Exception:
+                logger.exception("Background flush %s failed", self.name)
@@ -0,0 +1,80 @@
+"""ETag and Content-Encoding helpers for cacheable responses"""
+import gzip
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = "identity"
+ENCODINGS = ("br", "gzip")
+
+def available_encodings() -> List[str]:
+    """Content codings this server can produce, most compact first"""
+    return [encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None]
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """`body` in the given content coding"""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return body
+
+def negotiate_encoding(accept_encoding: Optional[str], offered: Optional[List[str]] = None) -> str:
+    """Preferred content coding from an Accept-Encoding header"""
+    if not accept_encoding:
+        return IDENTITY
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip().lower()] = q
+    best, best_q = IDENTITY, 0.0
+    for encoding in offered if offered is not None else available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def format_etag(value: str, encoding: str = IDENTITY) -> str:
+    """Strong entity tag for an opaque version string and content coding"""
+    return f'"{value}"' if encoding == IDENTITY else f'"{value}-{encoding}"'
+
+def if_none_match_values(header: Optional[str]) -> List[str]:
+    """Opaque tags listed in an If-None-Match header, ignoring W/ prefixes"""
+    if not header:
+        return []
+    values = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag:
+            values.append(tag)
+    return values
+
+def versions_for_encoding(header: Optional[str], encoding: str) -> List[str]:
+    """Version strings the client holds in `encoding`, from an If-None-Match header"""
+    suffix = "" if encoding == IDENTITY else f"-{encoding}"
+    versions = []
+    for value in if_none_match_values(header):
+        if suffix and value.endswith(suffix):
+            versions.append(value[:-len(suffix)])
+        elif not suffix and not any(value.endswith(f"-{other}") for other in ENCODINGS):
+            versions.append(value)
+    return versions
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag`"""
+    values = if_none_match_values(header)
+    return "*" in values or etag.strip('"') in values
@@ -0,0 +1,108 @@
+"""Prometheus metrics"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from app.core.config import settings
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Generation stages and cell executions run from milliseconds to minutes
+LONG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Celery lane waits run from milliseconds (an idle lane) to minutes
+QUEUE_WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "alacard_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+GENERATION_STAGE_SECONDS = Histogram(
+    "alacard_generation_stage_duration_seconds",
+    "Notebook generation stage wall time",
+    ["stage", "cache_status", "validation"],
+    buckets=LONG_BUCKETS
+)
+VALIDATOR_CELL_SECONDS = Histogram(
+    "alacard_validator_cell_duration_seconds",
+    "Time to validate one notebook cell, including its execution",
+    ["cell_type", "status"],
+    buckets=LONG_BUCKETS
+)
+CELERY_QUEUE_WAIT_SECONDS = Histogram(
+    "alacard_celery_queue_wait_seconds",
+    "Time from publishing a Celery task to a worker starting it",
+    ["queue", "task"],
+    buckets=QUEUE_WAIT_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "alacard_db_query_duration_seconds",
+    "Postgres query latency",
+    ["client", "operation"]
+)
+CACHE_LOOKUPS = Counter(
+    "alacard_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+# Updated as tasks change state: memory progress stores are per process and
+# add up, a Redis store counts every worker's tasks
+GENERATION_TASKS_IN_FLIGHT = Gauge(
+    "alacard_generation_tasks_in_flight",
+    "Generation tasks queued or running",
+    multiprocess_mode="livesum" if settings.PROGRESS_BACKEND == "memory" else "mostrecent"
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "alacard_websocket_connections",
+    "Open progress WebSocket connections",
+    multiprocess_mode="livesum"
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "alacard_job_queue_depth",
+    "Jobs waiting in the in-process scheduler",
+    multiprocess_mode="livesum"
+)
+JOBS_RUNNING = Gauge(
+    "alacard_jobs_running",
+    "Jobs running in the in-process scheduler",
+    multiprocess_mode="livesum"
+)
+NOTEBOOK_CACHE_BYTES = Gauge(
+    "alacard_notebook_cache_bytes",
+    "Bytes held by an in-process notebook response cache",
+    ["cache"],
+    multiprocess_mode="livesum"
+)
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+def _query_operation(query: str) -> str:
+    words = query.split(None, 1)
+    return words[0].lower() if words else "unknown"
+
+@contextmanager
+def observe_db_query(client: str, query: str) -> Iterator[None]:
+    """Time a Postgres query, labelled by client and SQL verb"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_QUERY_SECONDS.labels(client, _query_operation(query)).observe(time.perf_counter() - started_at)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition payload and content type for /metrics"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid: int):
+    """Drop the live gauges of an exited worker process"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,42 @@
+"""Compose JSON documents around JSON text that is already serialized"""
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class RawJSON(str):
+    """JSON text inserted into a composed document as-is"""
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # UTC as "Z", like Pydantic's response models
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes; datetimes as Pydantic writes them, UUIDs as strings"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+def compose_object(fields: Iterable[Tuple[str, Any]]) -> bytes:
+    """JSON object of `fields` in order, with RawJSON and bytes values copied verbatim"""
+    parts = [b"{"]
+    for index, (key, value) in enumerate(fields):
+        if index:
+            parts.append(b",")
+        parts.append(dumps(key))
+        parts.append(b":")
+        if isinstance(value, bytes):
+            parts.append(value)
+        else:
+            parts.append(value.encode() if isinstance(value, RawJSON) else dumps(value))
+    parts.append(b"}")
+    return b"".join(parts)
@@ -0,0 +1,213 @@
+"""Tracing for the notebook generation pipeline"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from app.core.config import settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+except ImportError:
+    trace = None
+
+SERVICE_NAME = "alacard-backend"
+MEMORY_SPAN_LIMIT = 10000
+
+class _Span:
+    """Finished-span record for the built-in tracer (subset of the OpenTelemetry Span API)"""
+
+    def __init__(self, name: str, trace_id: str, span_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def is_recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.events.append({"name": name, "timestamp": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def record_exception(self, exception: BaseException):
+        self.add_event("exception", {
+            "exception.type": type(exception).__name__,
+            "exception.message": str(exception),
+        })
+
+    def set_status(self, status: Any, description: Optional[str] = None):
+        self.status = getattr(status, "name", str(status))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) / 1e6, 3) if self.end_time else None,
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+class _NoopSpan:
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+    def set_status(self, status: Any, description: Optional[str] = None):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar("alacard_current_span", default=None)
+
+class _BuiltinTracer:
+    """Minimal tracer used when the OpenTelemetry SDK is not installed"""
+
+    def __init__(self, exporter: str, file_path: str):
+        self.exporter = exporter
+        self.file_path = file_path
+        self.finished: Deque[Dict[str, Any]] = deque(maxlen=MEMORY_SPAN_LIMIT)
+        self._lock = threading.Lock()
+
+    def _export(self, span: _Span):
+        record = span.to_dict()
+        if self.exporter == "memory":
+            self.finished.append(record)
+            return
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self.exporter == "stdout":
+                sys.stdout.write(line)
+            elif self.exporter == "file":
+                with open(self.file_path, "a") as f:
+                    f.write(line)
+
+    @contextmanager
+    def start_as_current_span(self, name: str, context: Optional[Dict[str, str]] = None,
+                              attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        if self.exporter == "none":
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        elif context:
+            trace_id, parent_id = context["trace_id"], context["span_id"]
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+
+        span = _Span(name, trace_id, os.urandom(8).hex(), parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+            if span.status == "UNSET":
+                span.status = "OK"
+        except BaseException as e:
+            span.record_exception(e)
+            span.status = "ERROR"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time_ns()
+            self._export(span)
+
+def _configure_opentelemetry(exporter: str, file_path: str):
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    memory_exporter = None
+    if exporter == "stdout":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    elif exporter == "file":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter(
+            out=open(file_path, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )))
+    elif exporter == "memory":
+        memory_exporter = InMemorySpanExporter()
+        provider.add_span_processor(SimpleSpanProcessor(memory_exporter))
+    return provider.get_tracer(SERVICE_NAME), memory_exporter
+
+_exporter = settings.TRACING_EXPORTER.lower()
+if trace is not None:
+    _tracer, _memory_exporter = _configure_opentelemetry(_exporter, settings.TRACING_FILE_PATH)
+else:
+    _tracer, _memory_exporter = _BuiltinTracer(_exporter, settings.TRACING_FILE_PATH), None
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None,
+               carrier: Optional[Dict[str, str]] = None) -> Iterator[Any]:
+    """Start a span as a child of the current span, or of the context in `carrier`"""
+    if trace is not None:
+        context = propagate.extract(carrier) if carrier else None
+        with _tracer.start_as_current_span(name, context=context, attributes=attributes) as span:
+            yield span
+        return
+
+    context = None
+    if carrier and carrier.get("traceparent"):
+        _, trace_id, span_id, _ = carrier["traceparent"].split("-")
+        context = {"trace_id": trace_id, "span_id": span_id}
+    with _tracer.start_as_current_span(name, context=context, attributes=attributes) as span:
+        yield span
+
+def inject_trace_context() -> Dict[str, str]:
+    """W3C trace context for the current span, for handing work to another process"""
+    carrier: Dict[str, str] = {}
+    if trace is not None:
+        propagate.inject(carrier)
+        return carrier
+    span = _current_span.get()
+    if span is not None:
+        carrier["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+    return carrier
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace id of the current span, if one is being recorded"""
+    if trace is not None:
+        span_context = trace.get_current_span().get_span_context()
+        return format(span_context.trace_id, "032x") if span_context.is_valid else None
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+def get_finished_spans() -> List[Dict[str, Any]]:
+    """Spans kept by the in-memory exporter"""
+    if _memory_exporter is not None:
+        return [json.loads(span.to_json()) for span in _memory_exporter.get_finished_spans()]
+    if isinstance(_tracer, _BuiltinTracer):
+        return list(_tracer.finished)
+    return []
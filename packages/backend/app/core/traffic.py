@@ -0,0 +1,79 @@
+"""Opt-in recording of the API request mix for load-test replay"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def path_key(path_params: Dict[str, Any]) -> Optional[str]:
+    """Stable pseudonymous key for the ids in a request path"""
+    if not path_params:
+        return None
+    raw = "/".join(f"{name}={path_params[name]}" for name in sorted(path_params))
+    return hashlib.blake2b(raw.encode(), digest_size=6).hexdigest()
+
+def route_template(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # WebSocket routes do not always expose themselves in the scope
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+class TrafficRecorder:
+    """ASGI middleware appending one trace line per request"""
+
+    def __init__(self, app, path: str, prefix: str = ""):
+        self.app = app
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    def _write(self, entry: list):
+        # [unix_time, method, route_template, key, status, duration_ms]
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            # Reopen after a fork; O_APPEND keeps lines from several workers whole
+            if self._pid != os.getpid():
+                self._file = open(self.path, "a", buffering=1)
+                self._pid = os.getpid()
+            self._file.write(line)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "websocket.accept":
+                status = 101
+            elif message["type"] == "websocket.close" and status == 500:
+                status = 403
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = "WS" if scope["type"] == "websocket" else scope["method"]
+            try:
+                self._write([
+                    round(started_at, 3), method, route_template(scope),
+                    path_key(scope.get("path_params", {})), status,
+                    round((time.time() - started_at) * 1000, 1),
+                ])
+            except Exception as e:
+                logger.warning("Could not record request to %s: %s", self.path, e)
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# One event loop per worker process. Celery tasks are synchronous, so they
+# drive coroutines on this loop instead of calling asyncio.run(), which would
+# build and tear down a loop (and every pooled connection bound to it) per call.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return this process's long-lived event loop, creating it on first use"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion on the worker loop"""
+    return get_worker_loop().run_until_complete(coro)
+
+async def _close_shared_clients():
+    from app.core.database import async_db
+    from app.services.huggingface import hf_service
+
+    await hf_service.aclose()
+    await async_db.close()
+
+def close_worker_loop():
+    """Flush buffered task state, then close shared async clients and the worker loop"""
+    global _loop
+    from app.services.task_store import task_state_store
+
+    task_state_store.flush()
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        _loop.run_until_complete(_close_shared_clients())
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+    finally:
+        _loop.close()
+        _loop = None
@@ -1,7 +1,22 @@
-from fastapi import FastAPI
+import os
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.services.huggingface import hf_service
+from app.services.job_scheduler import job_scheduler
+from app.services.notebook_store import notebook_store
+from app.services.task_store import task_state_store
+from app.services.stage_stats import stage_stats
+from app.services.trending import trending_service
+from app.core.metrics import HTTP_REQUEST_SECONDS, render_metrics
+from app.core.logging_config import configure_logging
+from app.core.traffic import TrafficRecorder
+import logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Alacard Backend API",
@@ -21,13 +36,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so per-notebook URLs share one series
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - started_at)
+
+# Capture the request mix for load-test replay (benchmarks/replay.py)
+if settings.TRAFFIC_RECORD_PATH:
+    app.add_middleware(TrafficRecorder, path=settings.TRAFFIC_RECORD_PATH, prefix="/api/v1")
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def check_progress_backend():
+    # Idempotency keys and task progress must be visible to every worker
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if settings.PROGRESS_BACKEND == "memory" and workers > 1:
+        raise RuntimeError(
+            f"PROGRESS_BACKEND=memory is per process but WEB_CONCURRENCY={workers}; use PROGRESS_BACKEND=redis"
+        )
+
+@app.on_event("startup")
+async def load_stage_timings():
+    # ETAs fall back to configured defaults if history is unavailable
+    try:
+        stage_stats.load_history()
+    except Exception as e:
+        logger.warning("Could not load stage timing history: %s", e)
+
+@app.on_event("startup")
+async def start_trending():
+    # Rankings are computed in the background before the first request asks
+    trending_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_job_scheduler():
+    await job_scheduler.shutdown()
+    await hf_service.aclose()
+    task_state_store.flush()
+    trending_service.flush()
+    notebook_store.flush_accesses()
+
 @app.get("/")
 async def root():
     return {"message": "Alacard Backend API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
\ No newline at end of file
@@ -1,10 +1,11 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from uuid import UUID
 
 class NotebookGenerationRequest(BaseModel):
     hf_model_id: str
+    validation: Literal["full", "static"] = "full"  # static skips cell execution
 
 class NotebookResponse(BaseModel):
     id: UUID
@@ -15,6 +16,48 @@ class NotebookResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     download_count: int = 0
 
+class NotebookSummary(BaseModel):
+    id: UUID
+    created_at: datetime
+    share_id: str
+    hf_model_id: str
+    metadata: Optional[Dict[str, Any]] = None
+    download_count: int = 0
+    cell_count: Optional[int] = None
+
+class NotebookPage(BaseModel):
+    items: List[NotebookSummary]
+    next_cursor: Optional[str] = None
+
+class TrendingNotebook(BaseModel):
+    share_id: str
+    hf_model_id: str
+    created_at: datetime
+    score: float
+    downloads: int
+    views: int
+
+class TrendingResponse(BaseModel):
+    window: Literal["day", "week", "month"]
+    computed_at: Optional[datetime] = None
+    items: List[TrendingNotebook]
+
+class CellOutline(BaseModel):
+    index: int
+    cell_type: Optional[str] = None
+    first_line: str = ""
+
+class NotebookOutline(BaseModel):
+    share_id: str
+    cell_count: Optional[int] = None
+    outline: List[CellOutline]
+
+class NotebookCells(BaseModel):
+    share_id: str
+    start: int
+    cell_count: Optional[int] = None
+    cells: List[Dict[str, Any]]
+
 class ModelInfo(BaseModel):
     id: str
     modelId: str
@@ -38,6 +81,8 @@ class TaskStatus(BaseModel):
 class NotebookGenerationResponse(BaseModel):
     task_id: str
     estimated_time: int = 30
+    status: Optional[str] = None
+    share_id: Optional[str] = None
 
 class ProgressUpdate(BaseModel):
     type: str = "progress"
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+from app.core.config import settings
+from app.core.database import async_db, db
+from app.core.metrics import record_cache_lookup
+
+class CellStore:
+    """Content-addressed notebook cells, shared by every notebook that uses them"""
+
+    INSERT_QUERY = """
+    INSERT INTO notebook_cells (cell_hash, cell)
+    SELECT * FROM unnest(%s::text[], %s::jsonb[])
+    ON CONFLICT (cell_hash) DO NOTHING
+    """
+
+    SELECT_QUERY = """
+    SELECT cell_hash, cell::text AS cell_json
+    FROM notebook_cells
+    WHERE cell_hash = ANY(%s)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cells: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cell_hash(cell: Dict[str, Any]) -> str:
+        """SHA-256 over the canonical JSON of a cell"""
+        canonical = json.dumps(cell, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _new_cells(self, cells: Sequence[Dict[str, Any]]) -> Tuple[List[str], Dict[str, str]]:
+        hashes = [self.cell_hash(cell) for cell in cells]
+        new = {}
+        with self._lock:
+            for cell_hash, cell in zip(hashes, cells):
+                # A cached cell is known to be in notebook_cells
+                if cell_hash not in self._cells and cell_hash not in new:
+                    new[cell_hash] = json.dumps(cell)
+        return hashes, new
+
+    def _remember_inserted(self, new: Dict[str, str]):
+        for cell_hash, cell_json in new.items():
+            self._remember(cell_hash, cell_json.encode())
+
+    def put(self, cells: Sequence[Dict[str, Any]]) -> List[str]:
+        """Store cells not stored yet and return the hash of every cell, in order"""
+        hashes, new = self._new_cells(cells)
+        if new:
+            db.execute_query(self.INSERT_QUERY, (list(new), list(new.values())))
+            self._remember_inserted(new)
+        return hashes
+
+    async def put_async(self, cells: Sequence[Dict[str, Any]]) -> List[str]:
+        hashes, new = self._new_cells(cells)
+        if new:
+            await async_db.execute_query(self.INSERT_QUERY, (list(new), list(new.values())))
+            self._remember_inserted(new)
+        return hashes
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, bytes]:
+        """JSON text of each distinct cell, from memory or notebook_cells"""
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for cell_hash in hashes:
+                cell = self._cells.get(cell_hash)
+                if cell is not None:
+                    self._cells.move_to_end(cell_hash)
+                    found[cell_hash] = cell
+        missing = [cell_hash for cell_hash in dict.fromkeys(hashes) if cell_hash not in found]
+        record_cache_lookup("notebook_cell", not missing)
+        if missing:
+            for row in db.execute_query(self.SELECT_QUERY, (missing,)):
+                found[row["cell_hash"]] = row["cell_json"].encode()
+                self._remember(row["cell_hash"], found[row["cell_hash"]])
+        return found
+
+    def assemble(self, hashes: Sequence[str]) -> bytes:
+        """JSON array of the cells with these hashes, in order"""
+        cells = self.get_many(hashes)
+        try:
+            return b"[" + b",".join(cells[cell_hash] for cell_hash in hashes) + b"]"
+        except KeyError as e:
+            raise LookupError(f"Notebook cell {e.args[0]} is missing from notebook_cells") from e
+
+    def load(self, hashes: Sequence[str]) -> List[Dict[str, Any]]:
+        """Cells with these hashes as dicts, in order"""
+        return json.loads(self.assemble(hashes))
+
+    def _remember(self, cell_hash: str, cell: bytes):
+        with self._lock:
+            if cell_hash in self._cells:
+                return
+            self._cells[cell_hash] = cell
+            self._size += len(cell) + len(cell_hash)
+            while self._size > self.max_bytes and self._cells:
+                evicted_hash, evicted = self._cells.popitem(last=False)
+                self._size -= len(evicted) + len(evicted_hash)
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._size = 0
+
+# Global cell store instance
+cell_store = CellStore(max_bytes=settings.CELL_CACHE_MAX_BYTES)
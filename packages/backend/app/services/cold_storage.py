@@ -0,0 +1,144 @@
+"""Cold tier for archived notebooks"""
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_LEVEL = 19
+ZLIB_LEVEL = 9
+# zstd cannot train a useful dictionary from fewer samples
+MIN_DICTIONARY_SAMPLES = 20
+
+class LocalDirectoryBackend:
+    """Cold objects as files under `root`"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees a partial object
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+def create_backend(name: str, path: str) -> LocalDirectoryBackend:
+    """Cold storage backend named by COLD_STORAGE_BACKEND"""
+    if name == "local":
+        return LocalDirectoryBackend(path)
+    raise ValueError(f"Unknown COLD_STORAGE_BACKEND: {name}")
+
+class ColdStorage:
+    """Compressed notebook objects in a cold backend, keyed by share_id"""
+
+    CURRENT_DICTIONARY_KEY = "dictionaries/current"
+
+    def __init__(self, backend: LocalDirectoryBackend, dictionary_bytes: int):
+        self.backend = backend
+        self.dictionary_bytes = dictionary_bytes
+        self._dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._current_id: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _dictionary(self, dict_id: int) -> "zstandard.ZstdCompressionDict":
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            data = self.backend.get(f"dictionaries/{dict_id}.dict")
+            if data is None:
+                raise LookupError(f"Compression dictionary {dict_id} is missing from cold storage")
+            dictionary = zstandard.ZstdCompressionDict(data)
+            with self._lock:
+                self._dictionaries[dict_id] = dictionary
+        return dictionary
+
+    def current_dictionary_id(self) -> Optional[int]:
+        """Id of the dictionary new archives are compressed with, if any"""
+        if self._current_id is None:
+            current = self.backend.get(self.CURRENT_DICTIONARY_KEY)
+            if current is not None:
+                self._current_id = int(current)
+        return self._current_id
+
+    def ensure_dictionary(self, samples: List[bytes]) -> Optional[int]:
+        """Train and store a dictionary from `samples` unless one exists"""
+        if zstandard is None or self.current_dictionary_id() is not None:
+            return self._current_id
+        if len(samples) < MIN_DICTIONARY_SAMPLES:
+            return None
+        try:
+            dictionary = zstandard.train_dictionary(self.dictionary_bytes, samples)
+        except zstandard.ZstdError as e:
+            logger.warning("Could not train a notebook compression dictionary: %s", e)
+            return None
+        dict_id = dictionary.dict_id()
+        self.backend.put(f"dictionaries/{dict_id}.dict", dictionary.as_bytes())
+        self.backend.put(self.CURRENT_DICTIONARY_KEY, str(dict_id).encode())
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+        self._current_id = dict_id
+        logger.info("Trained notebook compression dictionary %d from %d samples", dict_id, len(samples))
+        return dict_id
+
+    def put(self, share_id: str, payload: bytes) -> str:
+        """Compress and store a notebook; returns its object key"""
+        if zstandard is None:
+            key = f"notebooks/{share_id}.zlib"
+            data = zlib.compress(payload, ZLIB_LEVEL)
+        else:
+            dict_id = self.current_dictionary_id()
+            key = f"notebooks/{share_id}.{dict_id or 0}.zst"
+            compressor = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL, dict_data=self._dictionary(dict_id) if dict_id else None
+            )
+            data = compressor.compress(payload)
+        self.backend.put(key, data)
+        return key
+
+    def get(self, key: str) -> bytes:
+        """Decompressed notebook stored under `key`"""
+        data = self.backend.get(key)
+        if data is None:
+            raise LookupError(f"Archived notebook {key} is missing from cold storage")
+        if key.endswith(".zlib"):
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {key}")
+        dict_id = int(key.rsplit(".", 2)[1])
+        decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary(dict_id) if dict_id else None)
+        return decompressor.decompress(data)
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+
+# Global cold storage instance
+cold_storage = ColdStorage(
+    backend=create_backend(settings.COLD_STORAGE_BACKEND, settings.COLD_STORAGE_PATH),
+    dictionary_bytes=settings.COLD_STORAGE_DICTIONARY_BYTES,
+)
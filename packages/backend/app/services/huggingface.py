@@ -1,17 +1,53 @@
+import asyncio
+import logging
 import httpx
 from app.models.notebook import ModelInfo
 from typing import List, Optional
 from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
 
 class HuggingFaceService:
     def __init__(self):
-        self.base_url = "https://huggingface.co/api"
+        self.base_url = settings.HF_API_URL
         self.headers = {
             "User-Agent": "Alacard-Notebook-Generator/1.0"
         }
         # Only add auth token if we have a real one
         if settings.HF_API_TOKEN and settings.HF_API_TOKEN != "your-huggingface-token":
             self.headers["Authorization"] = f"Bearer {settings.HF_API_TOKEN}"
+        # Pooled client, reused for every request made on the same event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            previous, previous_loop = self._client, self._client_loop
+            self._client = httpx.AsyncClient(headers=self.headers)
+            self._client_loop = loop
+            if previous is not None and not previous.is_closed:
+                await self._close_previous(previous, previous_loop)
+        return self._client
+
+    async def _close_previous(self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close the client of a loop this service no longer serves"""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("Could not cleanly close the HTTP client of a previous event loop: %s", e)
+
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
 
     async def get_popular_models(self) -> List[ModelInfo]:
         """Get list of popular Hugging Face models"""
@@ -63,56 +99,50 @@ class HuggingFaceService:
 
     async def get_model_info(self, model_id: str) -> Optional[ModelInfo]:
         """Get detailed information about a specific model"""
-        print(f"[DEBUG HF Service] Looking for model: {model_id}")
-
         # For now, return from our hardcoded list
         popular_models = await self.get_popular_models()
-        print(f"[DEBUG HF Service] Checking {len(popular_models)} popular models")
         for model in popular_models:
             if model.modelId == model_id:
-                print(f"[DEBUG HF Service] Found model in popular list: {model_id}")
+                logger.debug("Model %s found in popular list", model_id)
+                record_cache_lookup("hub_model_info", hit=True)
                 return model
+        record_cache_lookup("hub_model_info", hit=False)
 
-        print(f"[DEBUG HF Service] Model not in popular list, trying API...")
         # If not found, try to fetch from API
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/models/{model_id}", headers=self.headers)
-                print(f"[DEBUG HF Service] API response status: {response.status_code}")
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"[DEBUG HF Service] API response keys: {list(data.keys()) if isinstance(data, dict) else type(data)}")
-                    return ModelInfo(
-                        id=data.get("id", model_id),
-                        modelId=data.get("id", model_id),
-                        name=data.get("modelId", model_id),
-                        description=data.get("description"),
-                        pipeline_tag=data.get("pipeline_tag"),
-                        downloads=data.get("downloads", 0),
-                        likes=data.get("likes", 0),
-                        tags=data.get("tags", [])
-                    )
-                else:
-                    print(f"[DEBUG HF Service] API error response: {response.text[:200]}")
-        except Exception as e:
-            print(f"[DEBUG HF Service] Error fetching model info: {e}")
-            import traceback
-            traceback.print_exc()
+            client = await self._get_client()
+            response = await client.get(f"{self.base_url}/models/{model_id}")
+            logger.debug("Hub model API returned %d for %s", response.status_code, model_id)
+            if response.status_code == 200:
+                data = response.json()
+                return ModelInfo(
+                    id=data.get("id", model_id),
+                    modelId=data.get("id", model_id),
+                    name=data.get("modelId", model_id),
+                    description=data.get("description"),
+                    pipeline_tag=data.get("pipeline_tag"),
+                    downloads=data.get("downloads", 0),
+                    likes=data.get("likes", 0),
+                    tags=data.get("tags", [])
+                )
+            else:
+                logger.info("Hub model API returned %d for %s", response.status_code, model_id)
+        except Exception:
+            logger.warning("Error fetching model info for %s", model_id, exc_info=True)
 
-        print(f"[DEBUG HF Service] Returning None for model: {model_id}")
         return None
 
     async def get_model_readme(self, model_id: str) -> Optional[str]:
         """Get the README content for a model"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://huggingface.co/{model_id}/raw/main/README.md",
-                    headers=self.headers
-                )
-                if response.status_code == 200:
-                    return response.text
-        except Exception as e:
-            print(f"Error fetching model README: {e}")
+            client = await self._get_client()
+            response = await client.get(f"{settings.HF_BASE_URL}/{model_id}/raw/main/README.md")
+            if response.status_code == 200:
+                return response.text
+        except Exception:
+            logger.warning("Error fetching README for %s", model_id, exc_info=True)
+
+        return None
 
-        return None
\ No newline at end of file
+# Shared service instance so the HTTP connection pool persists across requests
+hf_service = HuggingFaceService()
@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from app.core.cache import get_redis
+from app.services.notebook_generator import GENERATOR_VERSION
+
+# Compare-and-delete so a worker only releases a claim it still owns
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+@dataclass
+class InflightJob:
+    task_id: str
+    expected_done_at: float = 0.0
+
+class JobDeduplicator:
+    """Tracks in-flight generation jobs so identical requests share one pipeline"""
+
+    def __init__(self):
+        self._inflight: Dict[str, InflightJob] = {}
+
+    @staticmethod
+    def make_key(hf_model_id: str, validation: str = "full", version: str = GENERATOR_VERSION) -> str:
+        """Dedup key for a model, validation mode and generator version"""
+        return f"{version}:{validation}:{hf_model_id}"
+
+    def claim(self, key: str, task_id: str) -> InflightJob:
+        """Register `task_id` as the running job for `key`, or return the job already running"""
+        job = self._inflight.get(key)
+        if job is None:
+            job = InflightJob(task_id=task_id)
+            self._inflight[key] = job
+        return job
+
+    def get(self, key: str) -> Optional[InflightJob]:
+        return self._inflight.get(key)
+
+    def release(self, key: str, task_id: str):
+        """Drop the claim for `key` if it is still held by `task_id`"""
+        job = self._inflight.get(key)
+        if job and job.task_id == task_id:
+            del self._inflight[key]
+
+    def remaining_time(self, job: InflightJob) -> int:
+        """Seconds until an in-flight job is expected to finish"""
+        return max(1, int(job.expected_done_at - time.monotonic()))
+
+    # Distributed claims shared by all Celery workers
+
+    def claim_distributed(self, key: str, task_id: str, ttl: int) -> str:
+        """Claim `key` in Redis and return the task id that owns it"""
+        client = get_redis()
+        redis_key = f"dedup:{key}"
+        if client.set(redis_key, task_id, nx=True, ex=ttl):
+            return task_id
+        owner = client.get(redis_key)
+        if owner is None:
+            # Claim expired between SET and GET; try once more
+            return task_id if client.set(redis_key, task_id, nx=True, ex=ttl) else client.get(redis_key) or task_id
+        return owner
+
+    def release_distributed(self, key: str, task_id: str):
+        """Release a Redis claim if it is still owned by `task_id`"""
+        get_redis().eval(_RELEASE_SCRIPT, 1, f"dedup:{key}", task_id)
+
+# Global deduplicator instance
+job_deduplicator = JobDeduplicator()
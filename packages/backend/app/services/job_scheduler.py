@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import JOB_QUEUE_DEPTH, JOBS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot admit another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Job:
+    job_id: str
+    func: Callable[..., Awaitable[Any]]
+    args: Tuple[Any, ...]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobScheduler:
+    """In-process job scheduler with a bounded worker pool and a bounded queue"""
+
+    def __init__(self, max_workers: int, max_queue_size: int, default_duration: float):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.default_duration = default_duration
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        # Rolling windows used for metrics and wait estimates
+        self._wait_times: Deque[float] = deque(maxlen=500)
+        self._run_times: Deque[float] = deque(maxlen=500)
+
+    def _ensure_started(self):
+        """Start the worker pool on the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def average_duration(self) -> float:
+        """Average job run time, falling back to the configured default"""
+        if not self._run_times:
+            return self.default_duration
+        return sum(self._run_times) / len(self._run_times)
+
+    def estimate_wait(self, jobs_ahead: int) -> float:
+        """Estimate seconds until a job with `jobs_ahead` queued jobs in front of it starts"""
+        free_slots = self.max_workers - self._running
+        if jobs_ahead < free_slots:
+            return 0.0
+        waves = (jobs_ahead - free_slots) // self.max_workers + 1
+        return waves * self.average_duration()
+
+    def submit(self, job_id: str, func: Callable[..., Awaitable[Any]], *args: Any) -> int:
+        """Queue a job and return its 0-based position, or raise QueueFullError"""
+        self._ensure_started()
+        position = self._queue.qsize()
+        try:
+            self._queue.put_nowait(_Job(job_id=job_id, func=func, args=args))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            retry_after = max(1, int(math.ceil(self.estimate_wait(position) or self.average_duration())))
+            raise QueueFullError(retry_after)
+        JOB_QUEUE_DEPTH.set(self.queue_depth)
+        return position
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self._wait_times.append(time.monotonic() - job.enqueued_at)
+            self._running += 1
+            JOB_QUEUE_DEPTH.set(self.queue_depth)
+            JOBS_RUNNING.set(self._running)
+            started_at = time.monotonic()
+            try:
+                await job.func(*job.args)
+                self._completed += 1
+            except Exception:
+                self._failed += 1
+                logger.exception("Job %s failed", job.job_id)
+            finally:
+                self._running -= 1
+                JOBS_RUNNING.set(self._running)
+                self._run_times.append(time.monotonic() - started_at)
+                self._queue.task_done()
+
+    async def shutdown(self):
+        """Cancel the worker pool"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and wait-time metrics"""
+        waits = sorted(self._wait_times)
+
+        def percentile(values: List[float], pct: float) -> float:
+            if not values:
+                return 0.0
+            index = min(len(values) - 1, int(round(pct * (len(values) - 1))))
+            return round(values[index], 3)
+
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "running": self._running,
+            "max_workers": self.max_workers,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "wait_time_seconds": {
+                "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p50": percentile(waits, 0.5),
+                "p95": percentile(waits, 0.95),
+                "max": round(waits[-1], 3) if waits else 0.0,
+            },
+            "average_run_time_seconds": round(self.average_duration(), 3),
+        }
+
+
+# Global scheduler instance
+job_scheduler = JobScheduler(
+    max_workers=settings.JOB_MAX_WORKERS,
+    max_queue_size=settings.JOB_MAX_QUEUE_SIZE,
+    default_duration=settings.JOB_DEFAULT_DURATION_SECONDS,
+)
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.http_cache import IDENTITY, compress
+from app.core.metrics import NOTEBOOK_CACHE_BYTES, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Bookkeeping per entry on top of the body and version bytes
+ENTRY_OVERHEAD_BYTES = 200
+
+@dataclass
+class CachedNotebook:
+    body: bytes
+    version: Optional[str]
+    expires_at: float
+    # Compressed copies of `body`, made on first request per content coding
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.body) + len(self.version or "") + ENTRY_OVERHEAD_BYTES
+            + sum(len(variant) for variant in self.variants.values())
+        )
+
+class NotebookResponseCache:
+    """Byte-bounded LRU of serialized notebook responses, keyed by share_id"""
+
+    def __init__(self, name: str, max_bytes: int, ttl: int, redis_enabled: bool):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.redis_enabled = redis_enabled
+        self._entries: "OrderedDict[str, CachedNotebook]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _redis_key(self, share_id: str) -> str:
+        return f"{self.name}:{share_id}"
+
+    def get(self, share_id: str) -> Optional[CachedNotebook]:
+        """Cached response for `share_id`, from memory or the Redis tier"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(share_id)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(share_id)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(share_id)
+        record_cache_lookup(self.name, entry is not None)
+        if entry is not None or not self.redis_enabled:
+            return entry
+
+        entry = self._get_redis(share_id, now)
+        record_cache_lookup(f"{self.name}_redis", entry is not None)
+        if entry is not None:
+            self._store(share_id, entry)
+        return entry
+
+    def _get_redis(self, share_id: str, now: float) -> Optional[CachedNotebook]:
+        try:
+            client = get_redis()
+            pipeline = client.pipeline()
+            pipeline.get(self._redis_key(share_id))
+            pipeline.ttl(self._redis_key(share_id))
+            value, ttl = pipeline.execute()
+        except Exception as e:
+            logger.warning("Notebook cache Redis lookup failed: %s", e)
+            return None
+        if value is None:
+            return None
+        version, body = value.split("\n", 1)
+        # Keep the Redis expiry so the count is not served staler than `ttl`
+        return CachedNotebook(body=body.encode(), version=version or None, expires_at=now + max(ttl, 1))
+
+    def put(self, share_id: str, body: bytes, version: Optional[str]) -> CachedNotebook:
+        """Cache a serialized response and return its entry"""
+        entry = CachedNotebook(body=body, version=version, expires_at=time.monotonic() + self.ttl)
+        if not self.enabled:
+            return entry
+        self._store(share_id, entry)
+        if self.redis_enabled:
+            try:
+                get_redis().set(self._redis_key(share_id), f"{version or ''}\n{body.decode()}", ex=self.ttl)
+            except Exception as e:
+                logger.warning("Notebook cache Redis write failed: %s", e)
+        return entry
+
+    def encoded(self, share_id: str, entry: CachedNotebook, encoding: str) -> bytes:
+        """`entry`'s body in a content coding, compressed once per entry"""
+        if encoding == IDENTITY:
+            return entry.body
+        variant = entry.variants.get(encoding)
+        if variant is None:
+            variant = compress(entry.body, encoding)
+            with self._lock:
+                if encoding not in entry.variants:
+                    entry.variants[encoding] = variant
+                    if self._entries.get(share_id) is entry:
+                        self._size += len(variant)
+                        self._evict()
+            NOTEBOOK_CACHE_BYTES.labels(self.name).set(self._size)
+        return variant
+
+    def _store(self, share_id: str, entry: CachedNotebook):
+        # One huge notebook must not flush everything else
+        if entry.size > self.max_bytes // 4:
+            return
+        with self._lock:
+            self._remove(share_id)
+            self._entries[share_id] = entry
+            self._size += entry.size
+            self._evict()
+        NOTEBOOK_CACHE_BYTES.labels(self.name).set(self._size)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, share_id: str):
+        entry = self._entries.pop(share_id, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def invalidate(self, share_id: str):
+        """Drop a notebook after it was changed"""
+        with self._lock:
+            self._remove(share_id)
+        NOTEBOOK_CACHE_BYTES.labels(self.name).set(self._size)
+        if self.redis_enabled:
+            try:
+                get_redis().delete(self._redis_key(share_id))
+            except Exception as e:
+                logger.warning("Notebook cache Redis invalidation failed: %s", e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        NOTEBOOK_CACHE_BYTES.labels(self.name).set(0)
+
+# Global notebook response cache instances: share pages, and .ipynb
+# downloads, whose version is the content hash
+notebook_cache = NotebookResponseCache(
+    name="notebook_response",
+    max_bytes=settings.NOTEBOOK_CACHE_MAX_BYTES,
+    ttl=settings.NOTEBOOK_CACHE_TTL_SECONDS,
+    redis_enabled=settings.NOTEBOOK_CACHE_REDIS,
+)
+download_cache = NotebookResponseCache(
+    name="notebook_download",
+    max_bytes=settings.NOTEBOOK_DOWNLOAD_CACHE_MAX_BYTES,
+    ttl=settings.NOTEBOOK_DOWNLOAD_CACHE_TTL_SECONDS,
+    redis_enabled=False,
+)
@@ -3,37 +3,51 @@ import uuid
 import re
 import asyncio
 from typing import Dict, Any, Optional
-from app.services.huggingface import HuggingFaceService
+from app.services.huggingface import HuggingFaceService, hf_service as shared_hf_service
 from app.models.notebook import ModelInfo
+from app.core.tracing import start_span
+
+# Bump whenever the generated notebook layout changes
+GENERATOR_VERSION = "1.0.0"
 
 class NotebookGenerator:
-    def __init__(self):
-        self.hf_service = HuggingFaceService()
+    def __init__(self, hf_service: Optional[HuggingFaceService] = None):
+        self.hf_service = hf_service or shared_hf_service
 
     async def generate_notebook(self, hf_model_id: str) -> Dict[str, Any]:
         """Generate a Jupyter notebook from a Hugging Face model"""
 
         # Get model information
-        model_info = await self.hf_service.get_model_info(hf_model_id)
+        with start_span("generator.fetch_model_info", {"hf.model_id": hf_model_id}):
+            model_info = await self.hf_service.get_model_info(hf_model_id)
         if not model_info:
             raise ValueError(f"Model {hf_model_id} not found")
 
         # Get README content
-        readme_content = await self.hf_service.get_model_readme(hf_model_id)
+        with start_span("generator.fetch_readme", {"hf.model_id": hf_model_id}):
+            readme_content = await self.hf_service.get_model_readme(hf_model_id)
+
+        return self.render_notebook(hf_model_id, model_info, readme_content)
+
+    def render_notebook(self, hf_model_id: str, model_info: ModelInfo, readme_content: Optional[str]) -> Dict[str, Any]:
+        """Render notebook content from already fetched model information"""
 
         # Extract code examples from README
-        code_examples = self._extract_code_from_readme(readme_content) if readme_content else []
+        with start_span("generator.extract_readme_code", {"readme.length": len(readme_content or "")}) as span:
+            code_examples = self._extract_code_from_readme(readme_content) if readme_content else []
+            span.set_attribute("readme.code_blocks", len(code_examples))
 
         # Generate notebook cells
-        cells = [
-            self._title_cell(model_info),
-            self._setup_cell(),
-            self._hello_cell(hf_model_id),
-            self._model_info_cell(model_info),
-            await self._readme_example_cell(code_examples[0] if code_examples else None, hf_model_id),
-            self._generic_example_cell(model_info),
-            self._next_steps_cell(model_info)
-        ]
+        with start_span("generator.build_cells", {"model.pipeline_tag": model_info.pipeline_tag or ""}):
+            cells = [
+                self._title_cell(model_info),
+                self._setup_cell(),
+                self._hello_cell(hf_model_id),
+                self._model_info_cell(model_info),
+                self._readme_example_cell(code_examples[0] if code_examples else None, model_info),
+                self._generic_example_cell(model_info),
+                self._next_steps_cell(model_info)
+            ]
 
         # Create notebook structure
         notebook = {
@@ -52,7 +66,7 @@ class NotebookGenerator:
                 "alacard": {
                     "generated_at": "2024-01-01T00:00:00Z",
                     "model_id": hf_model_id,
-                    "version": "1.0.0"
+                    "version": GENERATOR_VERSION
                 }
             },
             "nbformat": 4,
@@ -64,6 +78,7 @@ class NotebookGenerator:
             "metadata": {
                 "model_info": model_info.dict(),
                 "generated_at": "2024-01-01T00:00:00Z",
+                "generator_version": GENERATOR_VERSION,
                 "cells_count": len(cells)
             }
         }
@@ -159,7 +174,7 @@ class NotebookGenerator:
             ]
         }
 
-    async def _readme_example_cell(self, code_example: Optional[str], model_id: str) -> Dict[str, Any]:
+    def _readme_example_cell(self, code_example: Optional[str], model_info: Optional[ModelInfo]) -> Dict[str, Any]:
         """Create README example cell"""
         if code_example:
             return {
@@ -173,8 +188,6 @@ class NotebookGenerator:
                 ]
             }
         else:
-            # Get model info for generic example
-            model_info = await self.hf_service.get_model_info(model_id)
             return self._generic_example_cell(model_info)
 
     def _generic_example_cell(self, model_info: Optional[ModelInfo]) -> Dict[str, Any]:
@@ -0,0 +1,432 @@
+import base64
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from app.core.config import settings
+from app.core.database import async_db, db
+from app.core.flusher import BackgroundFlusher
+from app.core.raw_json import RawJSON, compose_object
+from app.services.cell_store import cell_store
+from app.services.cold_storage import cold_storage
+from app.services.notebook_cache import download_cache, notebook_cache
+
+logger = logging.getLogger(__name__)
+
+# notebooks is partitioned by created_at; resolving a share_id through the
+# notebook_shares registry lets Postgres read a single partition
+SHARE_FILTER = "(share_id, created_at) = (SELECT share_id, created_at FROM notebook_shares WHERE share_id = %s)"
+
+class NotebookStore:
+    """Reads and writes of saved notebooks"""
+
+    # Characters of a cell's first line kept in its outline entry
+    OUTLINE_LINE_CHARS = 120
+    # last_accessed_at is only rewritten once it is this stale
+    ACCESS_RESOLUTION = timedelta(hours=1)
+
+    # Reserves the share_id and inserts the row in one statement; the
+    # registry's created_at is the partition key
+    INSERT_QUERY = """
+    WITH share AS (
+        INSERT INTO notebook_shares (share_id) VALUES (%s)
+        RETURNING share_id, created_at
+    )
+    INSERT INTO notebooks (
+        created_at, share_id, hf_model_id, notebook_content, metadata, content_hash,
+        cell_count, outline, cell_hashes
+    )
+    SELECT share.created_at, share.share_id, %s, %s, %s, %s, %s, %s, %s
+    FROM share
+    RETURNING id, created_at
+    """
+
+    # JSONB as text, so the share page is composed without parsing the notebook
+    PAGE_QUERY = f"""
+    SELECT id, created_at, share_id, hf_model_id, notebook_content::text AS notebook_content_json,
+           metadata::text AS metadata_json, download_count, content_hash, cell_hashes, archive_key
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    # Narrow projections never detoast notebook_content
+    VERSION_QUERY = f"""
+    SELECT content_hash, download_count
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    SUMMARY_QUERY = f"""
+    SELECT id, created_at, share_id, hf_model_id, metadata, download_count, cell_count
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    DOWNLOAD_QUERY = f"""
+    SELECT hf_model_id, content_hash
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    OUTLINE_QUERY = f"""
+    SELECT content_hash, cell_count, outline::text AS outline_json
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    # Keyset pagination over (created_at, id); {where} narrows it to a model
+    # and/or continues after a cursor. Never OFFSET, so deep pages cost the same.
+    LIST_QUERY = """
+    SELECT id, created_at, share_id, hf_model_id, metadata, download_count, cell_count
+    FROM notebooks
+    {where}
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+    """
+
+    # Sliced in Postgres. Content-addressed rows return the range's hashes;
+    # older rows are detoasted and return the range's cells as text. Array
+    # subscripts and ord are 1-based.
+    CELLS_QUERY = f"""
+    SELECT content_hash, cell_count, archive_key, cell_hashes[%s:%s] AS cell_hashes,
+           CASE WHEN cell_hashes IS NULL THEN (
+               SELECT COALESCE(jsonb_agg(t.cell ORDER BY t.ord), '[]'::jsonb)
+               FROM jsonb_array_elements(notebooks.notebook_content->'cells') WITH ORDINALITY AS t(cell, ord)
+               WHERE t.ord > %s AND t.ord <= %s
+           )::text END AS cells_json
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    CONTENT_QUERY = f"""
+    SELECT notebook_content, cell_hashes, archive_key
+    FROM notebooks
+    WHERE {SHARE_FILTER}
+    """
+
+    # Idle means not read since `cutoff`, through notebooks_unarchived_accessed_idx
+    ARCHIVE_CANDIDATES_QUERY = """
+    SELECT share_id
+    FROM notebooks
+    WHERE archived_at IS NULL AND last_accessed_at < %s
+    ORDER BY last_accessed_at
+    LIMIT %s
+    """
+
+    # The archive holds only what ARCHIVE_QUERY clears; cells stay in notebook_cells
+    ARCHIVE_SOURCE_QUERY = f"""
+    SELECT notebook_content, cell_hashes
+    FROM notebooks
+    WHERE {SHARE_FILTER} AND archived_at IS NULL
+    """
+
+    ARCHIVE_QUERY = f"""
+    UPDATE notebooks
+    SET notebook_content = '{{}}'::jsonb, cell_hashes = NULL, archive_key = %s, archived_at = NOW()
+    WHERE {SHARE_FILTER} AND archived_at IS NULL
+    """
+
+    RESTORE_QUERY = f"""
+    UPDATE notebooks
+    SET notebook_content = %s, cell_hashes = %s, archive_key = NULL, archived_at = NULL, last_accessed_at = NOW()
+    WHERE {SHARE_FILTER} AND archive_key = %s
+    """
+
+    # One statement per flush; each row is found through the notebook_shares registry
+    ACCESS_QUERY = """
+    UPDATE notebooks n SET last_accessed_at = %s
+    FROM notebook_shares s
+    WHERE s.share_id = ANY(%s) AND n.share_id = s.share_id AND n.created_at = s.created_at
+      AND n.last_accessed_at < %s
+    """
+
+    COUNT_QUERY = f"""
+    UPDATE notebooks SET download_count = download_count + 1
+    WHERE {SHARE_FILTER}
+    """
+
+    COUNT_IF_UNCHANGED_QUERY = f"""
+    UPDATE notebooks SET download_count = download_count + 1
+    WHERE {SHARE_FILTER} AND content_hash = ANY(%s)
+    RETURNING content_hash
+    """
+
+    def __init__(self, access_flush_interval: float):
+        self._accessed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._flusher = BackgroundFlusher("notebook-access-flusher", access_flush_interval, self.flush_accesses)
+
+    @staticmethod
+    def content_hash(notebook_content: Dict[str, Any], metadata: Dict[str, Any]) -> str:
+        """SHA-256 over the canonical JSON of a notebook and its metadata"""
+        canonical = json.dumps(
+            {"notebook_content": notebook_content, "metadata": metadata},
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @staticmethod
+    def download_body(notebook_content: Dict[str, Any]) -> bytes:
+        """The .ipynb file as served"""
+        return json.dumps(notebook_content, indent=2).encode()
+
+    @classmethod
+    def outline(cls, notebook_content: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Type and first line of every cell, as stored in the outline column"""
+        entries = []
+        for index, cell in enumerate(notebook_content.get("cells", [])):
+            source = cell.get("source") or ""
+            if isinstance(source, list):
+                source = source[0] if source else ""
+            entries.append({
+                "index": index,
+                "cell_type": cell.get("cell_type"),
+                "first_line": source.split("\n", 1)[0][:cls.OUTLINE_LINE_CHARS],
+            })
+        return entries
+
+    def _insert_params(self, share_id: str, hf_model_id: str, notebook_content: Dict[str, Any],
+                       metadata: Dict[str, Any], cell_hashes: List[str]) -> tuple:
+        skeleton = {key: value for key, value in notebook_content.items() if key != "cells"}
+        return (
+            share_id, hf_model_id, json.dumps(skeleton), json.dumps(metadata),
+            self.content_hash(notebook_content, metadata),
+            len(cell_hashes), json.dumps(self.outline(notebook_content)), cell_hashes
+        )
+
+    def insert(self, share_id: str, hf_model_id: str, notebook_content: Dict[str, Any],
+               metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Save a notebook and return its id and created_at"""
+        # Cells first, so a notebook row never references a missing cell
+        cell_hashes = cell_store.put(notebook_content.get("cells", []))
+        return db.execute_single_query(
+            self.INSERT_QUERY, self._insert_params(share_id, hf_model_id, notebook_content, metadata, cell_hashes)
+        )
+
+    async def insert_async(self, share_id: str, hf_model_id: str, notebook_content: Dict[str, Any],
+                           metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        cell_hashes = await cell_store.put_async(notebook_content.get("cells", []))
+        return await async_db.execute_single_query(
+            self.INSERT_QUERY, self._insert_params(share_id, hf_model_id, notebook_content, metadata, cell_hashes)
+        )
+
+    @staticmethod
+    def _notebook_json(notebook_json: str, cell_hashes: Optional[List[str]]) -> Union[RawJSON, bytes]:
+        # Reassemble a content-addressed notebook around its cells' stored text
+        if cell_hashes is None:
+            return RawJSON(notebook_json)
+        skeleton = json.loads(notebook_json)
+        return compose_object((("cells", cell_store.assemble(cell_hashes)), *skeleton.items()))
+
+    def _fetch_hot(self, query: str, params: tuple, share_id: str) -> Optional[Dict[str, Any]]:
+        # Run a row query that needs the content, restoring an archived notebook first
+        result = db.execute_single_query(query, params)
+        if result and result["archive_key"]:
+            self.restore(share_id, result["archive_key"])
+            result = db.execute_single_query(query, params)
+            if result and result["archive_key"]:
+                raise LookupError(f"Archived notebook {share_id} could not be restored")
+        return result
+
+    def get_page(self, share_id: str) -> Optional[Dict[str, Any]]:
+        """Share page row with `body`, the NotebookResponse JSON built around the stored text"""
+        result = self._fetch_hot(self.PAGE_QUERY, (share_id,), share_id)
+        if result:
+            metadata_json = result["metadata_json"]
+            result["body"] = compose_object((
+                ("id", result["id"]),
+                ("created_at", result["created_at"]),
+                ("share_id", result["share_id"]),
+                ("hf_model_id", result["hf_model_id"]),
+                ("notebook_content", self._notebook_json(result["notebook_content_json"], result["cell_hashes"])),
+                ("metadata", RawJSON(metadata_json) if metadata_json is not None else None),
+                ("download_count", result["download_count"] or 0),
+            ))
+        return result
+
+    def get_summary(self, share_id: str) -> Optional[Dict[str, Any]]:
+        """Notebook row with metadata and cell_count but no notebook content"""
+        return db.execute_single_query(self.SUMMARY_QUERY, (share_id,))
+
+    def get_outline(self, share_id: str) -> Optional[Dict[str, Any]]:
+        """content_hash, cell_count and `body`, the outline response JSON"""
+        result = db.execute_single_query(self.OUTLINE_QUERY, (share_id,))
+        if result:
+            result["body"] = compose_object((
+                ("share_id", share_id),
+                ("cell_count", result["cell_count"]),
+                ("outline", RawJSON(result["outline_json"] or "[]")),
+            ))
+        return result
+
+    def get_cells(self, share_id: str, start: int, limit: int) -> Optional[Dict[str, Any]]:
+        """content_hash, cell_count and `body`, the JSON of cells [start, start + limit)"""
+        result = self._fetch_hot(
+            self.CELLS_QUERY, (start + 1, start + limit, start, start + limit, share_id), share_id
+        )
+        if result:
+            if result["cells_json"] is None:
+                cells = cell_store.assemble(result["cell_hashes"] or [])
+            else:
+                cells = RawJSON(result["cells_json"])
+            result["body"] = compose_object((
+                ("share_id", share_id),
+                ("start", start),
+                ("cell_count", result["cell_count"]),
+                ("cells", cells),
+            ))
+        return result
+
+    @staticmethod
+    def encode_cursor(row: Dict[str, Any]) -> str:
+        """Opaque cursor continuing a listing after `row`"""
+        value = f"{row['created_at'].isoformat()}|{row['id']}"
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+        """created_at and id from a cursor; ValueError if it is malformed"""
+        try:
+            value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, row_id = value.split("|")
+            return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def list_summaries(self, limit: int, cursor: Optional[str] = None,
+                       hf_model_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest notebook summaries first, optionally for one model; returns (rows, next cursor)"""
+        conditions, params = [], []
+        if hf_model_id:
+            conditions.append("hf_model_id = %s")
+            params.append(hf_model_id)
+        if cursor:
+            conditions.append("(created_at, id) < (%s, %s)")
+            params.extend(self.decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # One extra row tells whether there is a next page
+        rows = db.execute_query(self.LIST_QUERY.format(where=where), (*params, limit + 1))
+        if len(rows) > limit:
+            return rows[:limit], self.encode_cursor(rows[limit - 1])
+        return rows, None
+
+    def get_version(self, share_id: str) -> Optional[Dict[str, Any]]:
+        """content_hash and download_count of a notebook, without its content"""
+        return db.execute_single_query(self.VERSION_QUERY, (share_id,))
+
+    def get_download(self, share_id: str, encoding: str) -> Optional[Dict[str, Any]]:
+        """hf_model_id, content_hash and the download body in `encoding`"""
+        result = db.execute_single_query(self.DOWNLOAD_QUERY, (share_id,))
+        if not result:
+            return None
+        # Rebuilt from the shared cells on a miss; the content hash versions the entry
+        entry = download_cache.get(share_id)
+        if entry is None or entry.version != result["content_hash"]:
+            content = self.get_content(share_id)
+            if content is None:
+                return None
+            entry = download_cache.put(share_id, self.download_body(content), result["content_hash"])
+        result["body"] = download_cache.encoded(share_id, entry, encoding)
+        return result
+
+    def get_content(self, share_id: str) -> Optional[Dict[str, Any]]:
+        """The full notebook, reassembled from its cells if content-addressed"""
+        row = self._fetch_hot(self.CONTENT_QUERY, (share_id,), share_id)
+        if not row:
+            return None
+        if row["cell_hashes"] is None:
+            return row["notebook_content"]
+        return {"cells": cell_store.load(row["cell_hashes"]), **row["notebook_content"]}
+
+    def archive_idle(self, idle_days: int, limit: int) -> int:
+        """Move up to `limit` notebooks idle for `idle_days` to cold storage"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=idle_days)
+        rows = db.execute_query(self.ARCHIVE_CANDIDATES_QUERY, (cutoff, limit))
+        payloads = {}
+        for row in rows:
+            source = db.execute_single_query(self.ARCHIVE_SOURCE_QUERY, (row["share_id"],))
+            if source is not None:
+                payloads[row["share_id"]] = json.dumps(source, separators=(",", ":")).encode()
+        # The first batch trains the compression dictionary
+        cold_storage.ensure_dictionary(list(payloads.values()))
+
+        archived = 0
+        for share_id, payload in payloads.items():
+            key = cold_storage.put(share_id, payload)
+            result = db.execute_query(self.ARCHIVE_QUERY, (key, share_id))
+            if result[0]["affected_rows"]:
+                archived += 1
+            else:
+                cold_storage.delete(key)
+        return archived
+
+    def restore(self, share_id: str, archive_key: str):
+        """Bring an archived notebook back into its row"""
+        try:
+            archived = json.loads(cold_storage.get(archive_key))
+        except LookupError:
+            # Restored and deleted by a concurrent read, or lost
+            logger.warning("Archived notebook %s not found at %s", share_id, archive_key)
+            return
+        if "cell_hashes" in archived:
+            notebook_content, cell_hashes = archived["notebook_content"], archived["cell_hashes"]
+        else:
+            # Older archives hold the whole notebook; store its cells again
+            cell_hashes = cell_store.put(archived.get("cells", []))
+            notebook_content = {key: value for key, value in archived.items() if key != "cells"}
+        result = db.execute_query(
+            self.RESTORE_QUERY, (json.dumps(notebook_content), cell_hashes, share_id, archive_key)
+        )
+        # Concurrent reads restore the same object; the one that wins deletes it
+        if result[0]["affected_rows"]:
+            cold_storage.delete(archive_key)
+
+    def record_access(self, share_id: str):
+        """Note a read of a notebook; last_accessed_at is updated by the background flush"""
+        with self._lock:
+            self._accessed.add(share_id)
+        self._flusher.ensure_running()
+
+    def flush_accesses(self):
+        """Write pending reads to last_accessed_at in one statement"""
+        with self._lock:
+            if not self._accessed:
+                return
+            accessed, self._accessed = self._accessed, set()
+
+        now = datetime.now(timezone.utc)
+        try:
+            db.execute_query(self.ACCESS_QUERY, (now, list(accessed), now - self.ACCESS_RESOLUTION))
+        except Exception:
+            logger.exception("Failed to record access to %d notebooks", len(accessed))
+            # Kept for the next flush
+            with self._lock:
+                self._accessed |= accessed
+
+    def count_download(self, share_id: str):
+        """Count a download of a notebook"""
+        db.execute_query(self.COUNT_QUERY, (share_id,))
+        # The share page shows the count, which is part of its version
+        notebook_cache.invalidate(share_id)
+
+    def count_download_if_unchanged(self, share_id: str, content_hashes: List[str]) -> Optional[str]:
+        """Count a download the client already has cached; returns the matching hash"""
+        if not content_hashes:
+            return None
+        result = db.execute_single_query(self.COUNT_IF_UNCHANGED_QUERY, (share_id, content_hashes))
+        if not result:
+            return None
+        notebook_cache.invalidate(share_id)
+        return result["content_hash"]
+
+    def invalidate(self, share_id: str):
+        """Call after changing a saved notebook so cached responses are dropped"""
+        notebook_cache.invalidate(share_id)
+        download_cache.invalidate(share_id)
+
+# Global notebook store instance
+notebook_store = NotebookStore(access_flush_interval=settings.NOTEBOOK_ACCESS_FLUSH_INTERVAL_SECONDS)
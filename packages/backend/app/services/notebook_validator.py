@@ -1,11 +1,18 @@
 import json
+import logging
 import asyncio
 import tempfile
 import subprocess
 import sys
+import time
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from app.models.notebook import ModelInfo
+from app.core.tracing import start_span
+from app.core.metrics import VALIDATOR_CELL_SECONDS
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 class NotebookValidator:
     def __init__(self):
@@ -17,10 +24,9 @@ class NotebookValidator:
         if Path(self.temp_dir).exists():
             shutil.rmtree(self.temp_dir)
 
-    async def validate_notebook(self, notebook_content: Dict[str, Any], model_id: str) -> Dict[str, Any]:
-        """
-        Validate that a generated notebook can execute successfully
-        """
+    async def validate_notebook(self, notebook_content: Dict[str, Any], model_id: str,
+                                runtime: bool = True) -> Dict[str, Any]:
+        """Validate that a generated notebook can execute successfully"""
         validation_results = {
             "notebook_id": model_id,
             "validation_timestamp": "2024-01-01T00:00:00Z",
@@ -32,22 +38,18 @@ class NotebookValidator:
         }
 
         try:
-            # Save notebook to temporary file for inspection
-            notebook_path = Path(self.temp_dir) / f"{model_id.replace('/', '_')}_test.ipynb"
-            with open(notebook_path, 'w') as f:
-                json.dump(notebook_content, f, indent=2)
-            print(f"[DEBUG VALIDATOR] Saved notebook to: {notebook_path}")
-
-            # Also save a copy to a persistent location for manual inspection
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            persistent_path = Path("/Users/marcospolanco/Developer/hack/alacard") / f"generated_notebook_{model_id.replace('/', '_')}_{timestamp}.ipynb"
-            with open(persistent_path, 'w') as f:
-                json.dump(notebook_content, f, indent=2)
-            print(f"[DEBUG VALIDATOR] Saved notebook to persistent location: {persistent_path}")
+            # Save a copy for manual inspection only when asked to
+            if settings.VALIDATOR_NOTEBOOK_DUMP_DIR:
+                import datetime
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                dump_path = Path(settings.VALIDATOR_NOTEBOOK_DUMP_DIR) / f"generated_notebook_{model_id.replace('/', '_')}_{timestamp}.ipynb"
+                with open(dump_path, 'w') as f:
+                    json.dump(notebook_content, f, indent=2)
+                logger.debug("Saved notebook for %s to %s", model_id, dump_path)
 
             # Validate syntax and runtime
-            results = await self._validate_notebook_cells(notebook_content, model_id)
+            with start_span("validator.validate_notebook", {"hf.model_id": model_id, "validation.runtime": runtime}):
+                results = await self._validate_notebook_cells(notebook_content, model_id, runtime)
             validation_results.update(results)
 
             # Overall status - more lenient calculation
@@ -84,36 +86,23 @@ class NotebookValidator:
 
         return validation_results
 
-    async def _validate_notebook_cells(self, notebook_content: Dict[str, Any], model_id: str) -> Dict[str, Any]:
+    async def _validate_notebook_cells(self, notebook_content: Dict[str, Any], model_id: str,
+                                       runtime: bool = True) -> Dict[str, Any]:
         """Validate individual cells in the notebook"""
         cells = notebook_content.get("cells", [])
-        print(f"[DEBUG VALIDATOR] Notebook content keys: {list(notebook_content.keys())}")
-        print(f"[DEBUG VALIDATOR] Cells type: {type(cells)}")
 
         # Convert cells to list if it's a dict
         if isinstance(cells, dict):
-            print(f"[DEBUG VALIDATOR] Converting dict cells to list, keys: {list(cells.keys())}")
             # Check if 'cells' key exists in this dict (proper notebook structure)
             if 'cells' in cells:
-                print(f"[DEBUG VALIDATOR] Found 'cells' key, using nested structure")
                 cells = cells['cells']
-                print(f"[DEBUG VALIDATOR] Nested cells count: {len(cells) if isinstance(cells, list) else 'not a list'}")
             else:
-                print(f"[DEBUG VALIDATOR] No 'cells' key found, using dict values as cells")
                 cells = list(cells.values())
-                print(f"[DEBUG VALIDATOR] Converted cells count: {len(cells)}")
+            logger.debug("Notebook for %s had dict cells, normalized to %d cells", model_id, len(cells))
         elif not isinstance(cells, list):
-            print(f"[DEBUG VALIDATOR] Invalid cells format: {type(cells)}")
+            logger.warning("Notebook for %s has invalid cells format: %s", model_id, type(cells).__name__)
             cells = []
 
-        if len(cells) > 0:
-            print(f"[DEBUG VALIDATOR] First cell type: {type(cells[0])}")
-            if isinstance(cells[0], dict):
-                print(f"[DEBUG VALIDATOR] First cell keys: {list(cells[0].keys())}")
-                print(f"[DEBUG VALIDATOR] First cell sample: {str(cells[0])[:200]}")
-            else:
-                print(f"[DEBUG VALIDATOR] First cell content: {str(cells[0])[:100]}")
-
         syntax_errors = []
         runtime_errors = []
         model_loading_success = False
@@ -123,19 +112,16 @@ class NotebookValidator:
         installed_packages = set()
 
         for i, cell in enumerate(cells):
-            print(f"[DEBUG VALIDATOR] Processing cell {i}, type: {type(cell)}")
             if not isinstance(cell, dict):
-                print(f"[DEBUG VALIDATOR] Cell {i} is not a dict, content: {str(cell)[:100]}")
                 # Try to handle if it's a list containing a dict
                 if isinstance(cell, list) and len(cell) > 0 and isinstance(cell[0], dict):
-                    print(f"[DEBUG VALIDATOR] Cell {i} is a list containing dict, using first element")
                     cell = cell[0]
                 else:
+                    logger.debug("Skipping cell %d of %s: %s is not a cell", i, model_id, type(cell).__name__)
                     continue
 
-            print(f"[DEBUG VALIDATOR] Cell {i} dict keys: {list(cell.keys())}")
             if 'cell_type' not in cell:
-                print(f"[DEBUG VALIDATOR] Cell {i} missing 'cell_type' key, available keys: {list(cell.keys())}")
+                logger.debug("Skipping cell %d of %s: missing cell_type", i, model_id)
                 continue
             cell_result = {
                 "cell_index": i,
@@ -143,66 +129,75 @@ class NotebookValidator:
                 "validation_status": "not_validated"
             }
 
-            try:
-                if cell["cell_type"] == "code":
-                    # Validate syntax
-                    syntax_result = await self._validate_syntax(cell["source"])
-                    cell_result["syntax_valid"] = syntax_result["valid"]
-
-                    if not syntax_result["valid"]:
-                        syntax_errors.append({
-                            "cell_index": i,
-                            "cell_type": "code",
-                            "error_type": "SyntaxError",
-                            "error_message": syntax_result["error"],
-                            "line_number": syntax_result.get("line", 0)
-                        })
-                        cell_result["validation_status"] = "syntax_error"
-                    else:
-                        # Try runtime execution
-                        runtime_result = await self._execute_cell(
-                            cell["source"],
-                            i,
-                            installed_packages,
-                            model_id
-                        )
-                        cell_result.update(runtime_result)
-
-                        if runtime_result["success"]:
-                            # Check if this is the model loading cell
-                            if self._is_model_loading_cell(cell["source"]):
-                                model_loading_success = runtime_result.get("model_loaded", False)
-
-                            # Add any new packages that were installed
-                            if runtime_result.get("packages_installed"):
-                                installed_packages.update(runtime_result["packages_installed"])
-
-                            cell_result["validation_status"] = "runtime_success"
-                        else:
-                            runtime_errors.append({
+            cell_started_at = time.perf_counter()
+            with start_span("validator.cell", {"cell.index": i, "cell.type": cell["cell_type"]}) as span:
+                try:
+                    if cell["cell_type"] == "code":
+                        # Validate syntax
+                        syntax_result = await self._validate_syntax(cell["source"])
+                        cell_result["syntax_valid"] = syntax_result["valid"]
+
+                        if not syntax_result["valid"]:
+                            syntax_errors.append({
                                 "cell_index": i,
                                 "cell_type": "code",
-                                "error_type": runtime_result.get("error_type", "RuntimeError"),
-                                "error_message": runtime_result.get("error_message", "Unknown error"),
-                                "line_number": runtime_result.get("line_number", 0)
+                                "error_type": "SyntaxError",
+                                "error_message": syntax_result["error"],
+                                "line_number": syntax_result.get("line", 0)
                             })
-                            cell_result["validation_status"] = "runtime_error"
-
-                elif cell["cell_type"] == "markdown":
-                    # Markdown cells always pass validation
-                    cell_result["validation_status"] = "validated"
-
-                cells_validated.append(cell_result)
-
-            except Exception as e:
-                runtime_errors.append({
-                    "cell_index": i,
-                    "cell_type": cell["cell_type"],
-                    "error_type": "ValidationError",
-                    "error_message": str(e)
-                })
-                cell_result["validation_status"] = "validation_error"
-                cells_validated.append(cell_result)
+                            cell_result["validation_status"] = "syntax_error"
+                        elif not runtime:
+                            # Static validation stops at the syntax check
+                            cell_result["validation_status"] = "validated"
+                        else:
+                            # Try runtime execution
+                            runtime_result = await self._execute_cell(
+                                cell["source"],
+                                i,
+                                installed_packages,
+                                model_id
+                            )
+                            cell_result.update(runtime_result)
+
+                            if runtime_result["success"]:
+                                # Check if this is the model loading cell
+                                if self._is_model_loading_cell(cell["source"]):
+                                    model_loading_success = runtime_result.get("model_loaded", False)
+
+                                # Add any new packages that were installed
+                                if runtime_result.get("packages_installed"):
+                                    installed_packages.update(runtime_result["packages_installed"])
+
+                                cell_result["validation_status"] = "runtime_success"
+                            else:
+                                runtime_errors.append({
+                                    "cell_index": i,
+                                    "cell_type": "code",
+                                    "error_type": runtime_result.get("error_type", "RuntimeError"),
+                                    "error_message": runtime_result.get("error_message", "Unknown error"),
+                                    "line_number": runtime_result.get("line_number", 0)
+                                })
+                                cell_result["validation_status"] = "runtime_error"
+
+                    elif cell["cell_type"] == "markdown":
+                        # Markdown cells always pass validation
+                        cell_result["validation_status"] = "validated"
+
+                    cells_validated.append(cell_result)
+
+                except Exception as e:
+                    runtime_errors.append({
+                        "cell_index": i,
+                        "cell_type": cell["cell_type"],
+                        "error_type": "ValidationError",
+                        "error_message": str(e)
+                    })
+                    cell_result["validation_status"] = "validation_error"
+                    cells_validated.append(cell_result)
+                span.set_attribute("cell.validation_status", cell_result["validation_status"])
+            VALIDATOR_CELL_SECONDS.labels(cell["cell_type"], cell_result["validation_status"]).observe(
+                time.perf_counter() - cell_started_at
+            )
 
         return {
             "cells_validated": cells_validated,
@@ -251,13 +246,15 @@ class NotebookValidator:
                 f.write(code)
 
             # Execute the cell
-            result = subprocess.run(
-                [sys.executable, str(cell_file)],
-                capture_output=True,
-                text=True,
-                timeout=30,  # 30 second timeout
-                cwd=self.temp_dir
-            )
+            with start_span("validator.execute_cell", {"cell.index": cell_index, "hf.model_id": model_id}) as span:
+                result = subprocess.run(
+                    [sys.executable, str(cell_file)],
+                    capture_output=True,
+                    text=True,
+                    timeout=30,  # 30 second timeout
+                    cwd=self.temp_dir
+                )
+                span.set_attribute("process.exit_code", result.returncode)
 
             # Parse the output
             return_code = result.returncode
@@ -0,0 +1,114 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+class TaskProfiler:
+    """Opt-in cProfile capture for single generation runs"""
+
+    def __init__(self, profile_dir: str, always_on: bool, admin_token: Optional[str]):
+        self.profile_dir = Path(profile_dir)
+        self.always_on = always_on
+        self.admin_token = admin_token
+        # cProfile allows one active profiler per thread; skip overlapping runs
+        self._active = threading.Lock()
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """Whether `token` matches the configured admin token"""
+        return bool(self.admin_token and token and hmac.compare_digest(token, self.admin_token))
+
+    def is_requested(self, token: Optional[str]) -> bool:
+        """Whether a generation should be profiled, from settings or the admin header"""
+        return self.always_on or self.is_authorized(token)
+
+    def can_download(self, token: Optional[str]) -> bool:
+        """Profiles need the admin token, or always-on profiling without one"""
+        return self.is_authorized(token) or (self.always_on and not self.admin_token)
+
+    def _part_path(self, task_id: str, part: str) -> Path:
+        return self.profile_dir / f"{task_id}.{part}.prof"
+
+    @contextmanager
+    def profile(self, task_id: str, part: str, enabled: bool = True) -> Iterator[None]:
+        """Profile the block and save it as one part of `task_id`'s profile"""
+        if not enabled:
+            yield
+            return
+        if not self._active.acquire(blocking=False):
+            logger.info("Skipping profile of task %s (%s): another profile is running", task_id, part)
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(self._part_path(task_id, part)))
+            logger.info("Saved profile of task %s (%s)", task_id, part)
+        finally:
+            self._active.release()
+
+    def _parts(self, task_id: str) -> List[Path]:
+        if not _SAFE_NAME.match(task_id):
+            return []
+        return sorted(self.profile_dir.glob(f"{task_id}.*.prof"))
+
+    def has_profile(self, task_id: str) -> bool:
+        return bool(self._parts(task_id))
+
+    def load(self, task_id: str) -> Optional[pstats.Stats]:
+        """All saved parts of a task's profile merged into one Stats object"""
+        parts = self._parts(task_id)
+        if not parts:
+            return None
+        stats = pstats.Stats(str(parts[0]))
+        for part in parts[1:]:
+            stats.add(str(part))
+        return stats
+
+    def export(self, task_id: str) -> Optional[bytes]:
+        """Merged profile in pstats format, for snakeviz or `python -m pstats`"""
+        stats = self.load(task_id)
+        if stats is None:
+            return None
+        fd, merged_path = tempfile.mkstemp(suffix=".prof")
+        os.close(fd)
+        try:
+            stats.dump_stats(merged_path)
+            return Path(merged_path).read_bytes()
+        finally:
+            os.unlink(merged_path)
+
+    def report(self, task_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Plain-text report of the hottest functions"""
+        stats = self.load(task_id)
+        if stats is None:
+            return None
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats(sort).print_stats(limit)
+        return buffer.getvalue()
+
+# Global profiler instance
+task_profiler = TaskProfiler(
+    profile_dir=settings.PROFILE_DIR,
+    always_on=settings.PROFILING_ENABLED,
+    admin_token=settings.PROFILING_ADMIN_TOKEN,
+)
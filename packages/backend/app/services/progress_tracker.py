@@ -1,13 +1,27 @@
 import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from app.core.config import settings
+from app.core.metrics import GENERATION_TASKS_IN_FLIGHT
+from app.services.task_store import TERMINAL_STATUSES, TaskStateStore, task_state_store
+
+PROGRESS_TTL_SECONDS = 3600
+# Sorted set of unfinished task ids, scored by their last update
+INFLIGHT_KEY = "progress:inflight"
 
 class ProgressTracker:
-    def __init__(self):
-        # Use in-memory storage instead of Redis
+    def __init__(self, backend: str = "memory", durable_store: Optional[TaskStateStore] = None):
+        # "memory" keeps state per process; "redis" shares it across workers
+        self._backend = backend
+        # Hot state lives here; the durable store is the fallback after restarts
+        self._durable_store = durable_store
         self._storage: Dict[str, Dict[str, Any]] = {}
         self._expiry: Dict[str, float] = {}
+        self._inflight: Set[str] = set()
+
+    def _redis(self):
+        from app.core.cache import get_redis
+        return get_redis()
 
     def _cleanup_expired(self):
         """Remove expired entries"""
@@ -16,28 +30,116 @@ class ProgressTracker:
         for key in expired_keys:
             self._storage.pop(key, None)
             self._expiry.pop(key, None)
+            self._inflight.discard(key[len("progress:"):])
 
-    def update_progress(self, task_id: str, progress_data: Dict[str, Any]):
-        """Update progress for a task"""
-        key = f"progress:{task_id}"
-        self._storage[key] = progress_data
-        # Set expiry to 1 hour (3600 seconds)
-        self._expiry[key] = time.time() + 3600
+    def _set(self, key: str, value: Dict[str, Any], ttl: int):
+        if self._backend == "redis":
+            # Validation details may contain sets
+            self._redis().set(key, json.dumps(value, default=list), ex=ttl)
+            return
+        self._storage[key] = value
+        self._expiry[key] = time.time() + ttl
         # Clean up expired entries periodically
         self._cleanup_expired()
 
-    def get_progress(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """Get progress for a task"""
-        key = f"progress:{task_id}"
-        
+    def _set_if_absent(self, key: str, value: Dict[str, Any], ttl: int) -> Optional[Dict[str, Any]]:
+        """Store `value` unless `key` exists; return the existing value if it does"""
+        if self._backend == "redis":
+            client = self._redis()
+            if client.set(key, json.dumps(value), ex=ttl, nx=True):
+                return None
+            return self._get(key)
+        existing = self._get(key)
+        if existing is not None:
+            return existing
+        self._set(key, value, ttl)
+        return None
+
+    def _replace(self, key: str, value: Dict[str, Any]):
+        """Overwrite an existing key without touching its expiry"""
+        if self._backend == "redis":
+            self._redis().set(key, json.dumps(value), xx=True, keepttl=True)
+        elif key in self._storage:
+            self._storage[key] = value
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._backend == "redis":
+            raw = self._redis().get(key)
+            return json.loads(raw) if raw else None
         # Check if expired
         if key in self._expiry and time.time() > self._expiry[key]:
             self._storage.pop(key, None)
             self._expiry.pop(key, None)
             return None
-            
         return self._storage.get(key)
 
+    def _delete(self, key: str):
+        if self._backend == "redis":
+            self._redis().delete(key)
+            return
+        self._storage.pop(key, None)
+        self._expiry.pop(key, None)
+
+    def _track_inflight(self, task_id: str, status: Optional[str]):
+        """Keep the in-flight gauge current as a task changes state"""
+        finished = status in TERMINAL_STATUSES
+        if self._backend == "redis":
+            now = time.time()
+            pipeline = self._redis().pipeline()
+            if finished:
+                pipeline.zrem(INFLIGHT_KEY, task_id)
+            else:
+                pipeline.zadd(INFLIGHT_KEY, {task_id: now})
+            # Tasks that stopped reporting expired with their progress entry
+            pipeline.zremrangebyscore(INFLIGHT_KEY, "-inf", now - PROGRESS_TTL_SECONDS)
+            pipeline.zcard(INFLIGHT_KEY)
+            GENERATION_TASKS_IN_FLIGHT.set(pipeline.execute()[-1])
+            return
+        if finished:
+            self._inflight.discard(task_id)
+        else:
+            self._inflight.add(task_id)
+        GENERATION_TASKS_IN_FLIGHT.set(len(self._inflight))
+
+    def update_progress(self, task_id: str, progress_data: Dict[str, Any], hf_model_id: Optional[str] = None):
+        """Update progress for a task"""
+        self._set(f"progress:{task_id}", progress_data, PROGRESS_TTL_SECONDS)
+        self._track_inflight(task_id, progress_data.get("status"))
+        if self._durable_store:
+            self._durable_store.record(task_id, progress_data, hf_model_id=hf_model_id)
+
+    def link_task(self, task_id: str, primary_task_id: str, hf_model_id: Optional[str] = None):
+        """Make `task_id` share the progress stream of `primary_task_id`"""
+        self._set(f"alias:{task_id}", {"task_id": primary_task_id}, PROGRESS_TTL_SECONDS)
+        if self._durable_store:
+            self._durable_store.record(
+                task_id,
+                {"status": "processing", "current_step": "Attached to a running generation"},
+                hf_model_id=hf_model_id,
+                linked_task_id=primary_task_id
+            )
+
+    def resolve_task_id(self, task_id: str) -> str:
+        """Return the task id whose progress `task_id` follows"""
+        alias = self._get(f"alias:{task_id}")
+        return alias["task_id"] if alias else task_id
+
+    def get_progress(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get progress for a task"""
+        return self._get(f"progress:{self.resolve_task_id(task_id)}")
+
+    def claim_idempotency_key(self, key: str, record: Dict[str, Any], ttl: int) -> Optional[Dict[str, Any]]:
+        """Bind an Idempotency-Key to `record`, or return the record it is already bound to"""
+        return self._set_if_absent(f"idempotency:{key}", record, ttl)
+
+    def update_idempotency_record(self, key: str, record: Dict[str, Any]):
+        """Update the record bound to an Idempotency-Key, keeping its window"""
+        self._replace(f"idempotency:{key}", record)
+
+    def release_idempotency_key(self, key: str):
+        """Forget an Idempotency-Key so the request can be retried"""
+        self._delete(f"idempotency:{key}")
+
     def get_task_result(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get the final result of a task (direct invocation version)"""
         try:
@@ -45,6 +147,14 @@ class ProgressTracker:
             progress = self.get_progress(task_id)
             if progress:
                 return progress
+
+            # Fall back to the durable store, e.g. after a restart
+            if self._durable_store:
+                state = self._durable_store.get(task_id)
+                # Only final states; a cached in-flight state would hide later updates
+                if state and state["status"] in TERMINAL_STATUSES:
+                    self._set(f"progress:{task_id}", state, PROGRESS_TTL_SECONDS)
+                return state
             return None
         except Exception as e:
             # If there's an error getting the result, return a failure status
@@ -54,4 +164,4 @@ class ProgressTracker:
             }
 
 # Global progress tracker instance
-progress_tracker = ProgressTracker()
\ No newline at end of file
+progress_tracker = ProgressTracker(backend=settings.PROGRESS_BACKEND, durable_store=task_state_store)
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import GENERATION_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "render", "validate", "persist")
+ANY_PIPELINE = "*"
+
+@contextmanager
+def measure_stage(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Record the wall time of a pipeline stage into `timings`"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - started_at, 4)
+
+class _RollingEstimate:
+    """EWMA plus a window of recent samples for quantiles"""
+
+    def __init__(self, alpha: float, window: int):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, value: float):
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class StageStats:
+    """Rolling per-stage duration estimates keyed by pipeline tag, cache status and validation mode"""
+
+    HISTORY_QUERY = """
+    SELECT timings
+    FROM generation_tasks
+    WHERE status = 'completed' AND timings IS NOT NULL
+    ORDER BY finished_at DESC
+    LIMIT %s
+    """
+
+    def __init__(self, defaults: Dict[str, float], alpha: float = 0.2, window: int = 200):
+        self.defaults = defaults
+        self.alpha = alpha
+        self.window = window
+        self._estimates: Dict[Tuple[str, str, str, str], _RollingEstimate] = {}
+        self._pipeline_tags: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def remember_pipeline_tag(self, hf_model_id: str, pipeline_tag: Optional[str]):
+        """Remember a model's pipeline tag so later ETAs can use the specific estimate"""
+        if pipeline_tag:
+            self._pipeline_tags[hf_model_id] = pipeline_tag
+
+    def record(self, pipeline_tag: Optional[str], cache_status: str, validation: str, timings: Dict[str, float]):
+        """Add the stage wall times of one generation"""
+        with self._lock:
+            for stage, seconds in timings.items():
+                if stage not in STAGES:
+                    continue
+                GENERATION_STAGE_SECONDS.labels(stage, cache_status, validation).observe(seconds)
+                for tag in {pipeline_tag or ANY_PIPELINE, ANY_PIPELINE}:
+                    key = (tag, cache_status, validation, stage)
+                    estimate = self._estimates.get(key)
+                    if estimate is None:
+                        estimate = self._estimates[key] = _RollingEstimate(self.alpha, self.window)
+                    estimate.add(seconds)
+
+    def expected_stage(self, pipeline_tag: Optional[str], cache_status: str, validation: str,
+                       stage: str, quantile: Optional[float] = None) -> float:
+        """Expected seconds for one stage, falling back from the pipeline tag to all pipelines"""
+        with self._lock:
+            for tag in (pipeline_tag or ANY_PIPELINE, ANY_PIPELINE):
+                estimate = self._estimates.get((tag, cache_status, validation, stage))
+                if estimate is not None and estimate.samples:
+                    return estimate.quantile(quantile) if quantile is not None else estimate.ewma
+        default = self.defaults.get(stage, 0.0)
+        if stage == "validate" and validation == "static":
+            # Static validation never executes cells
+            return min(default, 1.0)
+        return default
+
+    def expected_duration(self, hf_model_id: str, validation: str, cache_status: str = "miss",
+                          quantile: Optional[float] = None) -> float:
+        """Expected seconds for a full generation of `hf_model_id`"""
+        pipeline_tag = self._pipeline_tags.get(hf_model_id)
+        return sum(
+            self.expected_stage(pipeline_tag, cache_status, validation, stage, quantile)
+            for stage in STAGES
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current estimates, for metrics"""
+        with self._lock:
+            return {
+                "/".join(key): {
+                    "ewma": round(estimate.ewma, 3),
+                    "p50": round(estimate.quantile(0.5), 3),
+                    "p90": round(estimate.quantile(0.9), 3),
+                    "samples": len(estimate.samples),
+                }
+                for key, estimate in self._estimates.items()
+                if estimate.samples
+            }
+
+    def load_history(self, limit: int = 500):
+        """Seed estimates from stage timings stored with finished tasks"""
+        rows = db.execute_query(self.HISTORY_QUERY, (limit,))
+        # Oldest first so the EWMA ends on the most recent runs
+        for row in reversed(rows):
+            timings = row["timings"]
+            self.record(
+                timings.get("pipeline_tag"),
+                timings.get("cache_status", "miss"),
+                timings.get("validation", "full"),
+                timings.get("stages", {})
+            )
+        logger.info("Loaded stage timings from %d finished tasks", len(rows))
+
+def _default_stage_seconds() -> Dict[str, float]:
+    # Split the configured job duration across stages until real samples arrive
+    total = settings.JOB_DEFAULT_DURATION_SECONDS
+    return {"fetch": total * 0.05, "render": total * 0.01, "validate": total * 0.9, "persist": total * 0.04}
+
+# Global stage statistics instance
+stage_stats = StageStats(defaults=_default_stage_seconds())
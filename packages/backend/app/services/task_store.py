@@ -0,0 +1,161 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.database import db
+from app.core.flusher import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class TaskStateStore:
+    """Durable generation task state in the generation_tasks table"""
+
+    COLUMNS = (
+        "task_id", "hf_model_id", "status", "stage", "progress", "share_id", "error",
+        "validation", "timings", "linked_task_id", "started_at", "finished_at", "updated_at"
+    )
+    STICKY_COLUMNS = ("hf_model_id", "share_id", "validation", "timings", "linked_task_id", "started_at")
+
+    UPSERT_QUERY = """
+    INSERT INTO generation_tasks (
+        task_id, hf_model_id, status, stage, progress, share_id, error,
+        validation, timings, linked_task_id, started_at, finished_at, updated_at
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (task_id) DO UPDATE SET
+        hf_model_id = COALESCE(EXCLUDED.hf_model_id, generation_tasks.hf_model_id),
+        status = EXCLUDED.status,
+        stage = EXCLUDED.stage,
+        progress = EXCLUDED.progress,
+        share_id = COALESCE(EXCLUDED.share_id, generation_tasks.share_id),
+        error = EXCLUDED.error,
+        validation = COALESCE(EXCLUDED.validation, generation_tasks.validation),
+        timings = COALESCE(EXCLUDED.timings, generation_tasks.timings),
+        linked_task_id = COALESCE(EXCLUDED.linked_task_id, generation_tasks.linked_task_id),
+        started_at = COALESCE(generation_tasks.started_at, EXCLUDED.started_at),
+        finished_at = EXCLUDED.finished_at,
+        updated_at = EXCLUDED.updated_at
+    WHERE generation_tasks.updated_at <= EXCLUDED.updated_at
+    """
+
+    SELECT_QUERY = """
+    SELECT task_id, status, stage, progress, share_id, error, validation, timings,
+           linked_task_id, updated_at
+    FROM generation_tasks
+    WHERE task_id = %s
+    """
+
+    def __init__(self, enabled: bool, flush_interval: float, batch_size: int, stale_after: int):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stale_after = stale_after
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flusher = BackgroundFlusher("task-state-flusher", flush_interval, self.flush)
+
+    def record(self, task_id: str, progress_data: Dict[str, Any],
+               hf_model_id: Optional[str] = None, linked_task_id: Optional[str] = None):
+        """Queue the latest state of a task for the next batched upsert"""
+        if not self.enabled:
+            return
+
+        now = datetime.now(timezone.utc)
+        status = progress_data.get("status", "processing")
+        progress = int(progress_data.get("progress", 0))
+        validation = progress_data.get("validation")
+        timings = progress_data.get("timings")
+        row = {
+            "task_id": task_id,
+            "hf_model_id": hf_model_id,
+            "status": status,
+            "stage": progress_data.get("current_step"),
+            "progress": progress,
+            "share_id": progress_data.get("share_id"),
+            "error": progress_data.get("error"),
+            "validation": json.dumps(validation) if validation else None,
+            "timings": json.dumps(timings) if timings else None,
+            "linked_task_id": linked_task_id,
+            "started_at": now if progress > 0 else None,
+            "finished_at": now if status in TERMINAL_STATUSES else None,
+            "updated_at": now,
+        }
+
+        with self._lock:
+            previous = self._pending.get(task_id)
+            if previous is not None:
+                # Keep values captured by earlier updates in the same batch
+                for column in self.STICKY_COLUMNS:
+                    if row[column] is None:
+                        row[column] = previous[column]
+            self._pending[task_id] = row
+            pending = len(self._pending)
+
+        self._flusher.ensure_running()
+        if status in TERMINAL_STATUSES or pending >= self.batch_size:
+            self._flusher.wake()
+
+    def flush(self):
+        """Write all pending task states in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            rows: List[Dict[str, Any]] = list(self._pending.values())
+            self._pending = {}
+
+        try:
+            db.execute_many(self.UPSERT_QUERY, [tuple(row[column] for column in self.COLUMNS) for row in rows])
+        except Exception:
+            logger.exception("Failed to persist %d task states", len(rows))
+            # Put the rows back unless newer states arrived meanwhile
+            with self._lock:
+                for row in rows:
+                    self._pending.setdefault(row["task_id"], row)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Load a task state in ProgressTracker format, following dedup links"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            pending = self._pending.get(task_id)
+        if pending is not None:
+            self.flush()
+
+        row = db.execute_single_query(self.SELECT_QUERY, (task_id,))
+        if row and row["linked_task_id"]:
+            row = db.execute_single_query(self.SELECT_QUERY, (row["linked_task_id"],)) or row
+        if not row:
+            return None
+
+        state = {
+            "status": row["status"],
+            "current_step": row["stage"],
+            "progress": row["progress"],
+        }
+        for key in ("share_id", "error", "validation", "timings"):
+            if row[key] is not None:
+                state[key] = row[key]
+
+        # Nobody will finish a task that was in flight when its process died
+        age = time.time() - row["updated_at"].timestamp()
+        if row["status"] not in TERMINAL_STATUSES and age > self.stale_after:
+            state.update({
+                "status": "failed",
+                "progress": 0,
+                "error": "Task was interrupted, please retry"
+            })
+        return state
+
+# Global task state store instance
+task_state_store = TaskStateStore(
+    enabled=settings.TASK_STORE_ENABLED,
+    flush_interval=settings.TASK_STORE_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.TASK_STORE_BATCH_SIZE,
+    stale_after=settings.TASK_STORE_STALE_AFTER_SECONDS,
+)
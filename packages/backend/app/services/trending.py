@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import db
+from app.core.flusher import BackgroundFlusher
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Ranking windows: (length in hours, score half-life in hours)
+WINDOWS = {
+    "day": (24, 6),
+    "week": (24 * 7, 36),
+    "month": (24 * 30, 24 * 7),
+}
+DOWNLOAD_WEIGHT = 3.0
+VIEW_WEIGHT = 1.0
+# Rollups older than the longest window are deleted on refresh
+RETENTION_HOURS = max(hours for hours, _ in WINDOWS.values()) + 24
+
+class TrendingService:
+    """Trending notebooks from hourly view/download rollups"""
+
+    UPSERT_QUERY = """
+    INSERT INTO notebook_activity_hourly (share_id, hour, downloads, views)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (share_id, hour) DO UPDATE SET
+        downloads = notebook_activity_hourly.downloads + EXCLUDED.downloads,
+        views = notebook_activity_hourly.views + EXCLUDED.views
+    """
+
+    # Scans only the window's hours through notebook_activity_hour_idx and
+    # joins notebooks for the top N alone, one partition each via notebook_shares
+    RANKING_QUERY = """
+    SELECT s.share_id, n.hf_model_id, n.created_at, s.score, s.downloads, s.views
+    FROM (
+        SELECT share_id,
+               SUM((downloads * %s + views * %s)
+                   * power(0.5, EXTRACT(EPOCH FROM (%s - hour)) / 3600.0 / %s))::float8 AS score,
+               SUM(downloads) AS downloads,
+               SUM(views) AS views
+        FROM notebook_activity_hourly
+        WHERE hour >= %s
+        GROUP BY share_id
+        ORDER BY score DESC
+        LIMIT %s
+    ) s
+    JOIN notebook_shares r ON r.share_id = s.share_id
+    JOIN notebooks n ON n.share_id = r.share_id AND n.created_at = r.created_at
+    ORDER BY s.score DESC
+    """
+
+    RETENTION_QUERY = "DELETE FROM notebook_activity_hourly WHERE hour < %s"
+
+    def __init__(self, enabled: bool, flush_interval: float, refresh_interval: int, top_n: int):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.top_n = top_n
+        self._pending: Dict[Tuple[str, datetime], List[int]] = {}
+        self._rankings: Dict[str, Dict[str, Any]] = {}
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Also refreshes the rankings, so requests never compute them
+        self._flusher = BackgroundFlusher("trending-flusher", flush_interval, self._run_periodic)
+
+    def _run_periodic(self):
+        self.flush()
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+
+    def start(self):
+        """Start the background thread, which computes the first rankings right away"""
+        if self.enabled:
+            self._flusher.ensure_running()
+            self._flusher.wake()
+
+    def record_view(self, share_id: str):
+        """Count a share page view in the current hour"""
+        self._record(share_id, 1)
+
+    def record_download(self, share_id: str):
+        """Count a download in the current hour"""
+        self._record(share_id, 0)
+
+    def _record(self, share_id: str, column: int):
+        if not self.enabled:
+            return
+        hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            counts = self._pending.setdefault((share_id, hour), [0, 0])
+            counts[column] += 1
+        self._flusher.ensure_running()
+
+    def flush(self):
+        """Add all pending counts to the hourly rollups in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        rows = [(share_id, hour, downloads, views) for (share_id, hour), (downloads, views) in pending.items()]
+        try:
+            db.execute_many(self.UPSERT_QUERY, rows)
+        except Exception:
+            logger.exception("Failed to persist activity for %d notebook hours", len(rows))
+            # Merge the counts back so the next flush retries them
+            with self._lock:
+                for key, (downloads, views) in pending.items():
+                    counts = self._pending.setdefault(key, [0, 0])
+                    counts[0] += downloads
+                    counts[1] += views
+
+    def top(self, window: str, limit: int) -> Dict[str, Any]:
+        """Cached ranking of a window: computed_at and up to `limit` items"""
+        if not self.enabled:
+            return {"computed_at": None, "items": []}
+        ranking = self._rankings.get(window)
+        record_cache_lookup("trending", ranking is not None)
+        if ranking is None:
+            # Before this process's first refresh, which runs on the background thread
+            self.start()
+            return {"computed_at": None, "items": []}
+        return {"computed_at": ranking["computed_at"], "items": ranking["items"][:limit]}
+
+    def refresh(self):
+        """Recompute the rankings, or load them if another process just did"""
+        with self._refresh_lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            try:
+                rankings = None if self._claim_refresh() else self._load_shared()
+                if rankings is None:
+                    rankings = self._compute()
+                    self._publish(rankings)
+                self._rankings = rankings
+            except Exception:
+                logger.exception("Failed to refresh trending rankings")
+
+    def _claim_refresh(self) -> bool:
+        try:
+            return bool(get_redis().set("trending:refresh_lock", os.getpid(), nx=True, ex=self.refresh_interval))
+        except Exception as e:
+            logger.warning("Trending refresh lock unavailable, computing locally: %s", e)
+            return True
+
+    def _load_shared(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            values = get_redis().mget([f"trending:{window}" for window in WINDOWS])
+        except Exception as e:
+            logger.warning("Trending rankings Redis lookup failed: %s", e)
+            return None
+        if any(value is None for value in values):
+            return None
+        return {window: json.loads(value) for window, value in zip(WINDOWS, values)}
+
+    def _publish(self, rankings: Dict[str, Dict[str, Any]]):
+        try:
+            pipeline = get_redis().pipeline()
+            for window, ranking in rankings.items():
+                pipeline.set(f"trending:{window}", json.dumps(ranking), ex=self.refresh_interval * 2)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning("Trending rankings Redis write failed: %s", e)
+
+    def _compute(self) -> Dict[str, Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        db.execute_query(self.RETENTION_QUERY, (now - timedelta(hours=RETENTION_HOURS),))
+        rankings = {}
+        for window, (hours, half_life) in WINDOWS.items():
+            rows = db.execute_query(
+                self.RANKING_QUERY,
+                (DOWNLOAD_WEIGHT, VIEW_WEIGHT, now, half_life, now - timedelta(hours=hours), self.top_n)
+            )
+            rankings[window] = {
+                "computed_at": now.isoformat(),
+                "items": [
+                    {**row, "created_at": row["created_at"].isoformat(), "score": round(row["score"], 4)}
+                    for row in rows
+                ],
+            }
+        return rankings
+
+# Global trending service instance
+trending_service = TrendingService(
+    enabled=settings.TRENDING_ENABLED,
+    flush_interval=settings.TRENDING_FLUSH_INTERVAL_SECONDS,
+    refresh_interval=settings.TRENDING_REFRESH_SECONDS,
+    top_n=settings.TRENDING_TOP_N,
+)
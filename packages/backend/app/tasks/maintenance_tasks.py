@@ -0,0 +1,32 @@
+import logging
+from typing import Any, Dict
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import db
+from app.services.notebook_store import notebook_store
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def archive_idle_notebooks() -> Dict[str, Any]:
+    """Move notebooks nobody has read for ARCHIVE_AFTER_DAYS to cold storage"""
+    archived = notebook_store.archive_idle(settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE)
+    if archived:
+        logger.info("Archived %d idle notebooks", archived)
+    return {"archived": archived}
+
+@celery_app.task
+def create_notebook_partitions() -> Dict[str, Any]:
+    """Create the monthly notebooks partitions for the next NOTEBOOK_PARTITION_MONTHS_AHEAD months"""
+    # Rows land here only when their month had no partition; they make
+    # creating that partition fail until they are moved out
+    stray = db.execute_single_query("SELECT COUNT(*) AS count FROM public.notebooks_default")
+    if stray["count"]:
+        logger.warning("%d notebooks are in the default partition", stray["count"])
+
+    result = db.execute_single_query(
+        "SELECT public.create_notebook_partitions(%s) AS created", (settings.NOTEBOOK_PARTITION_MONTHS_AHEAD,)
+    )
+    if result["created"]:
+        logger.info("Created %d notebooks partitions", result["created"])
+    return {"created": result["created"], "default_partition_rows": stray["count"]}
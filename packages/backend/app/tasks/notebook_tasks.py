@@ -1,202 +1,315 @@
-import json
 import uuid
 import logging
-import traceback
 import sys
-from celery import current_task
+from celery import Signature, Task, chain
+from celery.exceptions import Ignore
 from app.core.celery_app import celery_app
-from app.core.database import db
-from app.services.notebook_generator import NotebookGenerator
-from app.services.huggingface import HuggingFaceService
+from app.core.config import settings
+from app.core.database import async_db
+from app.core.tracing import start_span, inject_trace_context, current_trace_id
+from app.core.metrics import record_cache_lookup
+from app.core.worker_loop import run_async
+from app.models.notebook import ModelInfo
+from app.services.notebook_generator import NotebookGenerator, GENERATOR_VERSION
+from app.services.huggingface import hf_service
 from app.services.notebook_validator import NotebookValidator
-import asyncio
-from typing import Dict, Any
+from app.services.job_dedup import job_deduplicator
+from app.services.progress_tracker import progress_tracker
+from app.services.stage_stats import stage_stats, measure_stage
+from app.services.profiler import task_profiler
+from app.services.notebook_store import notebook_store
+from typing import Dict, Any, Optional, Union
 
-# Set up logging for this module
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-# Also log to file for debugging
-file_handler = logging.FileHandler('/tmp/celery_tasks.log')
-file_handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+# The generation pipeline runs as a chain of stage tasks:
+#
+#   generate_notebook_task -> fetch -> render -> validate -> persist
+#
+# Every stage receives and returns a JSON context dict. ctx["task_id"] is the
+# id of the original generate_notebook_task; stages report progress under that
+# id and the persist stage inherits it, so clients see one logical task.
+# ctx["trace_context"] carries the W3C trace context so every stage span joins
+# the trace started by generate_notebook_task.
+
+# A dedup claim lasts as long as the whole chain may run: the entry task and
+# four stages, each bounded by task_time_limit
+DEDUP_CLAIM_TTL = celery_app.conf.task_time_limit * 5
+# Celery state of a duplicate task; not a ready state, so pollers keep waiting
+LINKED_STATE = "LINKED"
+
+def _report_progress(task_id: str, current_step: str, progress: int, hf_model_id: Optional[str] = None):
+    """Publish progress for the logical generation task"""
+    meta = {"current_step": current_step, "progress": progress}
+    celery_app.backend.store_result(task_id, meta, "PROGRESS")
+    progress_tracker.update_progress(task_id, {"status": "processing", **meta}, hf_model_id=hf_model_id)
+
+class PipelineStage(Task):
+    """Base class for generation stages; failures fail the logical task"""
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        ctx = args[0] if args and isinstance(args[0], dict) else {}
+        logical_task_id = ctx.get("task_id")
+        if not logical_task_id:
+            return
+
+        logger.error("Stage %s of task %s failed: %s\n%s", self.name, logical_task_id, exc, einfo.traceback)
+
+        # The persist stage carries the logical id, so Celery records its failure itself
+        if logical_task_id != task_id:
+            celery_app.backend.mark_as_failure(logical_task_id, exc, traceback=einfo.traceback)
+
+        progress_tracker.update_progress(logical_task_id, {
+            "status": "failed",
+            "current_step": f"Error: {str(exc)}",
+            "progress": 0,
+            "error": str(exc),
+            "traceback": einfo.traceback
+        })
+        job_deduplicator.release_distributed(ctx["dedup_key"], logical_task_id)
+
+async def _find_reusable_notebook(hf_model_id: str, validation: str) -> Optional[Dict[str, Any]]:
+    """Find a recent validated notebook from the current generator version"""
+    query = """
+    SELECT id, share_id, metadata->'validation' AS validation
+    FROM notebooks
+    WHERE hf_model_id = %s
+      AND created_at > NOW() - make_interval(hours => %s)
+      AND metadata->>'generator_version' = %s
+      AND metadata->'validation'->>'overall_status' = 'success'
+      AND (%s = 'static' OR COALESCE(metadata->'validation'->>'mode', 'full') = 'full')
+    ORDER BY created_at DESC
+    LIMIT 1
+    """
+    return await async_db.execute_single_query(
+        query,
+        (hf_model_id, settings.NOTEBOOK_REUSE_MAX_AGE_HOURS, GENERATOR_VERSION, validation)
+    )
 
 @celery_app.task(bind=True)
-def generate_notebook_task(self, hf_model_id: str) -> Dict[str, Any]:
+def generate_notebook_task(self, hf_model_id: str, validation: str = "full", profile: bool = False) -> Dict[str, Any]:
     """Background task to generate a notebook from a Hugging Face model"""
 
     task_id = self.request.id
-    logger.info(f"Starting notebook generation task {task_id} for model {hf_model_id}")
+    logger.info("Starting notebook generation task %s for model %s", task_id, hf_model_id)
+
+    with task_profiler.profile(task_id, "dispatch", enabled=profile), \
+            start_span("notebook.generate", {"task.id": task_id, "hf.model_id": hf_model_id, "validation.mode": validation}):
+        outcome = _dispatch_generation(task_id, hf_model_id, validation, profile)
+    if isinstance(outcome, Signature):
+        # The replacement chain inherits this task's id for its final result
+        raise self.replace(outcome)
+    if "linked_task_id" in outcome:
+        # Returning would record SUCCESS before the primary has a notebook
+        self.update_state(state=LINKED_STATE, meta=outcome)
+        raise Ignore()
+    return outcome
 
+def enqueue_generation(hf_model_id: str, validation: str = "full", profile: bool = False) -> str:
+    """Queue a generation and return its task id, or the id of the identical generation already running"""
+    task_id = str(uuid.uuid4())
+    dedup_key = job_deduplicator.make_key(hf_model_id, validation)
+    primary_task_id = job_deduplicator.claim_distributed(dedup_key, task_id, ttl=DEDUP_CLAIM_TTL)
+    if primary_task_id != task_id:
+        return primary_task_id
+    # The task finds its own claim and runs
     try:
-        # Test database connection first
-        logger.info("Testing database connection...")
-        try:
-            test_result = db.execute_query("SELECT 1 as test, version() as version")
-            logger.info(f"Database connection successful: {test_result}")
-        except Exception as db_error:
-            logger.error(f"Database connection failed: {db_error}")
-            logger.error(f"Database traceback: {traceback.format_exc()}")
-            raise db_error
-        # Update task status
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current_step": "Initializing notebook generation",
-                "progress": 10
-            }
-        )
+        generate_notebook_task.apply_async((hf_model_id, validation, profile), task_id=task_id)
+    except Exception:
+        job_deduplicator.release_distributed(dedup_key, task_id)
+        raise
+    return task_id
 
-        # Initialize services
-        hf_service = HuggingFaceService()
+def _dispatch_generation(task_id: str, hf_model_id: str, validation: str,
+                         profile: bool) -> Union[Dict[str, Any], Signature]:
+    """Answer from a running or cached generation, or build the stage chain"""
+    # Attach to an identical generation already running on any worker
+    dedup_key = job_deduplicator.make_key(hf_model_id, validation)
+    primary_task_id = job_deduplicator.claim_distributed(dedup_key, task_id, ttl=DEDUP_CLAIM_TTL)
+    if primary_task_id != task_id:
+        # Sent without enqueue_generation; clients follow the primary, no worker waits for it
+        logger.info("Task %s attached to running task %s for model %s", task_id, primary_task_id, hf_model_id)
+        progress_tracker.link_task(task_id, primary_task_id, hf_model_id=hf_model_id)
+        return {"task_id": task_id, "linked_task_id": primary_task_id}
 
-        # Step 1: Get model info
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current_step": "Fetching model information",
-                "progress": 20
-            }
-        )
+    # Cache hit: answer on the fast lane without running the pipeline
+    timings: Dict[str, float] = {}
+    try:
+        with start_span("generation.cache_lookup") as span, measure_stage(timings, "fetch"):
+            cached = run_async(_find_reusable_notebook(hf_model_id, validation))
+            span.set_attribute("cache.hit", cached is not None)
+        record_cache_lookup("notebook_reuse", hit=cached is not None)
+    except Exception:
+        job_deduplicator.release_distributed(dedup_key, task_id)
+        raise
+    if cached:
+        logger.info("Task %s reusing notebook %s for model %s", task_id, cached["share_id"], hf_model_id)
+        # A cache hit skips every other stage
+        timings.update({"render": 0.0, "validate": 0.0, "persist": 0.0})
+        stage_stats.record(None, "hit", validation, timings)
+        result = {
+            "status": "completed",
+            "share_id": cached["share_id"],
+            "notebook_id": str(cached["id"]),
+            "task_id": task_id,
+            "cached": True,
+            "validation": {key: value for key, value in (cached["validation"] or {}).items() if key != "validation_timestamp"}
+        }
+        progress_tracker.update_progress(task_id, {
+            "status": "completed",
+            "current_step": "Reused a previously validated notebook",
+            "progress": 100,
+            "share_id": result["share_id"],
+            "notebook_id": result["notebook_id"],
+            "validation": result["validation"],
+            "timings": {"stages": timings, "pipeline_tag": None, "cache_status": "hit", "validation": validation}
+        }, hf_model_id=hf_model_id)
+        job_deduplicator.release_distributed(dedup_key, task_id)
+        return result
+
+    _report_progress(task_id, "Initializing notebook generation", 10, hf_model_id=hf_model_id)
 
-        # Run methods using asyncio.run() to handle async methods
-        try:
-            model_info = asyncio.run(hf_service.get_model_info(hf_model_id))
-            if not model_info:
-                raise ValueError(f"Model {hf_model_id} not found")
-
-            # Step 2: Generate notebook content
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current_step": "Generating notebook cells",
-                    "progress": 40
-                }
-            )
-
-            generator = NotebookGenerator()
-            notebook_data = asyncio.run(generator.generate_notebook(hf_model_id))
-        except Exception as e:
-            raise e
-
-        # Step 3: Validate notebook execution
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current_step": "Validating notebook execution",
-                "progress": 60
-            }
+    ctx = {
+        "task_id": task_id,
+        "hf_model_id": hf_model_id,
+        "dedup_key": dedup_key,
+        "validation_mode": validation,
+        "trace_context": inject_trace_context(),
+        "profile": profile
+    }
+
+    # Static validation never executes cells, so it stays on the fast lane
+    validate_stage = validate_notebook_stage.s()
+    if validation == "static":
+        validate_stage = validate_stage.set(queue=settings.CELERY_FAST_QUEUE)
+
+    return chain(
+        fetch_model_stage.s(ctx),
+        render_notebook_stage.s(),
+        validate_stage,
+        persist_notebook_stage.s(),
+    )
+
+@celery_app.task(base=PipelineStage)
+def fetch_model_stage(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage 1: fetch model information and README from the Hub"""
+    _report_progress(ctx["task_id"], "Fetching model information", 20)
+    with task_profiler.profile(ctx["task_id"], "fetch", enabled=ctx.get("profile", False)), \
+            start_span("generation.fetch", {"task.id": ctx["task_id"]}, carrier=ctx.get("trace_context")):
+        return run_async(_fetch_model(ctx))
+
+async def _fetch_model(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    hf_model_id = ctx["hf_model_id"]
+    with measure_stage(ctx.setdefault("timings", {}), "fetch"):
+        model_info = await hf_service.get_model_info(hf_model_id)
+        if not model_info:
+            raise ValueError(f"Model {hf_model_id} not found")
+        readme_content = await hf_service.get_model_readme(hf_model_id)
+
+    ctx["model_info"] = model_info.dict()
+    ctx["readme_content"] = readme_content
+    return ctx
+
+@celery_app.task(base=PipelineStage)
+def render_notebook_stage(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage 2: render notebook cells"""
+    _report_progress(ctx["task_id"], "Generating notebook cells", 40)
+
+    generator = NotebookGenerator()
+    with task_profiler.profile(ctx["task_id"], "render", enabled=ctx.get("profile", False)), \
+            start_span("generation.render", {"task.id": ctx["task_id"]}, carrier=ctx.get("trace_context")), \
+            measure_stage(ctx["timings"], "render"):
+        ctx["notebook_data"] = generator.render_notebook(
+            ctx["hf_model_id"],
+            ModelInfo(**ctx["model_info"]),
+            ctx.pop("readme_content")
         )
+    return ctx
+
+@celery_app.task(base=PipelineStage)
+def validate_notebook_stage(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage 3: validate notebook execution (CPU bound, runs cells in subprocesses)"""
+    _report_progress(ctx["task_id"], "Validating notebook execution", 60)
 
-        validator = NotebookValidator()
-        validation_result = asyncio.run(validator.validate_notebook(
-            {"cells": notebook_data["cells"], "metadata": notebook_data["metadata"]},
-            hf_model_id
+    validator = NotebookValidator()
+    with task_profiler.profile(ctx["task_id"], "validate", enabled=ctx.get("profile", False)), \
+            start_span("generation.validate", {"task.id": ctx["task_id"]}, carrier=ctx.get("trace_context")) as span, \
+            measure_stage(ctx["timings"], "validate"):
+        validation_result = run_async(validator.validate_notebook(
+            ctx["notebook_data"]["notebook_content"],
+            ctx["hf_model_id"],
+            runtime=ctx["validation_mode"] == "full"
         ))
+        span.set_attribute("validation.status", validation_result["overall_status"])
 
-        if validation_result["overall_status"] != "success":
-            # If validation fails, include validation details in the response
-            self.update_state(
-                state="FAILURE",
-                meta={
-                    "current_step": f"Notebook validation failed: {len(validation_result['syntax_errors'])} syntax errors, {len(validation_result['runtime_errors'])} runtime errors",
-                    "progress": 0,
-                    "validation_errors": validation_result,
-                    "error": "Generated notebook failed validation"
-                }
-            )
-            raise ValueError(f"Generated notebook failed validation: {validation_result}")
-
-        # Step 5: Create share ID
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current_step": "Creating share link",
-                "progress": 75
-            }
+    if validation_result["overall_status"] != "success":
+        raise ValueError(
+            f"Generated notebook failed validation: {len(validation_result['syntax_errors'])} syntax errors, "
+            f"{len(validation_result['runtime_errors'])} runtime errors"
         )
 
-        share_id = str(uuid.uuid4())[:8]  # Short share ID
+    # Only the summary travels to the next stage
+    ctx["validation"] = {
+        "overall_status": validation_result["overall_status"],
+        "cells_validated": len(validation_result["cells_validated"]),
+        "syntax_errors": len(validation_result["syntax_errors"]),
+        "runtime_errors": len(validation_result["runtime_errors"]),
+        "model_loading_success": validation_result["model_loading_success"],
+        "validation_timestamp": validation_result["validation_timestamp"],
+        "mode": ctx["validation_mode"]
+    }
+    return ctx
 
-        # Step 6: Save to database
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current_step": "Saving to database",
-                "progress": 90
-            }
-        )
+@celery_app.task(base=PipelineStage)
+def persist_notebook_stage(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage 4: save the notebook and complete the logical task"""
+    _report_progress(ctx["task_id"], "Saving to database", 90)
+    with task_profiler.profile(ctx["task_id"], "persist", enabled=ctx.get("profile", False)), \
+            start_span("generation.persist", {"task.id": ctx["task_id"]}, carrier=ctx.get("trace_context")):
+        return run_async(_persist_notebook(ctx))
 
-        # Prepare metadata including validation results
-        enhanced_metadata = notebook_data["metadata"].copy()
-        enhanced_metadata["validation"] = {
-            "overall_status": validation_result["overall_status"],
-            "cells_validated": len(validation_result["cells_validated"]),
-            "syntax_errors": len(validation_result["syntax_errors"]),
-            "runtime_errors": len(validation_result["runtime_errors"]),
-            "model_loading_success": validation_result["model_loading_success"],
-            "validation_timestamp": validation_result["validation_timestamp"]
-        }
+async def _persist_notebook(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    task_id = ctx["task_id"]
+    notebook_data = ctx["notebook_data"]
+    validation = ctx["validation"]
 
-        query = """
-        INSERT INTO notebooks (share_id, hf_model_id, notebook_content, metadata)
-        VALUES (%s, %s, %s, %s)
-        RETURNING id, created_at
-        """
+    share_id = str(uuid.uuid4())[:8]  # Short share ID
 
-        result = db.execute_single_query(
-            query,
-            (share_id, hf_model_id, json.dumps(notebook_data["cells"]), json.dumps(enhanced_metadata))
-        )
+    # Prepare metadata including validation results
+    enhanced_metadata = notebook_data["metadata"].copy()
+    enhanced_metadata["validation"] = validation
+    # The persist stage is still running, its time is kept with the task state
+    enhanced_metadata["timings"] = {"stages": dict(ctx["timings"]), "trace_id": current_trace_id()}
 
-        # Step 7: Complete
-        self.update_state(
-            state="SUCCESS",
-            meta={
-                "current_step": f"Notebook generated and validated successfully ({validation_result['cells_validated']} cells validated)",
-                "progress": 100,
-                "share_id": share_id,
-                "notebook_id": str(result["id"]),
-                "validation_summary": {
-                    "cells_validated": validation_result["cells_validated"],
-                    "syntax_errors": len(validation_result["syntax_errors"]),
-                    "runtime_errors": len(validation_result["runtime_errors"]),
-                    "model_loaded": validation_result["model_loading_success"]
-                }
-            }
+    with measure_stage(ctx["timings"], "persist"):
+        result = await notebook_store.insert_async(
+            share_id, ctx["hf_model_id"], notebook_data["notebook_content"], enhanced_metadata
         )
 
-        return {
-            "status": "completed",
-            "share_id": share_id,
-            "notebook_id": str(result["id"]),
-            "task_id": task_id,
-            "validation": {
-                "overall_status": validation_result["overall_status"],
-                "cells_validated": len(validation_result["cells_validated"]),
-                "syntax_errors": len(validation_result["syntax_errors"]),
-                "runtime_errors": len(validation_result["runtime_errors"]),
-                "model_loading_success": validation_result["model_loading_success"]
-            }
-        }
+    pipeline_tag = ctx["model_info"].get("pipeline_tag")
+    stage_stats.record(pipeline_tag, "miss", ctx["validation_mode"], ctx["timings"])
 
-    except Exception as e:
-        # Log the full exception with traceback
-        logger.error(f"Task {task_id} failed with error: {str(e)}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-
-        # Update task status to failed
-        self.update_state(
-            state="FAILURE",
-            meta={
-                "current_step": f"Error: {str(e)}",
-                "progress": 0,
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
-        )
+    validation_summary = {key: value for key, value in validation.items() if key != "validation_timestamp"}
+    progress_tracker.update_progress(task_id, {
+        "status": "completed",
+        "current_step": f"Notebook generated and validated successfully ({validation['cells_validated']} cells validated)",
+        "progress": 100,
+        "share_id": share_id,
+        "notebook_id": str(result["id"]),
+        "validation": validation_summary,
+        "timings": {
+            "stages": ctx["timings"],
+            "pipeline_tag": pipeline_tag,
+            "cache_status": "miss",
+            "validation": ctx["validation_mode"]
+        }
+    })
+    job_deduplicator.release_distributed(ctx["dedup_key"], task_id)
 
-        # Re-raise exception to mark task as failed
-        raise e
\ No newline at end of file
+    return {
+        "status": "completed",
+        "share_id": share_id,
+        "notebook_id": str(result["id"]),
+        "task_id": task_id,
+        "validation": validation_summary
+    }
@@ -0,0 +1,41 @@
+"""Helpers shared by the benchmark scripts"""
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))
+    return ordered[index]
+
+def latency_summary(seconds: List[float]) -> Dict[str, Any]:
+    """Count and millisecond percentiles of a list of latencies in seconds"""
+    return {
+        "count": len(seconds),
+        "mean_ms": round(1000 * sum(seconds) / len(seconds), 3) if seconds else 0.0,
+        "p50_ms": round(1000 * percentile(seconds, 0.50), 3),
+        "p95_ms": round(1000 * percentile(seconds, 0.95), 3),
+        "p99_ms": round(1000 * percentile(seconds, 0.99), 3),
+        "max_ms": round(1000 * max(seconds), 3) if seconds else 0.0,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_metadata() -> Dict[str, Any]:
+    """Where and when a result was produced, so runs can be compared"""
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
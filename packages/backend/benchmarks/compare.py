@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files side by side.
+
+Prints throughput, latency percentiles and allocations for every scenario
+present in both runs, with the change relative to the baseline. Usage:
+
+    python -m benchmarks.compare base.json head.json
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+SCALAR_KEYS = ("requests_per_s", "completed_per_s", "ops_per_s", "mean_us", "peak_alloc_bytes")
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+def _metrics(result: Dict[str, Any]) -> Iterator[Tuple[str, float]]:
+    for key in SCALAR_KEYS:
+        if key in result:
+            yield key, result[key]
+    for name, value in result.items():
+        if isinstance(value, dict) and "p50_ms" in value:
+            for key in LATENCY_KEYS:
+                yield f"{name}.{key}", value[key]
+
+def _change(base: float, head: float) -> str:
+    if not base:
+        return "n/a"
+    return f"{(head - base) / base * 100:+.1f}%"
+
+def compare(base: Dict[str, Any], head: Dict[str, Any]) -> str:
+    lines = [
+        f"base {base['metadata'].get('commit') or '?'}  vs  head {head['metadata'].get('commit') or '?'}",
+        "",
+        f"{'scenario':<40} {'metric':<28} {'base':>12} {'head':>12} {'change':>9}",
+    ]
+    for scenario, head_result in head["scenarios"].items():
+        base_result = base["scenarios"].get(scenario)
+        if base_result is None:
+            continue
+        base_metrics = dict(_metrics(base_result))
+        for metric, head_value in _metrics(head_result):
+            if metric in base_metrics:
+                base_value = base_metrics[metric]
+                lines.append(
+                    f"{scenario:<40} {metric:<28} {base_value:>12.2f} {head_value:>12.2f} {_change(base_value, head_value):>9}"
+                )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    print(compare(base, head))
+
+if __name__ == "__main__":
+    main()
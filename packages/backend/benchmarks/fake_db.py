@@ -0,0 +1,166 @@
+"""
+In-memory test double for the notebooks table.
+
+Understands the statements the generate, share and download paths issue and
+raises NotImplementedError for anything else, so a benchmark fails loudly
+instead of measuring a query it does not model. An optional per-query delay
+stands in for the Postgres round trip; the sync methods block like psycopg
+does.
+
+Pass --database-url to the suite to benchmark against a real (ephemeral)
+Postgres instead.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_ALIAS = re.compile(r"(\w+)(::text)? AS (\w+)")
+# Share lookups go through the notebook_shares registry; rows are keyed by share_id here
+_SHARE_FILTER = re.compile(
+    r"\(share_id, created_at\) = \(SELECT share_id, created_at FROM notebook_shares WHERE share_id = %s\)"
+)
+
+class FakeNotebookDB:
+    """Dict-backed stand-in for Database/AsyncDatabase query methods"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.notebooks: Dict[str, Dict[str, Any]] = {}
+        self.cells: Dict[str, Any] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def insert_notebook(self, share_id: str, hf_model_id: str, notebook_content: Dict[str, Any],
+                        metadata: Dict[str, Any], content_hash: Optional[str] = None,
+                        outline: Optional[List[Dict[str, Any]]] = None,
+                        cell_hashes: Optional[List[str]] = None) -> Dict[str, Any]:
+        row = {
+            "id": uuid.uuid4(),
+            "created_at": datetime.now(timezone.utc),
+            "share_id": share_id,
+            "hf_model_id": hf_model_id,
+            "notebook_content": notebook_content,
+            "metadata": metadata,
+            "download_count": 0,
+            "content_hash": content_hash,
+            "cell_count": len(cell_hashes) if cell_hashes is not None else len(notebook_content.get("cells", [])),
+            "outline": outline,
+            "cell_hashes": cell_hashes,
+            "archive_key": None,
+            "last_accessed_at": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            self.notebooks[share_id] = row
+        return row
+
+    def _run(self, query: str, params: Optional[tuple]) -> List[Dict[str, Any]]:
+        sql = _SHARE_FILTER.sub("share_id = %s", _WHITESPACE.sub(" ", query).strip())
+        params = params or ()
+        with self._lock:
+            self.queries += 1
+
+        if "INSERT INTO notebooks (" in sql:
+            share_id, hf_model_id, content, metadata, content_hash = params[:5]
+            row = self.insert_notebook(
+                share_id, hf_model_id, json.loads(content), json.loads(metadata), content_hash,
+                json.loads(params[6]), params[7]
+            )
+            return [{"id": row["id"], "created_at": row["created_at"]}]
+        if sql.startswith("UPDATE notebooks SET download_count = download_count + 1"):
+            with self._lock:
+                row = self.notebooks.get(params[0])
+                if row and "content_hash = ANY(%s)" in sql and row["content_hash"] not in params[1]:
+                    row = None
+                if row:
+                    row["download_count"] += 1
+            if "RETURNING content_hash" in sql:
+                return [{"content_hash": row["content_hash"]}] if row else []
+            return [{"affected_rows": 1 if row else 0}]
+        if sql.startswith("UPDATE notebooks n SET last_accessed_at"):
+            accessed_at, share_ids, stale_before = params
+            updated = 0
+            with self._lock:
+                for share_id in share_ids:
+                    row = self.notebooks.get(share_id)
+                    if row and row["last_accessed_at"] < stale_before:
+                        row["last_accessed_at"] = accessed_at
+                        updated += 1
+            return [{"affected_rows": updated}]
+        if sql.startswith("INSERT INTO notebook_cells"):
+            with self._lock:
+                for cell_hash, cell in zip(*params):
+                    self.cells.setdefault(cell_hash, json.loads(cell))
+            return [{"affected_rows": len(params[0])}]
+        if "FROM notebook_cells WHERE cell_hash = ANY(%s)" in sql:
+            return [
+                {"cell_hash": cell_hash, "cell_json": json.dumps(self.cells[cell_hash])}
+                for cell_hash in params[0] if cell_hash in self.cells
+            ]
+        if "AS cells_json" in sql:
+            first, last, start, end, share_id = params
+            row = self.notebooks.get(share_id)
+            if not row:
+                return []
+            result = {"content_hash": row["content_hash"], "cell_count": row["cell_count"], "archive_key": row["archive_key"]}
+            if row["cell_hashes"] is not None:
+                return [{**result, "cell_hashes": row["cell_hashes"][first - 1:last], "cells_json": None}]
+            cells = row["notebook_content"].get("cells", [])[start:end]
+            return [{**result, "cell_hashes": None, "cells_json": json.dumps(cells)}]
+        if sql.startswith("SELECT") and "FROM notebooks WHERE share_id = %s" in sql:
+            row = self.notebooks.get(params[0])
+            if not row:
+                return []
+            result = dict(row)
+            for column, as_text, alias in _ALIAS.findall(sql):
+                value = row.get(column)
+                result[alias] = json.dumps(value) if as_text and value is not None else value
+            return [result]
+        if "ORDER BY created_at DESC, id DESC" in sql:
+            *params, limit = params
+            with self._lock:
+                rows = sorted(self.notebooks.values(), key=lambda r: (r["created_at"], r["id"]), reverse=True)
+            if "hf_model_id = %s" in sql:
+                model_id, *params = params
+                rows = [row for row in rows if row["hf_model_id"] == model_id]
+            if params:
+                rows = [row for row in rows if (row["created_at"], row["id"]) < tuple(params)]
+            return [dict(row) for row in rows[:limit]]
+        if sql.startswith("SELECT") and "FROM notebooks WHERE hf_model_id = %s" in sql:
+            # Reuse lookups always miss, so every generation runs the full pipeline
+            return []
+        if "FROM generation_tasks" in sql:
+            return []
+        raise NotImplementedError(f"FakeNotebookDB does not model: {sql[:120]}")
+
+    def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return self._run(query, params)
+
+    def execute_single_query(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        time.sleep(self.latency)
+        rows = self._run(query, params)
+        return rows[0] if rows else None
+
+    async def execute_query_async(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency)
+        return self._run(query, params)
+
+    async def execute_single_query_async(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        await asyncio.sleep(self.latency)
+        rows = self._run(query, params)
+        return rows[0] if rows else None
+
+    def install(self):
+        """Route the backend's global database clients to this double"""
+        from app.core.database import async_db, db
+
+        db.execute_query = self.execute_query
+        db.execute_single_query = self.execute_single_query
+        async_db.execute_query = self.execute_query_async
+        async_db.execute_single_query = self.execute_single_query_async
@@ -0,0 +1,202 @@
+"""
+Lane wait benchmark for the Celery generation pipeline.
+
+Starts real Celery workers for the app (`celery -A app.core.celery_app
+worker`, each pool sized from CELERY_*_CONCURRENCY by the celeryd_init hook),
+enqueues a seeded mixed workload through enqueue_generation, which the app's
+task_routes spread over the lanes, and reports the enqueue-to-start wait
+every lane recorded in alacard_celery_queue_wait_seconds.
+
+Deployments, with the same total concurrency:
+
+  lanes   one worker per lane (fast, io, validate)
+  shared  one worker consuming every lane
+
+Needs the broker in REDIS_URL and a migrated Postgres in DATABASE_URL, e.g.
+throwaway containers; Hub calls go to the stub Hub. Fast jobs are static
+generations of models generated during a warm-up, so they are cache hits.
+Slow jobs are full validations of new models. Percentiles are the upper
+bounds of histogram buckets. Usage:
+
+    python -m benchmarks.lane_wait --deployment lanes --jobs 200 --rate 2 --fast-ratio 0.7
+    python -m benchmarks.lane_wait --deployment shared --jobs 200 --rate 2 --fast-ratio 0.7
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from benchmarks.common import run_metadata
+from benchmarks.stub_hub import StubHub
+
+WAIT_METRIC = "alacard_celery_queue_wait_seconds"
+
+def configure_environment(hub: StubHub, metrics_dir: str):
+    """Settings for this process and the workers, set before the app is imported"""
+    os.environ.update({
+        "HF_API_URL": f"{hub.base_url}/api",
+        "HF_BASE_URL": hub.base_url,
+        "PROGRESS_BACKEND": "redis",
+        "TRENDING_ENABLED": "false",
+        "TRACING_EXPORTER": "none",
+        "LOG_LEVEL": "WARNING",
+        "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+    })
+
+def start_workers(deployment: str) -> List[subprocess.Popen]:
+    from app.core.config import settings
+
+    lanes = [settings.CELERY_FAST_QUEUE, settings.CELERY_IO_QUEUE, settings.CELERY_VALIDATION_QUEUE]
+    groups = [[lane] for lane in lanes] if deployment == "lanes" else [lanes]
+    workers = []
+    for group in groups:
+        name = group[0].rsplit(".", 1)[-1] if len(group) == 1 else "shared"
+        # No --concurrency, so lane_concurrency_handler sizes the pool
+        workers.append(subprocess.Popen([
+            sys.executable, "-m", "celery", "-A", "app.core.celery_app", "worker",
+            "-Q", ",".join(group), "-n", f"{name}@lane_wait",
+            "--loglevel", "WARNING", "--without-gossip", "--without-mingle",
+        ]))
+    return workers
+
+def wait_for_workers(count: int, timeout: float):
+    from app.core.celery_app import celery_app
+
+    deadline = time.monotonic() + timeout
+    while len(celery_app.control.ping(timeout=1.0) or []) < count:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{count} Celery workers did not start within {timeout:.0f}s")
+
+def stop_workers(workers: List[subprocess.Popen]):
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        try:
+            worker.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+def wait_for_results(results: List[Any], timeout: float) -> Dict[str, int]:
+    """Final Celery state counts once every task is done or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while not all(result.ready() for result in results) and time.monotonic() < deadline:
+        time.sleep(0.5)
+    return dict(Counter(result.state for result in results))
+
+def read_waits(metrics_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Cumulative wait histogram of every lane, summed over task names"""
+    from prometheus_client import CollectorRegistry, multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=metrics_dir)
+    lanes: Dict[str, Dict[str, Any]] = {}
+    for family in registry.collect():
+        if family.name != WAIT_METRIC:
+            continue
+        for sample in family.samples:
+            lane = lanes.setdefault(sample.labels["queue"], {"buckets": Counter(), "count": 0.0, "sum": 0.0})
+            if sample.name.endswith("_bucket"):
+                lane["buckets"][float(sample.labels["le"])] += sample.value
+            elif sample.name.endswith("_count"):
+                lane["count"] += sample.value
+            elif sample.name.endswith("_sum"):
+                lane["sum"] += sample.value
+    return lanes
+
+def _bucket_percentile(buckets: Counter, count: float, pct: float) -> Optional[float]:
+    """Upper bound of the bucket holding the percentile; None past the last bound"""
+    for bound in sorted(buckets):
+        if buckets[bound] >= pct * count:
+            return None if bound == float("inf") else bound
+    return None
+
+def summarize(after: Dict[str, Dict[str, Any]], before: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-lane waits observed between two histogram snapshots"""
+    summary = {}
+    for queue, lane in sorted(after.items()):
+        base = before.get(queue, {"buckets": Counter(), "count": 0.0, "sum": 0.0})
+        count = lane["count"] - base["count"]
+        if count <= 0:
+            continue
+        buckets = Counter({bound: value - base["buckets"][bound] for bound, value in lane["buckets"].items()})
+        summary[queue] = {
+            "tasks": int(count),
+            "mean_wait_s": round((lane["sum"] - base["sum"]) / count, 4),
+            "p50_wait_le_s": _bucket_percentile(buckets, count, 0.50),
+            "p99_wait_le_s": _bucket_percentile(buckets, count, 0.99),
+        }
+    return summary
+
+def run_workload(args: argparse.Namespace, metrics_dir: str) -> Dict[str, Any]:
+    from app.tasks.notebook_tasks import enqueue_generation, generate_notebook_task
+
+    def submit(hf_model_id: str, validation: str):
+        # A duplicate of a running generation returns the primary's result
+        return generate_notebook_task.AsyncResult(enqueue_generation(hf_model_id, validation))
+
+    rng = random.Random(args.seed)
+    hot_models = [f"bench/lane-hot-{args.seed}-{i:03d}" for i in range(args.hot_models)]
+    warmup = wait_for_results([submit(model_id, "static") for model_id in hot_models], args.timeout)
+    before = read_waits(metrics_dir)
+
+    results = []
+    for i in range(args.jobs):
+        time.sleep(rng.expovariate(args.rate))
+        if rng.random() < args.fast_ratio:
+            results.append(submit(rng.choice(hot_models), "static"))
+        else:
+            results.append(submit(f"bench/lane-cold-{args.seed}-{i:05d}", "full"))
+    outcomes = wait_for_results(results, args.timeout)
+
+    return {"warmup_outcomes": warmup, "outcomes": outcomes, "lanes": summarize(read_waits(metrics_dir), before)}
+
+def _format_bound(bound: Optional[float]) -> str:
+    return "> last bucket" if bound is None else f"<= {bound:g}"
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deployment", choices=("lanes", "shared"), default="lanes")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=2.0, help="submissions per second")
+    parser.add_argument("--fast-ratio", type=float, default=0.7, help="share of cache-hit static jobs")
+    parser.add_argument("--hot-models", type=int, default=10, help="models warmed up for cache hits")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds to wait for each phase")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    hub = StubHub(seed=args.seed).start()
+    metrics_dir = tempfile.mkdtemp(prefix="alacard_lane_wait_")
+    configure_environment(hub, metrics_dir)
+    workers = start_workers(args.deployment)
+    try:
+        wait_for_workers(len(workers), timeout=60)
+        measured = run_workload(args, metrics_dir)
+    finally:
+        stop_workers(workers)
+        hub.stop()
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    results = {
+        "metadata": run_metadata(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        **measured,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"deployment {args.deployment}, outcomes {measured['outcomes']}")
+    print(f"{'lane':<22} {'tasks':>6} {'mean wait (s)':>14} {'p50 wait (s)':>15} {'p99 wait (s)':>15}")
+    for queue, stats in measured["lanes"].items():
+        print(f"{queue:<22} {stats['tasks']:>6} {stats['mean_wait_s']:>14.3f} "
+              f"{_format_bound(stats['p50_wait_le_s']):>15} {_format_bound(stats['p99_wait_le_s']):>15}")
+
+if __name__ == "__main__":
+    main()
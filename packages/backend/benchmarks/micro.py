@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks for the generator and validator hot paths.
+
+Each benchmark reports ops/sec (best of several timeit repeats) and the
+memory one call allocates, measured with tracemalloc: the peak above the
+starting point and what is still held afterwards. Nothing touches the network
+or spawns a kernel; the validator runs its static path only. Usage:
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter readme --output micro.json
+    python -m benchmarks.compare base.json micro.json
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from benchmarks.common import run_metadata
+
+README_SIZES = (("4KB", 4 * 1024), ("64KB", 64 * 1024), ("1MB", 1024 * 1024), ("4MB", 4 * 1024 * 1024))
+
+README_SECTION = """
+## Section {index}
+
+Some prose describing the model, its training data and intended use.
+Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+
+```python
+from transformers import pipeline
+pipe = pipeline("text-generation", model="bench/model")
+print(pipe("Hello world {index}"))
+```
+
+```
+pip install transformers
+```
+
+```
+from transformers import AutoModel
+model = AutoModel.from_pretrained("bench/model")
+```
+"""
+
+def build_readme(size: int) -> str:
+    """Model card of roughly `size` bytes with python, shell and bare code fences"""
+    sections = []
+    total = 0
+    while total < size:
+        section = README_SECTION.format(index=len(sections))
+        sections.append(section)
+        total += len(section)
+    return "# bench/model\n" + "".join(sections)
+
+def _run_sync(coro) -> Any:
+    """Drive a coroutine that never suspends without paying for an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError("coroutine suspended; it cannot be micro-benchmarked synchronously")
+
+def measure(fn: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, Any]:
+    """ops/sec and per-call allocations of `fn`"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        fn()  # warm caches so only per-call allocations are counted
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_s": round(1 / best, 2),
+        "mean_us": round(best * 1e6, 3),
+        "peak_alloc_bytes": peak - start,
+        "retained_bytes": current - start,
+        "calls": number * repeat,
+    }
+
+def build_benchmarks() -> List[Tuple[str, Callable[[], Any]]]:
+    from app.models.notebook import ModelInfo
+    from app.services.notebook_generator import NotebookGenerator
+    from app.services.notebook_validator import NotebookValidator
+
+    generator = NotebookGenerator()
+    validator = NotebookValidator()
+
+    def model_info(pipeline_tag: Optional[str]) -> ModelInfo:
+        return ModelInfo(
+            id="bench/model", modelId="bench/model", name="model", pipeline_tag=pipeline_tag,
+            downloads=1000, likes=10, tags=["benchmark"]
+        )
+
+    benchmarks: List[Tuple[str, Callable[[], Any]]] = []
+
+    for label, size in README_SIZES:
+        readme = build_readme(size)
+        benchmarks.append((f"extract_readme_code[{label}]", lambda readme=readme: generator._extract_code_from_readme(readme)))
+
+    branches = (("text-generation", model_info("text-generation")),
+                ("text-classification", model_info("text-classification")),
+                ("generic", model_info("fill-mask")),
+                ("no_model_info", None))
+    for label, info in branches:
+        benchmarks.append((f"generic_example_cell[{label}]", lambda info=info: generator._generic_example_cell(info)))
+
+    small_readme = build_readme(4 * 1024)
+    rendered = generator.render_notebook("bench/model", model_info("text-generation"), small_readme)
+    notebook = rendered["notebook_content"]
+    code_sources = [cell["source"] for cell in notebook["cells"] if cell["cell_type"] == "code"]
+    broken_source = ["def broken(:\n", "    pass"]
+
+    benchmarks += [
+        ("render_notebook", lambda: generator.render_notebook("bench/model", model_info("text-generation"), small_readme)),
+        ("validate_syntax[notebook_cells]", lambda: [_run_sync(validator._validate_syntax(source)) for source in code_sources]),
+        ("validate_syntax[syntax_error]", lambda: _run_sync(validator._validate_syntax(broken_source))),
+        ("validate_notebook[static]", lambda: _run_sync(validator.validate_notebook(notebook, "bench/model", runtime=False))),
+        ("json_dumps[notebook]", lambda: json.dumps(notebook)),
+        ("json_dumps[notebook_indented]", lambda: json.dumps(notebook, indent=2)),
+    ]
+    return benchmarks
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="approximate seconds per timing repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="also write JSON results here")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'benchmark':<44} {'ops/s':>12} {'mean us':>12} {'peak alloc':>12} {'retained':>10}")
+    for name, fn in build_benchmarks():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(fn, args.min_time, args.repeat)
+        print(
+            f"{name:<44} {result['ops_per_s']:>12,.1f} {result['mean_us']:>12,.1f} "
+            f"{result['peak_alloc_bytes']:>12,} {result['retained_bytes']:>10,}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": run_metadata(), "config": vars(args), "scenarios": results}, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Replay a recorded request mix against a local stack.
+
+Record a trace by running the API with TRAFFIC_RECORD_PATH set (see
+app/core/traffic.py), then replay it here at one or more speed-up factors:
+
+    python -m benchmarks.replay traffic.jsonl --speedups 1,2,4,8,16 --output replay.json
+
+The stack is the same as benchmarks.suite: the stub Hub, the in-memory
+database double (or --database-url) and one uvicorn worker. Requests are
+issued open-loop at their recorded offsets divided by the speed-up, so a
+saturated worker shows up as falling achieved throughput, rising latency
+and dispatch lag instead of a politely slower client. Recorded share and
+task keys are mapped onto notebooks seeded before the run and tasks created
+during it, keeping the trace's hot spots.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+from benchmarks.common import latency_summary, run_metadata
+from benchmarks.fake_db import FakeNotebookDB
+from benchmarks.stub_hub import StubHub
+from benchmarks.suite import API, ApiServer, _follow_progress, _free_port, _generate_one, _run_concurrently, configure_environment
+
+GENERATE_ROUTE = f"{API}/generate"
+
+def load_trace(path: str, limit: Optional[int] = None) -> List[list]:
+    """Trace entries ordered by time, skipping partial lines"""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, list) and len(entry) >= 5:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry[0])
+    return entries[:limit] if limit else entries
+
+class KeyMap:
+    """Maps trace keys onto local ids in order of first appearance"""
+
+    def __init__(self, pool: List[str], wrap: bool):
+        self.pool = pool
+        self.wrap = wrap
+        self.assigned: Dict[str, str] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        if key not in self.assigned:
+            if not self.pool:
+                return None
+            index = len(self.assigned)
+            self.assigned[key] = self.pool[index % len(self.pool) if self.wrap else min(index, len(self.pool) - 1)]
+        return self.assigned[key]
+
+async def _issue(client, ws_base: str, entry: list, run: str, index: int, args: argparse.Namespace,
+                 tasks: List[str], task_map: KeyMap, share_map: KeyMap) -> Dict[str, Any]:
+    method, template, key = entry[1], entry[2], entry[3]
+    route = f"{method} {template}"
+    if "{task_id}" in template:
+        local_id = task_map.get(key)
+        path = template.replace("{task_id}", local_id or "")
+    elif "{share_id}" in template:
+        local_id = share_map.get(key)
+        path = template.replace("{share_id}", local_id or "")
+    elif "{" in template or (method != "GET" and template != GENERATE_ROUTE):
+        # Other parameterized routes and bodies other than generate are not modelled
+        return {"route": route, "outcome": "skipped"}
+    else:
+        local_id, path = "", template
+    if local_id is None:
+        return {"route": route, "outcome": "skipped"}
+
+    started_at = time.perf_counter()
+    try:
+        if method == "WS":
+            result = await asyncio.wait_for(_follow_progress(f"{ws_base}{path}"), args.ws_timeout)
+            outcome = result["outcome"]
+        elif template == GENERATE_ROUTE:
+            response = await client.post(
+                path, json={"hf_model_id": f"bench/replay-{run}-{index:06d}", "validation": args.validation}
+            )
+            outcome = response.status_code
+            if response.status_code == 200:
+                tasks.append(response.json()["task_id"])
+        else:
+            outcome = (await client.get(path)).status_code
+    except Exception as e:
+        outcome = type(e).__name__
+    finished_at = time.perf_counter()
+    return {"route": route, "outcome": outcome, "latency": finished_at - started_at, "finished_at": finished_at}
+
+def _is_error(outcome: Any) -> bool:
+    if isinstance(outcome, int):
+        return outcome >= 500 or outcome == 429
+    return outcome not in ("final", "skipped")
+
+def _summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    issued = [result for result in results if result["outcome"] != "skipped"]
+    errors = sum(1 for result in issued if _is_error(result["outcome"]))
+    return {
+        "requests": len(issued),
+        "skipped": len(results) - len(issued),
+        "requests_per_s": round(len(issued) / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round(errors / len(issued), 4) if issued else 0.0,
+        "outcomes": {str(outcome): count for outcome, count in Counter(result["outcome"] for result in issued).items()},
+        "latency": latency_summary([result["latency"] for result in issued]),
+    }
+
+async def _drain(client, tasks: List[str], timeout: float):
+    """Wait for generations from the previous run so runs do not overlap"""
+    deadline = time.monotonic() + timeout
+    for task_id in tasks:
+        while time.monotonic() < deadline:
+            response = await client.get(f"{API}/task/{task_id}")
+            if response.status_code != 200 or response.json().get("status") in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.2)
+
+async def replay(client, ws_base: str, entries: List[list], speedup: float, shares: List[str],
+                 args: argparse.Namespace) -> Dict[str, Any]:
+    tasks: List[str] = []
+    task_map = KeyMap(tasks, wrap=False)
+    share_map = KeyMap(shares, wrap=True)
+    run = f"{args.seed}-x{speedup:g}"
+
+    first, last = entries[0][0], entries[-1][0]
+    pending = []
+    lags = []
+    started_at = time.perf_counter()
+    for index, entry in enumerate(entries):
+        delay = (entry[0] - first) / speedup - (time.perf_counter() - started_at)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lags.append(max(0.0, -delay))
+        pending.append(asyncio.create_task(
+            _issue(client, ws_base, entry, run, index, args, tasks, task_map, share_map)
+        ))
+    results = await asyncio.gather(*pending)
+    # WebSocket sessions last as long as their generation, so throughput is
+    # measured until the last HTTP response
+    http_finished = [result["finished_at"] for result in results
+                     if "finished_at" in result and not result["route"].startswith("WS ")]
+    elapsed = (max(http_finished) if http_finished else time.perf_counter()) - started_at
+    await _drain(client, tasks, args.drain_timeout)
+
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result)
+
+    offered_duration = max((last - first) / speedup, 1e-9)
+    summary = _summarize(results, elapsed)
+    summary.update({
+        "speedup": speedup,
+        "offered_per_s": round(summary["requests"] / offered_duration, 3),
+        "elapsed_s": round(elapsed, 3),
+        "dispatch_lag": latency_summary(lags),
+        "routes": {route: _summarize(route_results, elapsed) for route, route_results in sorted(by_route.items())},
+    })
+    return summary
+
+def _saturated(result: Dict[str, Any], args: argparse.Namespace) -> bool:
+    return (
+        result["requests_per_s"] < 0.9 * result["offered_per_s"]
+        or result["error_rate"] > args.max_error_rate
+        or (args.max_p99_ms is not None and result["latency"]["p99_ms"] > args.max_p99_ms)
+    )
+
+async def run_replays(args: argparse.Namespace, entries: List[list], server: ApiServer) -> Dict[str, Any]:
+    import httpx
+
+    share_keys = {entry[3] for entry in entries if "{share_id}" in entry[2]}
+    seed_count = min(len(share_keys), args.max_notebooks)
+    limits = httpx.Limits(max_connections=args.max_connections)
+    ws_base = server.base_url.replace("http", "ws", 1)
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=args.request_timeout, limits=limits) as client:
+        seeded = await _run_concurrently(
+            seed_count, 16, lambda i: _generate_one(client, f"bench/replay-seed-{args.seed}-{i:05d}", "static", 0.05)
+        )
+        shares = [result["share_id"] for result in seeded if result.get("share_id")]
+        runs = [await replay(client, ws_base, entries, speedup, shares, args) for speedup in args.speedups]
+    return {"seeded_notebooks": len(shares), "runs": runs}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="file written via TRAFFIC_RECORD_PATH")
+    parser.add_argument("--speedups", default="1", help="comma-separated replay speed-up factors")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--validation", choices=("static", "full"), default="static")
+    parser.add_argument("--job-workers", type=int, default=2)
+    parser.add_argument("--max-notebooks", type=int, default=200, help="cap on notebooks seeded for share keys")
+    parser.add_argument("--max-connections", type=int, default=512)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--ws-timeout", type=float, default=120.0)
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="saturation threshold")
+    parser.add_argument("--max-p99-ms", type=float, help="saturation threshold on overall p99")
+    parser.add_argument("--hub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--hub-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--hub-error-rate", type=float, default=0.0)
+    parser.add_argument("--readme-bytes", type=int, default=8192)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    parser.add_argument("--database-url")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write JSON results here")
+    args = parser.parse_args(argv)
+    args.speedups = [float(value) for value in args.speedups.split(",") if value.strip()]
+    return args
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    entries = load_trace(args.trace, args.limit)
+    if len(entries) < 2:
+        raise SystemExit(f"{args.trace} holds fewer than two requests")
+
+    hub = StubHub(
+        latency_ms=args.hub_latency_ms, jitter_ms=args.hub_jitter_ms, error_rate=args.hub_error_rate,
+        readme_bytes=args.readme_bytes, seed=args.seed
+    ).start()
+    configure_environment(hub, args.job_workers, 10 ** 5, args.database_url)
+    if not args.database_url:
+        FakeNotebookDB(latency_ms=args.db_latency_ms).install()
+
+    server = ApiServer(args.port or _free_port()).start()
+    try:
+        results = asyncio.run(run_replays(args, entries, server))
+    finally:
+        server.stop()
+        hub.stop()
+
+    print(f"{'speedup':>8} {'offered/s':>10} {'achieved/s':>11} {'errors':>8} {'p50 ms':>9} {'p99 ms':>9} {'lag p99':>9}")
+    saturation = None
+    for run in results["runs"]:
+        print(
+            f"{run['speedup']:>8g} {run['offered_per_s']:>10.1f} {run['requests_per_s']:>11.1f} "
+            f"{run['error_rate']:>8.2%} {run['latency']['p50_ms']:>9.1f} {run['latency']['p99_ms']:>9.1f} "
+            f"{run['dispatch_lag']['p99_ms']:>9.1f}"
+        )
+        if saturation is None and _saturated(run, args):
+            saturation = run["speedup"]
+    print(f"saturated at x{saturation:g}" if saturation else "not saturated at the tested speed-ups")
+
+    if args.output:
+        report = {
+            "metadata": run_metadata(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "database_url")},
+            "trace": {"requests": len(entries), "duration_s": round(entries[-1][0] - entries[0][0], 3)},
+            "saturation_speedup": saturation,
+            # Keyed by speed-up so benchmarks.compare can diff two replays
+            "scenarios": {f"x{run['speedup']:g}": run for run in results["runs"]},
+            "seeded_notebooks": results["seeded_notebooks"],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Share page response building: Pydantic model path vs raw JSON path.
+
+The model path is what GET /notebooks/{share_id} used to do per request:
+psycopg parses the JSONB into dicts, NotebookResponse validates and copies
+them, and FastAPI encodes the result. The raw path selects the JSONB as text
+and composes the response around it (NotebookStore.get_page). Both are timed
+and their per-call allocations measured for small and large notebooks:
+
+    python -m benchmarks.share_page
+    python -m benchmarks.share_page --cells 10,100,500,2000 --output share_page.json
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from benchmarks.common import run_metadata
+from benchmarks.micro import measure
+
+def build_notebook(cells: int) -> Dict[str, Any]:
+    """Notebook with `cells` alternating markdown and code cells"""
+    return {
+        "cells": [
+            {
+                "cell_type": "markdown",
+                "metadata": {},
+                "source": [f"## Step {index}\n", "Explanation of what the next cell does.\n"],
+            } if index % 2 else {
+                "cell_type": "code",
+                "execution_count": None,
+                "metadata": {},
+                "outputs": [],
+                "source": [
+                    "from transformers import pipeline\n",
+                    f"pipe = pipeline('text-generation', model='bench/model-{index}')\n",
+                    "output = pipe('Once upon a time', max_length=100, do_sample=True)\n",
+                    "print(output[0]['generated_text'])",
+                ],
+            }
+            for index in range(cells)
+        ],
+        "metadata": {"kernelspec": {"display_name": "Python 3", "language": "python", "name": "python3"}},
+        "nbformat": 4,
+        "nbformat_minor": 4,
+    }
+
+def build_row(cells: int) -> Dict[str, Any]:
+    """A notebooks row as the page query returns it, JSONB as text"""
+    return {
+        "id": uuid.uuid4(),
+        "created_at": datetime.now(timezone.utc),
+        "share_id": "bench123",
+        "hf_model_id": "bench/model",
+        "notebook_content_json": json.dumps(build_notebook(cells)),
+        "metadata_json": json.dumps({"generator_version": "1.0.0", "validation": {"overall_status": "success"}}),
+        "download_count": 42,
+    }
+
+def build_paths(row: Dict[str, Any]):
+    from fastapi.encoders import jsonable_encoder
+    from app.core.raw_json import RawJSON, compose_object
+    from app.models.notebook import NotebookResponse
+
+    def model_path() -> bytes:
+        response = NotebookResponse(
+            id=row["id"],
+            created_at=row["created_at"],
+            share_id=row["share_id"],
+            hf_model_id=row["hf_model_id"],
+            notebook_content=json.loads(row["notebook_content_json"]),  # psycopg's JSONB parse
+            metadata=json.loads(row["metadata_json"]),
+            download_count=row["download_count"],
+        )
+        return json.dumps(jsonable_encoder(response)).encode()
+
+    def raw_path() -> bytes:
+        return compose_object((
+            ("id", row["id"]),
+            ("created_at", row["created_at"]),
+            ("share_id", row["share_id"]),
+            ("hf_model_id", row["hf_model_id"]),
+            ("notebook_content", RawJSON(row["notebook_content_json"])),
+            ("metadata", RawJSON(row["metadata_json"])),
+            ("download_count", row["download_count"]),
+        ))
+
+    return model_path, raw_path
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", default="10,500", help="comma-separated notebook sizes in cells")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="also write JSON results here")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'cells':>6} {'path':<6} {'body KB':>8} {'mean us':>12} {'peak alloc':>12} {'speed-up':>9}")
+    for cells in (int(value) for value in args.cells.split(",")):
+        row = build_row(cells)
+        model_path, raw_path = build_paths(row)
+        if json.loads(model_path()) != json.loads(raw_path()):
+            raise SystemExit(f"model and raw responses differ for {cells} cells")
+
+        model = results[f"model[{cells}_cells]"] = measure(model_path, args.min_time, args.repeat)
+        raw = results[f"raw[{cells}_cells]"] = measure(raw_path, args.min_time, args.repeat)
+        body_kb = len(raw_path()) / 1024
+        for name, result in (("model", model), ("raw", raw)):
+            speedup = model["mean_us"] / result["mean_us"]
+            print(
+                f"{cells:>6} {name:<6} {body_kb:>8.1f} {result['mean_us']:>12,.1f} "
+                f"{result['peak_alloc_bytes']:>12,} {speedup:>8.1f}x"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": run_metadata(), "config": vars(args), "scenarios": results}, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Local stand-in for the Hugging Face Hub.
+
+Serves the two endpoints the backend calls:
+
+  GET /api/models/<model_id>           model metadata JSON
+  GET /<model_id>/raw/main/README.md   model card
+
+Every model id resolves to deterministic metadata and a README, so
+benchmarks need no network access. Latency and failures are injected from a
+seeded RNG so runs stay comparable. Point the backend at it with
+
+    HF_API_URL=http://127.0.0.1:8900/api HF_BASE_URL=http://127.0.0.1:8900
+
+Usage:
+
+    python -m benchmarks.stub_hub --port 8900 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+PIPELINE_TAGS = ("text-generation", "text-classification", "summarization", "fill-mask")
+
+README_TEMPLATE = """---
+license: apache-2.0
+pipeline_tag: {pipeline_tag}
+---
+
+# {model_id}
+
+Stand-in model card used by the offline benchmarks.
+
+## Usage
+
+```python
+from transformers import pipeline
+
+pipe = pipeline("{pipeline_tag}", model="{model_id}")
+print(pipe("Hello world"))
+```
+
+## Training
+
+{padding}
+"""
+
+def model_metadata(model_id: str) -> dict:
+    """Deterministic Hub metadata for any model id"""
+    seed = sum(map(ord, model_id))
+    return {
+        "id": model_id,
+        "modelId": model_id,
+        "pipeline_tag": PIPELINE_TAGS[seed % len(PIPELINE_TAGS)],
+        "downloads": seed * 37,
+        "likes": seed % 500,
+        "tags": ["benchmark", PIPELINE_TAGS[seed % len(PIPELINE_TAGS)]],
+    }
+
+def model_readme(model_id: str, readme_bytes: int) -> str:
+    """Model card padded to roughly `readme_bytes`"""
+    pipeline_tag = model_metadata(model_id)["pipeline_tag"]
+    body = README_TEMPLATE.format(model_id=model_id, pipeline_tag=pipeline_tag, padding="")
+    filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+    padding = filler * max(0, (readme_bytes - len(body)) // len(filler))
+    return README_TEMPLATE.format(model_id=model_id, pipeline_tag=pipeline_tag, padding=padding)
+
+class StubHub:
+    """Threaded stub Hub server with latency and error injection"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, readme_bytes: int = 4096, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.readme_bytes = readme_bytes
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> Tuple[float, bool]:
+        # One RNG under a lock keeps the injected sequence reproducible
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return delay, failed
+
+    def _handler_class(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                delay, failed = hub._draw()
+                time.sleep(delay)
+                if failed:
+                    self._send(500, b'{"error": "injected failure"}', "application/json")
+                    return
+
+                path = self.path.split("?", 1)[0]
+                if path.startswith("/api/models/"):
+                    body = json.dumps(model_metadata(path[len("/api/models/"):])).encode()
+                    self._send(200, body, "application/json")
+                elif path.endswith("/raw/main/README.md"):
+                    model_id = path[1:-len("/raw/main/README.md")]
+                    self._send(200, model_readme(model_id, hub.readme_bytes).encode(), "text/markdown")
+                else:
+                    self._send(404, b'{"error": "not found"}', "application/json")
+
+        return Handler
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self) -> "StubHub":
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-hub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--readme-bytes", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    hub = StubHub(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.readme_bytes, args.seed)
+    print(f"Stub Hub listening on {hub.base_url}")
+    try:
+        hub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Offline end-to-end benchmark suite.
+
+Starts the stub Hub, swaps the database for an in-memory double (or uses
+--database-url, e.g. a throwaway Postgres container), serves the real FastAPI
+app with uvicorn on a local port and drives it over HTTP and WebSockets.
+
+Scenarios:
+  generate        generation requests for distinct models, polled to completion
+  share_read      GET /notebooks/{share_id} over the seeded notebooks
+  download_storm  concurrent downloads of one hot notebook
+  ws_fanout       many WebSocket clients following one generation
+
+Results are JSON (with the commit they were measured on), so runs can be
+compared with `python -m benchmarks.compare base.json head.json`. Usage:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --scenarios share_read,download_storm --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks.common import latency_summary, run_metadata
+from benchmarks.fake_db import FakeNotebookDB
+from benchmarks.stub_hub import StubHub
+
+SCENARIOS = ("generate", "share_read", "download_storm", "ws_fanout")
+API = "/api/v1/notebooks"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def configure_environment(hub: StubHub, job_workers: int, queue_size: int, database_url: Optional[str] = None):
+    """Settings must be in the environment before the app is imported"""
+    os.environ.update({
+        "HF_API_URL": f"{hub.base_url}/api",
+        "HF_BASE_URL": hub.base_url,
+        "PROGRESS_BACKEND": "memory",
+        "TASK_STORE_ENABLED": "false",
+        "TRENDING_ENABLED": "false",
+        "TRACING_EXPORTER": "none",
+        "TRAFFIC_RECORD_PATH": "",
+        "LOG_LEVEL": "WARNING",
+        "JOB_MAX_WORKERS": str(job_workers),
+        "JOB_MAX_QUEUE_SIZE": str(queue_size),
+        "MAX_PREDICTED_WAIT_SECONDS": str(10 ** 6),
+    })
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+
+class ApiServer:
+    """The FastAPI app served by uvicorn from a background thread"""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from app.main import app
+
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="api-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ApiServer":
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+async def _run_concurrently(count: int, concurrency: int, request: Callable[[int], Any]) -> List[Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int):
+        async with semaphore:
+            return await request(index)
+
+    return await asyncio.gather(*(bounded(index) for index in range(count)))
+
+async def _generate_one(client, model_id: str, validation: str, poll_interval: float) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    response = await client.post(f"{API}/generate", json={"hf_model_id": model_id, "validation": validation})
+    submitted_at = time.perf_counter()
+    if response.status_code != 200:
+        return {"outcome": f"http_{response.status_code}", "submit": submitted_at - started_at}
+
+    task_id = response.json()["task_id"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        status = (await client.get(f"{API}/task/{task_id}")).json()
+        if status.get("status") in ("completed", "failed"):
+            return {
+                "outcome": status["status"],
+                "submit": submitted_at - started_at,
+                "total": time.perf_counter() - started_at,
+                "share_id": status.get("share_id"),
+                "task_id": task_id,
+            }
+
+async def scenario_generate(client, args: argparse.Namespace, state: Dict[str, Any]) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    results = await _run_concurrently(
+        args.requests, args.concurrency,
+        lambda i: _generate_one(client, f"bench/model-{args.seed}-{i:05d}", args.validation, args.poll_interval)
+    )
+    elapsed = time.perf_counter() - started_at
+    outcomes = Counter(result["outcome"] for result in results)
+    state["share_ids"].extend(result["share_id"] for result in results if result.get("share_id"))
+    return {
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "completed_per_s": round(outcomes["completed"] / elapsed, 3),
+        "outcomes": dict(outcomes),
+        "submit_latency": latency_summary([result["submit"] for result in results]),
+        "completion_latency": latency_summary([result["total"] for result in results if "total" in result]),
+    }
+
+async def _timed_get(client, path: str) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    try:
+        response = await client.get(path)
+        outcome = str(response.status_code)
+    except Exception as e:
+        outcome = type(e).__name__
+    return {"outcome": outcome, "latency": time.perf_counter() - started_at}
+
+def _read_summary(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    return {
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(results) / elapsed, 3),
+        "outcomes": dict(Counter(result["outcome"] for result in results)),
+        "latency": latency_summary([result["latency"] for result in results]),
+    }
+
+async def _ensure_notebooks(client, args: argparse.Namespace, state: Dict[str, Any]) -> List[str]:
+    if len(state["share_ids"]) < args.seed_notebooks:
+        missing = args.seed_notebooks - len(state["share_ids"])
+        results = await _run_concurrently(
+            missing, args.concurrency,
+            lambda i: _generate_one(client, f"bench/seed-{args.seed}-{i:05d}", "static", args.poll_interval)
+        )
+        state["share_ids"].extend(result["share_id"] for result in results if result.get("share_id"))
+    if not state["share_ids"]:
+        raise RuntimeError("No notebooks could be generated to read")
+    return state["share_ids"]
+
+async def scenario_share_read(client, args: argparse.Namespace, state: Dict[str, Any]) -> Dict[str, Any]:
+    share_ids = await _ensure_notebooks(client, args, state)
+    rng = random.Random(args.seed)
+    paths = [f"{API}/{rng.choice(share_ids)}" for _ in range(args.requests)]
+    started_at = time.perf_counter()
+    results = await _run_concurrently(args.requests, args.concurrency, lambda i: _timed_get(client, paths[i]))
+    return _read_summary(results, time.perf_counter() - started_at)
+
+async def scenario_download_storm(client, args: argparse.Namespace, state: Dict[str, Any]) -> Dict[str, Any]:
+    hot_share_id = (await _ensure_notebooks(client, args, state))[0]
+    started_at = time.perf_counter()
+    results = await _run_concurrently(
+        args.requests, args.storm_concurrency, lambda i: _timed_get(client, f"{API}/{hot_share_id}/download")
+    )
+    return _read_summary(results, time.perf_counter() - started_at)
+
+async def _follow_progress(url: str) -> Dict[str, Any]:
+    import websockets
+
+    started_at = time.perf_counter()
+    messages = 0
+    try:
+        async with websockets.connect(url) as ws:
+            async for raw in ws:
+                messages += 1
+                if json.loads(raw)["data"]["status"] in ("completed", "failed"):
+                    return {"outcome": "final", "latency": time.perf_counter() - started_at, "messages": messages}
+        outcome = "closed_early"
+    except Exception as e:
+        outcome = type(e).__name__
+    return {"outcome": outcome, "latency": time.perf_counter() - started_at, "messages": messages}
+
+async def scenario_ws_fanout(client, args: argparse.Namespace, state: Dict[str, Any], ws_base: str) -> Dict[str, Any]:
+    response = await client.post(
+        f"{API}/generate", json={"hf_model_id": f"bench/fanout-{args.seed}", "validation": args.validation}
+    )
+    response.raise_for_status()
+    url = f"{ws_base}/api/v1/ws/progress/{response.json()['task_id']}"
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(_follow_progress(url) for _ in range(args.ws_clients)))
+    return {
+        "clients": args.ws_clients,
+        "elapsed_s": round(time.perf_counter() - started_at, 3),
+        "outcomes": dict(Counter(result["outcome"] for result in results)),
+        "messages_per_client": round(sum(result["messages"] for result in results) / len(results), 2),
+        "time_to_final": latency_summary([result["latency"] for result in results if result["outcome"] == "final"]),
+    }
+
+async def run_scenarios(args: argparse.Namespace, server: ApiServer) -> Dict[str, Any]:
+    import httpx
+
+    state: Dict[str, Any] = {"share_ids": []}
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.storm_concurrency))
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=120, limits=limits) as client:
+        for name in args.scenarios:
+            if name == "ws_fanout":
+                results[name] = await scenario_ws_fanout(client, args, state, server.base_url.replace("http", "ws", 1))
+            else:
+                results[name] = await globals()[f"scenario_{name}"](client, args, state)
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--storm-concurrency", type=int, default=64)
+    parser.add_argument("--ws-clients", type=int, default=100)
+    parser.add_argument("--seed-notebooks", type=int, default=20, help="notebooks generated before read scenarios")
+    parser.add_argument("--validation", choices=("static", "full"), default="static")
+    parser.add_argument("--job-workers", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--hub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--hub-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--hub-error-rate", type=float, default=0.0)
+    parser.add_argument("--readme-bytes", type=int, default=8192)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="per-query delay of the in-memory double")
+    parser.add_argument("--database-url", help="benchmark against this Postgres instead of the double")
+    parser.add_argument("--port", type=int, default=0, help="API port (default: any free port)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    hub = StubHub(
+        latency_ms=args.hub_latency_ms, jitter_ms=args.hub_jitter_ms, error_rate=args.hub_error_rate,
+        readme_bytes=args.readme_bytes, seed=args.seed
+    ).start()
+    configure_environment(hub, args.job_workers, max(args.requests, 1000), args.database_url)
+    if not args.database_url:
+        FakeNotebookDB(latency_ms=args.db_latency_ms).install()
+
+    server = ApiServer(args.port or _free_port()).start()
+    try:
+        scenarios = asyncio.run(run_scenarios(args, server))
+    finally:
+        server.stop()
+        hub.stop()
+
+    report = {
+        "metadata": run_metadata(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "database_url")},
+        "database": "postgres" if args.database_url else "in_memory",
+        "hub": {"requests": hub.requests, "injected_errors": hub.errors},
+        "scenarios": scenarios,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
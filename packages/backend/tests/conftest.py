@@ -0,0 +1,46 @@
+import os
+
+# Before app settings are imported: no background writers, no Redis
+os.environ.update({
+    "TASK_STORE_ENABLED": "false",
+    "TRENDING_ENABLED": "false",
+    "PROGRESS_BACKEND": "memory",
+    "NOTEBOOK_CACHE_REDIS": "false",
+    "TRACING_EXPORTER": "none",
+})
+
+import pytest
+from tests.fakes import FakeCells, FakeDatabase, FakeNotebooks
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+    """Database double behind the global db and async_db clients"""
+    fake = FakeDatabase()
+    fake.install(monkeypatch)
+    return fake
+
+@pytest.fixture
+def cells(fake_db) -> FakeCells:
+    """notebook_cells table double on fake_db"""
+    table = FakeCells()
+    table.register(fake_db)
+    return table
+
+@pytest.fixture
+def notebooks(monkeypatch) -> FakeNotebooks:
+    """notebooks table double behind the global clients, with empty response caches"""
+    from app.services.cell_store import cell_store
+    from app.services.notebook_cache import download_cache, notebook_cache
+    from app.services.notebook_store import notebook_store
+
+    fake = FakeNotebooks()
+    fake.install(monkeypatch)
+    notebook_cache.clear()
+    download_cache.clear()
+    cell_store.clear()
+    yield fake
+    # Reads recorded by the test must not reach the real database later
+    notebook_store.flush_accesses()
+    notebook_cache.clear()
+    download_cache.clear()
+    cell_store.clear()
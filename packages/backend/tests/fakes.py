@@ -0,0 +1,269 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Rows = List[Dict[str, Any]]
+
+class FakeDatabase:
+    """Stand-in for db and async_db that answers each query with the handler registered for its exact text"""
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[tuple], Rows]] = {}
+        self.calls: List[Tuple[str, tuple]] = []
+
+    def on(self, query: str, handler: Callable[[tuple], Rows]):
+        """Answer `query`, one of the services' query constants, with handler(params)"""
+        self._handlers[query] = handler
+
+    def params_of(self, query: str) -> List[tuple]:
+        """Parameters of every call of `query` so far"""
+        return [params for text, params in self.calls if text == query]
+
+    def _run(self, query: str, params: Optional[Sequence[Any]]) -> Rows:
+        params = tuple(params or ())
+        self.calls.append((query, params))
+        handler = self._handlers.get(query)
+        if handler is None:
+            raise AssertionError(f"Unexpected query: {' '.join(query.split())[:120]}")
+        return handler(params)
+
+    def execute_query(self, query: str, params: Optional[tuple] = None) -> Rows:
+        return self._run(query, params)
+
+    def execute_single_query(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        rows = self._run(query, params)
+        return rows[0] if rows else None
+
+    def execute_many(self, query: str, params_seq: Sequence[tuple]):
+        for params in params_seq:
+            self._run(query, params)
+
+    async def execute_query_async(self, query: str, params: Optional[tuple] = None) -> Rows:
+        return self.execute_query(query, params)
+
+    async def execute_single_query_async(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        return self.execute_single_query(query, params)
+
+    def install(self, monkeypatch):
+        """Route the global database clients to this double for one test"""
+        from app.core.database import async_db, db
+
+        monkeypatch.setattr(db, "execute_query", self.execute_query)
+        monkeypatch.setattr(db, "execute_single_query", self.execute_single_query)
+        monkeypatch.setattr(db, "execute_many", self.execute_many)
+        monkeypatch.setattr(async_db, "execute_query", self.execute_query_async)
+        monkeypatch.setattr(async_db, "execute_single_query", self.execute_single_query_async)
+
+class FakeRedis:
+    """The few Redis string commands the services use, with expiry ignored"""
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.expiry: Dict[str, int] = {}
+
+    def set(self, key: str, value: Any, nx: bool = False, ex: Optional[int] = None) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        if ex is not None:
+            self.expiry[key] = ex
+        return True
+
+    def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    def mget(self, keys: Sequence[str]) -> List[Any]:
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self) -> "FakeRedisPipeline":
+        return FakeRedisPipeline(self)
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def eval(self, script: str, numkeys: int, *args: Any) -> int:
+        # Only the compare-and-delete scripts
+        key, expected = args[0], args[numkeys]
+        if "redis.call('del'" not in script:
+            raise NotImplementedError(script)
+        return self.delete(key) if self.values.get(key) == expected else 0
+
+class FakeRedisPipeline:
+    """Buffers commands and runs them on execute()"""
+
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._commands: List[Callable[[], Any]] = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self._redis, name)
+        return lambda *args, **kwargs: self._commands.append(lambda: command(*args, **kwargs))
+
+    def execute(self) -> List[Any]:
+        return [command() for command in self._commands]
+
+class FakeCells:
+    """notebook_cells rows behind the CellStore queries"""
+
+    def __init__(self):
+        self.rows: Dict[str, str] = {}
+
+    def register(self, fake: FakeDatabase):
+        from app.services.cell_store import CellStore
+
+        fake.on(CellStore.INSERT_QUERY, self._insert)
+        fake.on(CellStore.SELECT_QUERY, self._select)
+
+    def _insert(self, params: tuple) -> Rows:
+        hashes, cells = params
+        for cell_hash, cell_json in zip(hashes, cells):
+            self.rows.setdefault(cell_hash, cell_json)
+        return []
+
+    def _select(self, params: tuple) -> Rows:
+        return [{"cell_hash": h, "cell_json": self.rows[h]} for h in params[0] if h in self.rows]
+
+class FakeNotebooks(FakeDatabase):
+    """notebooks rows behind the NotebookStore queries, keyed by share_id"""
+
+    def __init__(self):
+        super().__init__()
+        from app.services.notebook_store import NotebookStore
+
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.cells = FakeCells()
+        self.cells.register(self)
+        self.on(NotebookStore.VERSION_QUERY, self._select)
+        self.on(NotebookStore.PAGE_QUERY, self._page)
+        self.on(NotebookStore.DOWNLOAD_QUERY, self._select)
+        self.on(NotebookStore.CONTENT_QUERY, self._select)
+        self.on(NotebookStore.COUNT_QUERY, self._count)
+        self.on(NotebookStore.COUNT_IF_UNCHANGED_QUERY, self._count_if_unchanged)
+        self.on(NotebookStore.SUMMARY_QUERY, self._select)
+        self.on(NotebookStore.OUTLINE_QUERY, self._outline)
+        self.on(NotebookStore.CELLS_QUERY, self._cells)
+        self.on(NotebookStore.ACCESS_QUERY, self._access)
+        self.on(NotebookStore.ARCHIVE_CANDIDATES_QUERY, self._archive_candidates)
+        self.on(NotebookStore.ARCHIVE_SOURCE_QUERY, self._archive_source)
+        self.on(NotebookStore.ARCHIVE_QUERY, self._archive)
+        self.on(NotebookStore.RESTORE_QUERY, self._restore)
+        # Every filter list_summaries can build
+        for where in ("", "WHERE hf_model_id = %s", "WHERE (created_at, id) < (%s, %s)",
+                      "WHERE hf_model_id = %s AND (created_at, id) < (%s, %s)"):
+            self.on(NotebookStore.LIST_QUERY.format(where=where), self._list)
+
+    def add(self, share_id: str, notebook_content: Dict[str, Any], content_hash: Optional[str],
+            hf_model_id: str = "org/model", **columns: Any) -> Dict[str, Any]:
+        """Insert a row that keeps its cells inline, as rows written before content addressing"""
+        from app.services.notebook_store import NotebookStore
+
+        row = {
+            "id": uuid.uuid4(), "created_at": datetime.now(timezone.utc), "share_id": share_id,
+            "hf_model_id": hf_model_id, "notebook_content": notebook_content, "metadata": {},
+            "download_count": 0, "content_hash": content_hash,
+            "cell_count": len(notebook_content.get("cells", [])), "cell_hashes": None, "archive_key": None,
+            "archived_at": None, "outline": NotebookStore.outline(notebook_content), "last_accessed_at": datetime.now(timezone.utc),
+            **columns,
+        }
+        self.rows[share_id] = row
+        return row
+
+    def add_addressed(self, share_id: str, notebook_content: Dict[str, Any], content_hash: Optional[str],
+                      **columns: Any) -> Dict[str, Any]:
+        """Insert a row whose cells are stored in notebook_cells, as NotebookStore.insert does"""
+        from app.services.cell_store import cell_store
+
+        cells = notebook_content.get("cells", [])
+        skeleton = {key: value for key, value in notebook_content.items() if key != "cells"}
+        row = self.add(share_id, notebook_content, content_hash, **columns)
+        row.update(notebook_content=skeleton, cell_hashes=cell_store.put(cells), cell_count=len(cells))
+        return row
+
+    def _select(self, params: tuple) -> Rows:
+        row = self.rows.get(params[-1])
+        return [dict(row)] if row else []
+
+    def _page(self, params: tuple) -> Rows:
+        return [
+            {**row, "notebook_content_json": json.dumps(row["notebook_content"]), "metadata_json": json.dumps(row["metadata"])}
+            for row in self._select(params)
+        ]
+
+    def _outline(self, params: tuple) -> Rows:
+        return [{**row, "outline_json": json.dumps(row["outline"])} for row in self._select(params)]
+
+    def _cells(self, params: tuple) -> Rows:
+        # 1-based array bounds for cell_hashes, 0-based for inline cells
+        first, last, start, end, _ = params
+        rows = []
+        for row in self._select(params):
+            if row["cell_hashes"] is not None:
+                rows.append({**row, "cell_hashes": row["cell_hashes"][first - 1:last], "cells_json": None})
+            else:
+                cells = row["notebook_content"].get("cells", [])[start:end]
+                rows.append({**row, "cell_hashes": None, "cells_json": json.dumps(cells)})
+        return rows
+
+    def _list(self, params: tuple) -> Rows:
+        *filters, limit = params
+        rows = sorted(self.rows.values(), key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        if len(filters) % 2:
+            hf_model_id, *filters = filters
+            rows = [row for row in rows if row["hf_model_id"] == hf_model_id]
+        if filters:
+            rows = [row for row in rows if (row["created_at"], row["id"]) < tuple(filters)]
+        return [dict(row) for row in rows[:limit]]
+
+    def _access(self, params: tuple) -> Rows:
+        accessed_at, share_ids, stale_before = params
+        updated = 0
+        for share_id in share_ids:
+            row = self.rows.get(share_id)
+            if row and row["last_accessed_at"] < stale_before:
+                row["last_accessed_at"] = accessed_at
+                updated += 1
+        return [{"affected_rows": updated}]
+
+    def _archive_candidates(self, params: tuple) -> Rows:
+        cutoff, limit = params
+        rows = [row for row in self.rows.values() if row["archived_at"] is None and row["last_accessed_at"] < cutoff]
+        rows.sort(key=lambda row: row["last_accessed_at"])
+        return [{"share_id": row["share_id"]} for row in rows[:limit]]
+
+    def _archive_source(self, params: tuple) -> Rows:
+        return [
+            {"notebook_content": row["notebook_content"], "cell_hashes": row["cell_hashes"]}
+            for row in self._select(params) if row["archived_at"] is None
+        ]
+
+    def _archive(self, params: tuple) -> Rows:
+        key, share_id = params
+        row = self.rows.get(share_id)
+        if not row or row["archived_at"] is not None:
+            return [{"affected_rows": 0}]
+        row.update(notebook_content={}, cell_hashes=None, archive_key=key, archived_at=datetime.now(timezone.utc))
+        return [{"affected_rows": 1}]
+
+    def _restore(self, params: tuple) -> Rows:
+        notebook_json, cell_hashes, share_id, archive_key = params
+        row = self.rows.get(share_id)
+        if not row or row["archive_key"] != archive_key:
+            return [{"affected_rows": 0}]
+        row.update(notebook_content=json.loads(notebook_json), cell_hashes=cell_hashes, archive_key=None,
+                   archived_at=None, last_accessed_at=datetime.now(timezone.utc))
+        return [{"affected_rows": 1}]
+
+    def _count(self, params: tuple) -> Rows:
+        row = self.rows.get(params[0])
+        if row:
+            row["download_count"] += 1
+        return [{"affected_rows": 1 if row else 0}]
+
+    def _count_if_unchanged(self, params: tuple) -> Rows:
+        share_id, content_hashes = params
+        row = self.rows.get(share_id)
+        if not row or row["content_hash"] not in content_hashes:
+            return []
+        row["download_count"] += 1
+        return [{"content_hash": row["content_hash"]}]
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import pytest
+from app.services.cell_store import CellStore
+
+MARKDOWN = {"cell_type": "markdown", "metadata": {}, "source": "# Title"}
+CODE = {"cell_type": "code", "metadata": {}, "source": "print(1)", "outputs": [], "execution_count": None}
+
+def test_hash_ignores_key_order_but_not_content():
+    reordered = {"source": "# Title", "metadata": {}, "cell_type": "markdown"}
+
+    assert CellStore.cell_hash(MARKDOWN) == CellStore.cell_hash(reordered)
+    assert CellStore.cell_hash(MARKDOWN) != CellStore.cell_hash({**MARKDOWN, "source": "# Other"})
+    assert len(CellStore.cell_hash(MARKDOWN)) == 64
+
+def test_put_stores_each_distinct_cell_once(cells, fake_db):
+    store = CellStore(max_bytes=1 << 20)
+    hashes = store.put([MARKDOWN, CODE, MARKDOWN])
+
+    assert hashes == [CellStore.cell_hash(MARKDOWN), CellStore.cell_hash(CODE), CellStore.cell_hash(MARKDOWN)]
+    assert [len(params[0]) for params in fake_db.params_of(CellStore.INSERT_QUERY)] == [2]
+    assert set(cells.rows) == set(hashes)
+
+def test_put_skips_cells_it_already_inserted(cells, fake_db):
+    store = CellStore(max_bytes=1 << 20)
+    store.put([MARKDOWN, CODE])
+    store.put([CODE, MARKDOWN])
+    asyncio.run(store.put_async([MARKDOWN]))
+
+    assert len(fake_db.params_of(CellStore.INSERT_QUERY)) == 1
+    assert store.load(store.put([MARKDOWN, CODE])) == [MARKDOWN, CODE]
+    assert fake_db.params_of(CellStore.SELECT_QUERY) == []
+
+def test_failed_insert_is_not_remembered(cells, fake_db):
+    store = CellStore(max_bytes=1 << 20)
+    fake_db.on(CellStore.INSERT_QUERY, lambda params: (_ for _ in ()).throw(RuntimeError("down")))
+    with pytest.raises(RuntimeError):
+        store.put([MARKDOWN])
+
+    cells.register(fake_db)
+    store.put([MARKDOWN])
+    assert CellStore.cell_hash(MARKDOWN) in cells.rows
+
+def test_assemble_keeps_order_and_repeats(cells):
+    writer = CellStore(max_bytes=1 << 20)
+    hashes = writer.put([CODE, MARKDOWN, CODE])
+    reader = CellStore(max_bytes=1 << 20)
+
+    assert json.loads(reader.assemble(hashes)) == [CODE, MARKDOWN, CODE]
+
+def test_missing_cell_raises_lookup_error(cells):
+    store = CellStore(max_bytes=1 << 20)
+    with pytest.raises(LookupError, match="missing from notebook_cells"):
+        store.assemble([CellStore.cell_hash(CODE)])
+
+def test_cache_evicts_least_recently_used_cells(cells, fake_db):
+    store = CellStore(max_bytes=len(json.dumps(CODE)) + 64)
+    markdown_hash, code_hash = store.put([MARKDOWN, CODE])
+
+    # Only the last inserted cell fits, so reading the first goes to notebook_cells
+    store.get_many([code_hash])
+    assert fake_db.params_of(CellStore.SELECT_QUERY) == []
+    store.get_many([markdown_hash])
+    assert fake_db.params_of(CellStore.SELECT_QUERY) == [([markdown_hash],)]
+    assert store._size <= store.max_bytes
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.http_cache import (
+    IDENTITY, etag_matches, format_etag, if_none_match_values, negotiate_encoding, versions_for_encoding
+)
+from app.main import app
+from app.services.notebook_cache import notebook_cache
+
+NOTEBOOK = {"cells": [{"cell_type": "code", "source": "print(1)"}], "metadata": {}, "nbformat": 4}
+PLAIN = {"Accept-Encoding": IDENTITY}
+
+def test_if_none_match_values_strips_quotes_and_weak_prefixes():
+    assert if_none_match_values('"a", W/"b" ,"c-gzip"') == ["a", "b", "c-gzip"]
+    assert if_none_match_values(None) == []
+    assert if_none_match_values("") == []
+
+def test_etag_matches():
+    assert etag_matches('"x", "abc"', format_etag("abc"))
+    assert etag_matches('W/"abc-gzip"', format_etag("abc", "gzip"))
+    assert etag_matches("*", format_etag("abc"))
+    assert not etag_matches('"abc"', format_etag("abc", "gzip"))
+    assert not etag_matches(None, format_etag("abc"))
+
+def test_versions_for_encoding_keeps_only_tags_of_that_coding():
+    header = '"h1", "h2-gzip", "h3-br"'
+    assert versions_for_encoding(header, IDENTITY) == ["h1"]
+    assert versions_for_encoding(header, "gzip") == ["h2"]
+    assert versions_for_encoding(header, "br") == ["h3"]
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) == IDENTITY
+    assert negotiate_encoding("gzip;q=0.5, deflate", offered=["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0", offered=["gzip"]) == IDENTITY
+    assert negotiate_encoding("*", offered=["br", "gzip"]) == "br"
+
+@pytest.fixture
+def client(notebooks) -> TestClient:
+    notebooks.add("abc", NOTEBOOK, content_hash="h1")
+    return TestClient(app)
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_share_page_revalidates_with_304(client, notebooks, cached):
+    first = client.get("/api/v1/notebooks/abc", headers=PLAIN)
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"h1-0"'
+    if not cached:
+        notebook_cache.clear()
+
+    calls = len(notebooks.calls)
+    second = client.get("/api/v1/notebooks/abc", headers={"If-None-Match": first.headers["ETag"], **PLAIN})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.content == b""
+    # A revalidation without a cached page only reads the version
+    assert len(notebooks.calls) - calls == (0 if cached else 1)
+
+@pytest.mark.parametrize("download_headers", [PLAIN, {"If-None-Match": '"h1"', **PLAIN}])
+def test_download_changes_the_share_page_version(client, download_headers):
+    first = client.get("/api/v1/notebooks/abc", headers=PLAIN)
+    client.get("/api/v1/notebooks/abc/download", headers=download_headers)
+
+    second = client.get("/api/v1/notebooks/abc", headers={"If-None-Match": first.headers["ETag"], **PLAIN})
+    assert second.status_code == 200
+    assert second.headers["ETag"] == '"h1-1"'
+    assert second.json()["download_count"] == 1
+
+def test_download_304_is_counted(client, notebooks):
+    first = client.get("/api/v1/notebooks/abc/download", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"h1-gzip"'
+    assert first.json() == NOTEBOOK
+
+    second = client.get(
+        "/api/v1/notebooks/abc/download", headers={"If-None-Match": first.headers["ETag"], "Accept-Encoding": "gzip"}
+    )
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert notebooks.rows["abc"]["download_count"] == 2
+
+def test_download_tag_of_another_coding_gets_the_body(client):
+    response = client.get("/api/v1/notebooks/abc/download", headers={"If-None-Match": '"h1-gzip"', **PLAIN})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"h1"'
+    assert response.json() == NOTEBOOK
+
+def test_missing_notebook_is_404(client):
+    assert client.get("/api/v1/notebooks/nope", headers={"If-None-Match": '"h1-0"'}).status_code == 404
+    assert client.get("/api/v1/notebooks/nope/download").status_code == 404
@@ -0,0 +1,28 @@
+import asyncio
+from app.services.huggingface import HuggingFaceService
+
+def test_client_is_reused_on_the_same_loop():
+    service = HuggingFaceService()
+
+    async def scenario():
+        first = await service._get_client()
+        second = await service._get_client()
+        await service.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert first.is_closed
+
+def test_client_of_a_previous_loop_is_closed():
+    service = HuggingFaceService()
+    first = asyncio.run(service._get_client())
+
+    async def scenario():
+        second = await service._get_client()
+        await service.aclose()
+        return second
+
+    second = asyncio.run(scenario())
+    assert second is not first
+    assert first.is_closed
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app import main
+from app.api.v1.endpoints import notebooks
+from app.main import app
+from app.models.notebook import NotebookGenerationResponse
+from app.services.progress_tracker import ProgressTracker
+
+@pytest.fixture
+def tracker(monkeypatch) -> ProgressTracker:
+    fresh = ProgressTracker(backend="memory")
+    monkeypatch.setattr(notebooks, "progress_tracker", fresh)
+    return fresh
+
+@pytest.fixture
+def started(monkeypatch, tracker):
+    """Task ids of the generations actually started"""
+    task_ids = []
+
+    def start(task_id, hf_model_id, validation, profile=False):
+        task_ids.append(task_id)
+        return NotebookGenerationResponse(task_id=task_id, estimated_time=30)
+
+    monkeypatch.setattr(notebooks, "_start_generation", start)
+    return task_ids
+
+def generate(client, key, hf_model_id="org/model", validation="full"):
+    return client.post(
+        "/api/v1/notebooks/generate",
+        json={"hf_model_id": hf_model_id, "validation": validation},
+        headers={"Idempotency-Key": key},
+    )
+
+def test_retry_replays_the_original_task(started):
+    client = TestClient(app)
+    first = generate(client, "key-1")
+    second = generate(client, "key-1")
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["task_id"] == first.json()["task_id"]
+    assert started == [first.json()["task_id"]]
+
+def test_other_keys_start_their_own_generation(started):
+    client = TestClient(app)
+    generate(client, "key-1")
+    generate(client, "key-2")
+
+    assert len(set(started)) == 2
+
+@pytest.mark.parametrize("hf_model_id, validation", [("org/other", "full"), ("org/model", "static")])
+def test_key_reused_for_a_different_request_is_rejected(started, hf_model_id, validation):
+    client = TestClient(app)
+    generate(client, "key-1")
+    response = generate(client, "key-1", hf_model_id, validation)
+
+    assert response.status_code == 422
+    assert "Idempotency-Key" in response.json()["detail"]
+    assert len(started) == 1
+
+def test_replay_after_completion_returns_the_result(started, tracker):
+    client = TestClient(app)
+    task_id = generate(client, "key-1").json()["task_id"]
+    tracker.update_progress(task_id, {"status": "completed", "progress": 100, "share_id": "abc"})
+
+    replay = generate(client, "key-1").json()
+    assert (replay["task_id"], replay["status"], replay["share_id"]) == (task_id, "completed", "abc")
+    # The result is kept with the key, so it outlives the progress entry
+    tracker._delete(f"progress:{task_id}")
+    assert generate(client, "key-1").json()["share_id"] == "abc"
+
+def test_rejected_submission_releases_the_key(monkeypatch, tracker):
+    client = TestClient(app)
+    calls = []
+
+    def overloaded(task_id, hf_model_id, validation, profile=False):
+        calls.append(task_id)
+        if len(calls) == 1:
+            raise HTTPException(status_code=429, detail="overloaded", headers={"Retry-After": "5"})
+        return NotebookGenerationResponse(task_id=task_id, estimated_time=30)
+
+    monkeypatch.setattr(notebooks, "_start_generation", overloaded)
+
+    assert generate(client, "key-1").status_code == 429
+    retry = generate(client, "key-1")
+    assert retry.status_code == 200
+    assert retry.json()["task_id"] == calls[1]
+
+def test_memory_backend_is_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(main.settings, "PROGRESS_BACKEND", "memory")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(RuntimeError, match="PROGRESS_BACKEND=redis"):
+        asyncio.run(main.check_progress_backend())
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    asyncio.run(main.check_progress_backend())
@@ -0,0 +1,91 @@
+import time
+import pytest
+from app.services import job_dedup
+from app.services.job_dedup import JobDeduplicator
+from tests.fakes import FakeRedis
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(job_dedup, "get_redis", lambda: fake)
+    return fake
+
+def test_key_separates_validation_modes_and_generator_versions():
+    keys = {
+        JobDeduplicator.make_key("org/model", "full", "v1"),
+        JobDeduplicator.make_key("org/model", "static", "v1"),
+        JobDeduplicator.make_key("org/model", "full", "v2"),
+        JobDeduplicator.make_key("org/other", "full", "v1"),
+    }
+    assert len(keys) == 4
+
+def test_second_claim_gets_the_running_job():
+    dedup = JobDeduplicator()
+
+    assert dedup.claim("k", "t1").task_id == "t1"
+    assert dedup.claim("k", "t2").task_id == "t1"
+    assert dedup.get("k").task_id == "t1"
+
+def test_only_the_owner_releases_a_claim():
+    dedup = JobDeduplicator()
+    dedup.claim("k", "t1")
+
+    dedup.release("k", "t2")
+    assert dedup.get("k").task_id == "t1"
+    dedup.release("k", "t1")
+    assert dedup.get("k") is None
+    assert dedup.claim("k", "t3").task_id == "t3"
+
+def test_remaining_time_is_at_least_one_second():
+    dedup = JobDeduplicator()
+    job = dedup.claim("k", "t1")
+
+    assert dedup.remaining_time(job) == 1
+    job.expected_done_at = time.monotonic() + 30.5
+    assert dedup.remaining_time(job) == 30
+
+def test_distributed_claim_returns_the_owner(redis):
+    dedup = JobDeduplicator()
+
+    assert dedup.claim_distributed("k", "t1", ttl=60) == "t1"
+    assert dedup.claim_distributed("k", "t2", ttl=60) == "t1"
+    # The owner finds its own claim, e.g. a task claimed before it was enqueued
+    assert dedup.claim_distributed("k", "t1", ttl=60) == "t1"
+    assert redis.expiry["dedup:k"] == 60
+
+def test_distributed_release_is_compare_and_delete(redis):
+    dedup = JobDeduplicator()
+    dedup.claim_distributed("k", "t1", ttl=60)
+
+    dedup.release_distributed("k", "t2")
+    assert redis.get("dedup:k") == "t1"
+    dedup.release_distributed("k", "t1")
+    assert redis.get("dedup:k") is None
+    assert dedup.claim_distributed("k", "t3", ttl=60) == "t3"
+
+def test_duplicate_generation_is_not_enqueued(redis, monkeypatch):
+    from app.tasks import notebook_tasks
+
+    sent = []
+    monkeypatch.setattr(
+        notebook_tasks.generate_notebook_task, "apply_async", lambda args, task_id: sent.append((args, task_id))
+    )
+
+    primary = notebook_tasks.enqueue_generation("org/model", "static")
+    duplicate = notebook_tasks.enqueue_generation("org/model", "static")
+
+    assert duplicate == primary
+    assert sent == [(("org/model", "static", False), primary)]
+
+def test_duplicate_task_is_linked_not_successful(redis, monkeypatch):
+    from app.tasks import notebook_tasks
+
+    task = notebook_tasks.generate_notebook_task
+    states = []
+    monkeypatch.setattr(task, "update_state", lambda state, meta: states.append((state, meta)))
+    redis.set(f"dedup:{JobDeduplicator.make_key('org/model', 'full')}", "primary")
+
+    result = task.apply(("org/model", "full"), task_id="duplicate")
+
+    assert result.state != "SUCCESS"
+    assert states == [(notebook_tasks.LINKED_STATE, {"task_id": "duplicate", "linked_task_id": "primary"})]
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from app.services.job_scheduler import JobScheduler, QueueFullError
+
+def test_wait_is_zero_while_workers_are_free():
+    scheduler = JobScheduler(max_workers=3, max_queue_size=10, default_duration=20)
+
+    assert scheduler.estimate_wait(0) == 0.0
+    assert scheduler.estimate_wait(2) == 0.0
+
+def test_wait_counts_waves_of_the_default_duration():
+    scheduler = JobScheduler(max_workers=2, max_queue_size=10, default_duration=20)
+
+    assert scheduler.estimate_wait(2) == 20
+    assert scheduler.estimate_wait(3) == 20
+    assert scheduler.estimate_wait(4) == 40
+
+def test_average_duration_uses_observed_run_times():
+    scheduler = JobScheduler(max_workers=1, max_queue_size=10, default_duration=20)
+    scheduler._run_times.extend([2.0, 4.0])
+
+    assert scheduler.average_duration() == 3.0
+    assert scheduler.estimate_wait(1) == 3.0
+
+def test_runs_at_most_max_workers_jobs_at_once():
+    async def scenario():
+        scheduler = JobScheduler(max_workers=2, max_queue_size=10, default_duration=1)
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        positions = [scheduler.submit(f"job-{i}", job) for i in range(6)]
+        await scheduler._queue.join()
+        await scheduler.shutdown()
+        return positions, peak, scheduler.get_stats()
+
+    positions, peak, stats = asyncio.run(scenario())
+    assert positions == [0, 1, 2, 3, 4, 5]
+    assert peak == 2
+    assert stats["completed"] == 6
+    assert stats["queue_depth"] == 0
+
+def test_failed_jobs_are_counted_and_do_not_stop_the_worker():
+    async def scenario():
+        scheduler = JobScheduler(max_workers=1, max_queue_size=10, default_duration=1)
+        done = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def succeed():
+            done.append(True)
+
+        scheduler.submit("bad", fail)
+        scheduler.submit("good", succeed)
+        await scheduler._queue.join()
+        await scheduler.shutdown()
+        return done, scheduler.get_stats()
+
+    done, stats = asyncio.run(scenario())
+    assert done == [True]
+    assert (stats["failed"], stats["completed"]) == (1, 1)
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        scheduler = JobScheduler(max_workers=1, max_queue_size=2, default_duration=30)
+        blocker = asyncio.Event()
+
+        async def job():
+            await blocker.wait()
+
+        # The first job is taken by the worker, two more fill the queue
+        scheduler.submit("running", job)
+        await asyncio.sleep(0)
+        scheduler.submit("queued-1", job)
+        scheduler.submit("queued-2", job)
+        with pytest.raises(QueueFullError) as excinfo:
+            scheduler.submit("rejected", job)
+        blocker.set()
+        await scheduler._queue.join()
+        await scheduler.shutdown()
+        return excinfo.value, scheduler.get_stats()
+
+    error, stats = asyncio.run(scenario())
+    # The running job and both queued ones finish first
+    assert error.retry_after == 90
+    assert stats["rejected"] == 1
@@ -0,0 +1,103 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import notebook_store as notebook_store_module
+from app.services.cold_storage import ColdStorage, LocalDirectoryBackend
+from app.services.notebook_store import notebook_store
+
+SHARED = {"cell_type": "markdown", "metadata": {}, "source": "# Shared setup cell"}
+NOTEBOOK = {
+    "cells": [SHARED] + [{"cell_type": "code", "metadata": {}, "source": f"train(step={i})"} for i in range(5)],
+    "metadata": {"kernelspec": {"name": "python3"}},
+    "nbformat": 4,
+}
+
+def days_ago(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+@pytest.fixture
+def cold(tmp_path, monkeypatch) -> ColdStorage:
+    storage = ColdStorage(LocalDirectoryBackend(str(tmp_path)), dictionary_bytes=4096)
+    monkeypatch.setattr(notebook_store_module, "cold_storage", storage)
+    return storage
+
+def hot_bytes(notebooks) -> int:
+    """Bytes of notebook content held in the notebooks and notebook_cells tables"""
+    rows = sum(
+        len(json.dumps(row["notebook_content"])) + len(json.dumps(row["cell_hashes"]))
+        for row in notebooks.rows.values()
+    )
+    return rows + sum(len(cell) for cell in notebooks.cells.rows.values())
+
+def test_archive_lowers_hot_table_bytes(notebooks, cold):
+    notebooks.add_addressed("idle", NOTEBOOK, "h1", last_accessed_at=days_ago(40))
+    notebooks.add("legacy", NOTEBOOK, "h2", last_accessed_at=days_ago(50))
+    notebooks.add_addressed("recent", NOTEBOOK, "h3")
+    before = hot_bytes(notebooks)
+
+    assert notebook_store.archive_idle(idle_days=30, limit=10) == 2
+    assert hot_bytes(notebooks) < before
+    assert notebooks.rows["recent"]["archive_key"] is None
+    # Cells are left for the notebooks that still reference them
+    assert len(notebooks.cells.rows) == len(NOTEBOOK["cells"])
+
+def test_archive_holds_only_the_cleared_row_content(notebooks, cold):
+    row = notebooks.add_addressed("idle", NOTEBOOK, "h1", last_accessed_at=days_ago(40))
+    cell_hashes = row["cell_hashes"]
+    notebook_store.archive_idle(idle_days=30, limit=10)
+
+    archived = json.loads(cold.get(notebooks.rows["idle"]["archive_key"]))
+    assert archived == {"notebook_content": {"metadata": NOTEBOOK["metadata"], "nbformat": 4},
+                        "cell_hashes": cell_hashes}
+
+def test_read_restores_an_archived_notebook(notebooks, cold):
+    notebooks.add_addressed("idle", NOTEBOOK, "h1", last_accessed_at=days_ago(40))
+    notebooks.add("legacy", NOTEBOOK, "h2", last_accessed_at=days_ago(40))
+    notebook_store.archive_idle(idle_days=30, limit=10)
+    keys = {share_id: row["archive_key"] for share_id, row in notebooks.rows.items()}
+
+    for share_id in ("idle", "legacy"):
+        assert notebook_store.get_content(share_id) == NOTEBOOK
+        assert notebooks.rows[share_id]["archive_key"] is None
+        with pytest.raises(LookupError):
+            cold.get(keys[share_id])
+    assert notebooks.rows["legacy"]["cell_hashes"] is None
+
+def test_archives_of_whole_notebooks_are_restored_into_cells(notebooks, cold):
+    notebooks.add("old", {}, "h1", cell_hashes=None, archive_key=cold.put("old", json.dumps(NOTEBOOK).encode()),
+                  archived_at=days_ago(1))
+
+    assert notebook_store.get_content("old") == NOTEBOOK
+    assert notebooks.rows["old"]["cell_hashes"] is not None
+    assert len(notebooks.cells.rows) == len(NOTEBOOK["cells"])
+
+def test_cell_reads_keep_notebooks_hot(notebooks):
+    notebooks.add("abc", NOTEBOOK, "h1", last_accessed_at=days_ago(40))
+
+    assert TestClient(app).get("/api/v1/notebooks/abc/cells?start=0&limit=2").status_code == 200
+    notebook_store.flush_accesses()
+
+    assert notebooks.rows["abc"]["last_accessed_at"] > days_ago(1)
+
+def test_cold_storage_round_trip(cold):
+    payload = json.dumps(NOTEBOOK).encode()
+    key = cold.put("abc", payload)
+
+    assert cold.get(key) == payload
+    cold.delete(key)
+    with pytest.raises(LookupError, match="missing from cold storage"):
+        cold.get(key)
+
+def test_cold_storage_round_trip_with_a_trained_dictionary(tmp_path):
+    pytest.importorskip("zstandard")
+    storage = ColdStorage(LocalDirectoryBackend(str(tmp_path)), dictionary_bytes=4096)
+    samples = [json.dumps({**NOTEBOOK, "metadata": {"seed": i}}).encode() for i in range(100)]
+    dict_id = storage.ensure_dictionary(samples)
+    key = storage.put("abc", samples[0])
+
+    assert key == f"notebooks/abc.{dict_id or 0}.zst"
+    # A new process loads the dictionary from the backend
+    reader = ColdStorage(LocalDirectoryBackend(str(tmp_path)), dictionary_bytes=4096)
+    assert reader.get(key) == samples[0]
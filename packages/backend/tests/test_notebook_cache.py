@@ -0,0 +1,69 @@
+import time
+from app.core.http_cache import compress
+from app.services.notebook_cache import ENTRY_OVERHEAD_BYTES, NotebookResponseCache
+
+BODY = b"x" * 100
+ENTRY_BYTES = len(BODY) + len("v1") + ENTRY_OVERHEAD_BYTES
+
+def make_cache(entries: int, ttl: int = 60) -> NotebookResponseCache:
+    return NotebookResponseCache(name="test", max_bytes=entries * ENTRY_BYTES, ttl=ttl, redis_enabled=False)
+
+def test_evicts_least_recently_used_past_max_bytes():
+    cache = make_cache(entries=4)
+    for share_id in ("a", "b", "c", "d"):
+        cache.put(share_id, BODY, "v1")
+    cache.get("a")
+    cache.put("e", BODY, "v1")
+
+    assert cache.get("b") is None
+    assert all(cache.get(share_id) is not None for share_id in ("a", "c", "d", "e"))
+    assert cache._size == 4 * ENTRY_BYTES
+
+def test_replacing_an_entry_does_not_leak_its_size():
+    cache = make_cache(entries=4)
+    for _ in range(10):
+        cache.put("a", BODY, "v1")
+
+    assert cache._size == ENTRY_BYTES
+
+def test_entry_larger_than_a_quarter_is_not_cached():
+    cache = make_cache(entries=4)
+    cache.put("a", BODY, "v1")
+    entry = cache.put("huge", b"x" * (2 * ENTRY_BYTES), "v1")
+
+    assert entry.body == b"x" * (2 * ENTRY_BYTES)
+    assert cache.get("huge") is None
+    assert cache.get("a") is not None
+
+def test_compressed_variants_count_towards_max_bytes():
+    cache = make_cache(entries=4)
+    entries = {share_id: cache.put(share_id, BODY, "v1") for share_id in ("a", "b", "c", "d")}
+
+    assert cache.encoded("d", entries["d"], "gzip") == compress(BODY, "gzip")
+    assert cache._size == 4 * ENTRY_BYTES + len(compress(BODY, "gzip")) - ENTRY_BYTES
+    assert cache.get("a") is None
+    # The variant is made once and reused
+    assert cache.encoded("d", entries["d"], "gzip") is entries["d"].variants["gzip"]
+
+def test_expired_entries_are_dropped():
+    cache = make_cache(entries=4, ttl=0)
+    cache.put("a", BODY, "v1")
+    time.sleep(0.01)
+
+    assert cache.get("a") is None
+    assert cache._size == 0
+
+def test_invalidate_frees_the_entry():
+    cache = make_cache(entries=4)
+    cache.put("a", BODY, "v1")
+    cache.invalidate("a")
+
+    assert cache.get("a") is None
+    assert cache._size == 0
+
+def test_zero_max_bytes_disables_the_cache():
+    cache = NotebookResponseCache(name="test", max_bytes=0, ttl=60, redis_enabled=False)
+    entry = cache.put("a", BODY, "v1")
+
+    assert entry.body == BODY
+    assert cache.get("a") is None
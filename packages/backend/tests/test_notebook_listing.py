@@ -0,0 +1,66 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.notebook_store import notebook_store
+
+def test_cursor_round_trip():
+    row = {"created_at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), "id": uuid.uuid4()}
+    cursor = notebook_store.encode_cursor(row)
+
+    assert "=" not in cursor
+    assert notebook_store.decode_cursor(cursor) == (row["created_at"], row["id"])
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm9waXBl", "MjAyNC0wNS0wMXxub3QtYS11dWlk"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        notebook_store.decode_cursor(cursor)
+
+@pytest.fixture
+def seeded(notebooks):
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    for i in range(7):
+        # Two notebooks per timestamp, so ties are broken by id
+        notebooks.add(f"s{i}", {"cells": []}, None, hf_model_id="org/a" if i % 2 else "org/b",
+                      created_at=start + timedelta(minutes=i // 2))
+    return notebooks
+
+def test_listing_pages_through_every_notebook_once(seeded):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = notebook_store.list_summaries(3, cursor=cursor)
+        seen.extend(row["share_id"] for row in rows)
+        if cursor is None:
+            break
+
+    expected = sorted(seeded.rows.values(), key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    assert seen == [row["share_id"] for row in expected]
+
+def test_last_full_page_has_no_cursor(seeded):
+    rows, cursor = notebook_store.list_summaries(7)
+
+    assert len(rows) == 7
+    assert cursor is None
+
+def test_listing_by_model_keeps_the_filter_across_pages(seeded):
+    rows, cursor = notebook_store.list_summaries(2, hf_model_id="org/a")
+    more, last = notebook_store.list_summaries(5, cursor=cursor, hf_model_id="org/a")
+
+    assert {row["share_id"] for row in rows + more} == {"s1", "s3", "s5"}
+    assert len(rows + more) == 3
+    assert last is None
+
+def test_endpoint_follows_next_cursor(seeded):
+    client = TestClient(app)
+    first = client.get("/api/v1/notebooks", params={"limit": 4}).json()
+    second = client.get("/api/v1/notebooks", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+
+    assert len(first["items"]) == 4
+    assert len(second["items"]) == 3
+    assert second["next_cursor"] is None
+
+def test_endpoint_rejects_a_malformed_cursor(notebooks):
+    response = TestClient(app).get("/api/v1/notebooks", params={"cursor": "garbage"})
+
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.notebook_store import NotebookStore
+
+CELLS = [{"cell_type": "markdown" if i % 2 else "code", "source": f"line {i}\nmore"} for i in range(7)]
+NOTEBOOK = {"cells": CELLS, "metadata": {}, "nbformat": 4}
+
+@pytest.fixture
+def client(notebooks) -> TestClient:
+    notebooks.add("abc", NOTEBOOK, content_hash="h1", metadata={"generator_version": "1"})
+    return TestClient(app)
+
+def test_summary_has_no_content(client, notebooks):
+    response = client.get("/api/v1/notebooks/abc/summary")
+
+    assert response.status_code == 200
+    assert response.json()["cell_count"] == 7
+    assert "notebook_content" not in response.json()
+    assert [query for query, _ in notebooks.calls] == [NotebookStore.SUMMARY_QUERY]
+
+def test_outline_lists_type_and_first_line(client):
+    outline = client.get("/api/v1/notebooks/abc/outline").json()["outline"]
+
+    assert len(outline) == 7
+    assert outline[1] == {"index": 1, "cell_type": "markdown", "first_line": "line 1"}
+
+def test_outline_truncates_long_first_lines():
+    outline = NotebookStore.outline({"cells": [{"cell_type": "code", "source": ["x" * 500, "y"]}]})
+
+    assert outline[0]["first_line"] == "x" * NotebookStore.OUTLINE_LINE_CHARS
+
+@pytest.mark.parametrize("start, limit, expected", [(0, 3, CELLS[0:3]), (5, 50, CELLS[5:]), (9, 5, [])])
+def test_cells_returns_the_requested_range(client, start, limit, expected):
+    body = client.get(f"/api/v1/notebooks/abc/cells?start={start}&limit={limit}").json()
+
+    assert (body["start"], body["cell_count"], body["cells"]) == (start, 7, expected)
+
+@pytest.mark.parametrize("path", ["outline", "cells"])
+def test_content_routes_revalidate_on_content_hash(client, path):
+    first = client.get(f"/api/v1/notebooks/abc/{path}")
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"h1"'
+
+    second = client.get(f"/api/v1/notebooks/abc/{path}", headers={"If-None-Match": '"h1"'})
+    assert second.status_code == 304
+
+@pytest.mark.parametrize("path", ["summary", "outline", "cells"])
+def test_missing_notebook_is_404(client, path):
+    assert client.get(f"/api/v1/notebooks/nope/{path}").status_code == 404
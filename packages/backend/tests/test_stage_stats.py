@@ -0,0 +1,63 @@
+import pytest
+from app.services.stage_stats import StageStats
+
+DEFAULTS = {"fetch": 2.0, "render": 1.0, "validate": 90.0, "persist": 3.0}
+
+@pytest.fixture
+def stats() -> StageStats:
+    return StageStats(defaults=DEFAULTS, alpha=0.5, window=10)
+
+def test_defaults_until_samples_arrive(stats):
+    assert stats.expected_duration("org/model", "full") == 96.0
+    # Static validation never executes cells
+    assert stats.expected_stage(None, "miss", "static", "validate") == 1.0
+
+def test_ewma_of_recorded_samples(stats):
+    for seconds in (10.0, 20.0, 40.0):
+        stats.record("text-generation", "miss", "full", {"validate": seconds})
+
+    # 10, then 0.5 * 20 + 0.5 * 10, then 0.5 * 40 + 0.5 * 15
+    assert stats.expected_stage("text-generation", "miss", "full", "validate") == 27.5
+
+def test_quantiles_of_recent_samples(stats):
+    for seconds in range(1, 12):
+        stats.record(None, "miss", "full", {"validate": float(seconds)})
+
+    # The window keeps the last 10 samples, 2 to 11
+    assert stats.expected_stage(None, "miss", "full", "validate", quantile=0.0) == 2.0
+    assert stats.expected_stage(None, "miss", "full", "validate", quantile=0.5) == 6.0
+    assert stats.expected_stage(None, "miss", "full", "validate", quantile=1.0) == 11.0
+
+def test_unknown_pipeline_falls_back_to_all_pipelines(stats):
+    stats.record("text-generation", "miss", "full", {"validate": 40.0})
+
+    assert stats.expected_stage("image-classification", "miss", "full", "validate") == 40.0
+    assert stats.expected_stage(None, "miss", "full", "validate") == 40.0
+    # Other cache statuses and modes keep their own estimates
+    assert stats.expected_stage(None, "hit", "full", "validate") == DEFAULTS["validate"]
+    assert stats.expected_stage(None, "miss", "static", "validate") == 1.0
+
+def test_pipeline_specific_estimate_wins(stats):
+    stats.record("text-generation", "miss", "full", {"validate": 40.0})
+    stats.record("image-classification", "miss", "full", {"validate": 10.0})
+    stats.remember_pipeline_tag("org/model", "image-classification")
+
+    assert stats.expected_stage("image-classification", "miss", "full", "validate") == 10.0
+    assert stats.expected_duration("org/model", "full") == 10.0 + DEFAULTS["fetch"] + DEFAULTS["render"] + DEFAULTS["persist"]
+
+def test_unknown_stages_are_ignored(stats):
+    stats.record(None, "miss", "full", {"queue": 5.0})
+
+    assert stats.snapshot() == {}
+
+def test_history_is_replayed_oldest_first(stats, fake_db):
+    newest_first = [
+        {"timings": {"pipeline_tag": "text-generation", "cache_status": "miss", "validation": "full", "stages": {"validate": 30.0}}},
+        {"timings": {"pipeline_tag": "text-generation", "cache_status": "miss", "validation": "full", "stages": {"validate": 10.0}}},
+    ]
+    fake_db.on(StageStats.HISTORY_QUERY, lambda params: newest_first[:params[0]])
+
+    stats.load_history(limit=2)
+
+    # 10, then 0.5 * 30 + 0.5 * 10
+    assert stats.expected_stage("text-generation", "miss", "full", "validate") == 20.0
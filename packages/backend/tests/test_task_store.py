@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services.task_store import TaskStateStore
+
+STALE_AFTER = 900
+
+@pytest.fixture
+def store() -> TaskStateStore:
+    return TaskStateStore(enabled=True, flush_interval=60, batch_size=100, stale_after=STALE_AFTER)
+
+@pytest.fixture
+def tasks(fake_db):
+    """generation_tasks rows by task_id"""
+    rows = {}
+    fake_db.on(TaskStateStore.SELECT_QUERY, lambda params: [rows[params[0]]] if params[0] in rows else [])
+    return rows
+
+def row(task_id, status, age_seconds, **columns):
+    return {
+        "task_id": task_id, "status": status, "stage": "render", "progress": 60, "share_id": None,
+        "error": None, "validation": None, "timings": None, "linked_task_id": None,
+        "updated_at": datetime.now(timezone.utc) - timedelta(seconds=age_seconds), **columns,
+    }
+
+def test_stale_in_flight_task_is_reported_failed(store, tasks):
+    tasks["t1"] = row("t1", "processing", STALE_AFTER + 60)
+
+    state = store.get("t1")
+    assert state["status"] == "failed"
+    assert state["progress"] == 0
+    assert state["error"] == "Task was interrupted, please retry"
+
+def test_recent_in_flight_task_is_unchanged(store, tasks):
+    tasks["t1"] = row("t1", "processing", 10)
+
+    assert store.get("t1") == {"status": "processing", "current_step": "render", "progress": 60}
+
+@pytest.mark.parametrize("status", ["completed", "failed"])
+def test_old_terminal_task_is_unchanged(store, tasks, status):
+    tasks["t1"] = row("t1", status, STALE_AFTER * 10, progress=100, share_id="abc")
+
+    state = store.get("t1")
+    assert state["status"] == status
+    assert state["share_id"] == "abc"
+
+def test_linked_task_reports_the_primary_state(store, tasks):
+    tasks["t1"] = row("t1", "processing", STALE_AFTER + 60, linked_task_id="t0")
+    tasks["t0"] = row("t0", "completed", 30, progress=100, share_id="abc")
+
+    state = store.get("t1")
+    assert state["status"] == "completed"
+    assert state["share_id"] == "abc"
+
+def test_pending_state_is_flushed_before_reading(store, tasks, fake_db):
+    written = []
+    fake_db.on(TaskStateStore.UPSERT_QUERY, lambda params: written.append(params) or [])
+    store.record("t1", {"status": "processing", "current_step": "render", "progress": 60})
+    tasks["t1"] = row("t1", "processing", 0)
+
+    assert store.get("t1")["status"] == "processing"
+    assert [params[0] for params in written] == ["t1"]
+
+def test_missing_or_disabled(store, tasks):
+    assert store.get("t1") is None
+    assert TaskStateStore(enabled=False, flush_interval=60, batch_size=100, stale_after=STALE_AFTER).get("t1") is None
+
+def test_tracker_caches_only_final_states_from_the_store(store, tasks):
+    from app.services.progress_tracker import ProgressTracker
+
+    tracker = ProgressTracker(backend="memory", durable_store=store)
+    tasks["t1"] = row("t1", "processing", 10)
+    assert tracker.get_task_result("t1")["status"] == "processing"
+    assert tracker.get_progress("t1") is None
+
+    tasks["t1"] = row("t1", "completed", 10, progress=100, share_id="abc")
+    assert tracker.get_task_result("t1")["share_id"] == "abc"
+    assert tracker.get_progress("t1")["status"] == "completed"
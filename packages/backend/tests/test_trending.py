@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import trending
+from app.services.trending import WINDOWS, TrendingService
+from tests.fakes import FakeRedis
+
+NOW = datetime(2024, 5, 10, 12, tzinfo=timezone.utc)
+
+class Rollups:
+    """notebook_activity_hourly rows, ranked like TrendingService.RANKING_QUERY"""
+
+    def __init__(self):
+        self.hours = {}
+        self.retention_cutoffs = []
+
+    def add(self, share_id, hours_ago, downloads=0, views=0):
+        self.hours[(share_id, NOW - timedelta(hours=hours_ago))] = [downloads, views]
+
+    def upsert(self, params):
+        share_id, hour, downloads, views = params
+        counts = self.hours.setdefault((share_id, hour), [0, 0])
+        counts[0] += downloads
+        counts[1] += views
+        return []
+
+    def rank(self, params):
+        download_weight, view_weight, now, half_life, since, limit = params
+        scores = {}
+        for (share_id, hour), (downloads, views) in self.hours.items():
+            if hour < since:
+                continue
+            decay = 0.5 ** ((now - hour).total_seconds() / 3600.0 / half_life)
+            total = scores.setdefault(share_id, [0.0, 0, 0])
+            total[0] += (downloads * download_weight + views * view_weight) * decay
+            total[1] += downloads
+            total[2] += views
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [
+            {"share_id": share_id, "hf_model_id": "org/model", "created_at": NOW, "score": score,
+             "downloads": downloads, "views": views}
+            for share_id, (score, downloads, views) in ranked
+        ]
+
+    def retain(self, params):
+        self.retention_cutoffs.append(params[0])
+        return [{"affected_rows": 0}]
+
+@pytest.fixture
+def rollups(fake_db, monkeypatch) -> Rollups:
+    table = Rollups()
+    fake_db.on(TrendingService.UPSERT_QUERY, table.upsert)
+    fake_db.on(TrendingService.RANKING_QUERY, table.rank)
+    fake_db.on(TrendingService.RETENTION_QUERY, table.retain)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return NOW
+
+    monkeypatch.setattr(trending, "datetime", FrozenDatetime)
+    return table
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(trending, "get_redis", lambda: fake)
+    return fake
+
+def service(**overrides) -> TrendingService:
+    options = {"enabled": True, "flush_interval": 60, "refresh_interval": 300, "top_n": 10, **overrides}
+    return TrendingService(**options)
+
+def ranked(ranking):
+    return [item["share_id"] for item in ranking["items"]]
+
+def test_counts_are_batched_per_notebook_hour(rollups, fake_db):
+    trending_service = service()
+    for _ in range(3):
+        trending_service.record_view("a")
+    trending_service.record_download("a")
+    trending_service.record_view("b")
+    trending_service.flush()
+
+    assert len(fake_db.params_of(TrendingService.UPSERT_QUERY)) == 2
+    assert rollups.hours == {("a", NOW): [1, 3], ("b", NOW): [0, 1]}
+
+def test_failed_flush_keeps_the_counts(rollups, fake_db):
+    trending_service = service()
+    trending_service.record_view("a")
+    fake_db.on(TrendingService.UPSERT_QUERY, lambda params: (_ for _ in ()).throw(RuntimeError("down")))
+    trending_service.flush()
+    trending_service.record_view("a")
+
+    fake_db.on(TrendingService.UPSERT_QUERY, rollups.upsert)
+    trending_service.flush()
+    assert rollups.hours == {("a", NOW): [0, 2]}
+
+def test_downloads_weigh_more_than_views(rollups, redis):
+    rollups.add("viewed", 1, views=2)
+    rollups.add("downloaded", 1, downloads=1)
+    trending_service = service()
+    trending_service.refresh()
+
+    assert ranked(trending_service.top("day", 10)) == ["downloaded", "viewed"]
+
+def test_older_activity_decays_by_half_life(rollups, redis):
+    day_half_life = WINDOWS["day"][1]
+    rollups.add("recent", 0, views=10)
+    rollups.add("older", day_half_life, views=10)
+    trending_service = service()
+    trending_service.refresh()
+
+    items = trending_service.top("day", 10)["items"]
+    assert [item["share_id"] for item in items] == ["recent", "older"]
+    assert items[1]["score"] == pytest.approx(items[0]["score"] / 2)
+
+def test_windows_only_count_their_own_hours(rollups, redis):
+    rollups.add("today", 2, views=1)
+    rollups.add("last_week", 24 * 3, downloads=50)
+    trending_service = service()
+    trending_service.refresh()
+
+    assert ranked(trending_service.top("day", 10)) == ["today"]
+    assert ranked(trending_service.top("week", 10)) == ["last_week", "today"]
+    assert ranked(trending_service.top("month", 1)) == ["last_week"]
+
+def test_refresh_prunes_rollups_past_the_longest_window(rollups, redis):
+    service().refresh()
+
+    assert rollups.retention_cutoffs == [NOW - timedelta(hours=trending.RETENTION_HOURS)]
+    assert trending.RETENTION_HOURS > max(hours for hours, _ in WINDOWS.values())
+
+def test_published_rankings_are_loaded_by_other_processes(rollups, redis, fake_db):
+    rollups.add("a", 1, views=1)
+    service().refresh()
+    computed = len(fake_db.params_of(TrendingService.RANKING_QUERY))
+
+    follower = service()
+    follower.refresh()
+
+    assert len(fake_db.params_of(TrendingService.RANKING_QUERY)) == computed
+    assert ranked(follower.top("day", 10)) == ["a"]
+
+def test_top_is_empty_before_the_first_refresh_and_when_disabled(rollups, redis, monkeypatch):
+    started = []
+    trending_service = service()
+    monkeypatch.setattr(trending_service, "start", lambda: started.append(True))
+
+    assert trending_service.top("day", 10) == {"computed_at": None, "items": []}
+    assert started == [True]
+    assert service(enabled=False).top("day", 10) == {"computed_at": None, "items": []}
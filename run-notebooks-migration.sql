@@ -16,7 +16,6 @@ CREATE TABLE IF NOT EXISTS public.notebooks (
 );
 
 -- 3. Create indexes for performance
-CREATE INDEX IF NOT EXISTS notebooks_share_idx ON public.notebooks(share_id);
 CREATE INDEX IF NOT EXISTS notebooks_model_idx ON public.notebooks(hf_model_id);
 CREATE INDEX IF NOT EXISTS notebooks_created_idx ON public.notebooks(created_at DESC);
 
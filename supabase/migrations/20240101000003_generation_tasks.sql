@@ -0,0 +1,34 @@
+-- Alacard Generation Tasks Migration
+-- Durable task state so generation status survives API and worker restarts
+
+CREATE TABLE IF NOT EXISTS public.generation_tasks (
+  task_id TEXT PRIMARY KEY,
+  hf_model_id TEXT,
+  status TEXT NOT NULL,            -- 'processing', 'completed', 'failed'
+  stage TEXT,                      -- human readable current step
+  progress SMALLINT NOT NULL DEFAULT 0,
+  share_id TEXT,
+  error TEXT,
+  validation JSONB,                -- validation summary for completed tasks
+  timings JSONB,                   -- per-stage wall times in seconds
+  linked_task_id TEXT,             -- set when the task was attached to an identical running task
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  started_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Unfinished tasks, for spotting work interrupted by a restart
+CREATE INDEX IF NOT EXISTS generation_tasks_unfinished_idx
+  ON public.generation_tasks(updated_at)
+  WHERE status = 'processing';
+
+-- Retention: finished tasks are only needed for a while
+CREATE INDEX IF NOT EXISTS generation_tasks_finished_idx
+  ON public.generation_tasks(finished_at)
+  WHERE finished_at IS NOT NULL;
+
+ALTER TABLE public.generation_tasks DISABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON public.generation_tasks TO authenticated;
+GRANT ALL ON public.generation_tasks TO anon;
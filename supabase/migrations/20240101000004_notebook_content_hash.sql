@@ -0,0 +1,11 @@
+-- Alacard Notebook Content Hash Migration
+-- Version saved notebooks for ETag / If-None-Match handling
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- New rows get a hash from the API; existing rows only need a stable version
+UPDATE public.notebooks
+SET content_hash = encode(digest(notebook_content::text || COALESCE(metadata::text, ''), 'sha256'), 'hex')
+WHERE content_hash IS NULL;
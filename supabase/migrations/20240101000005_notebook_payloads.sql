@@ -0,0 +1,17 @@
+-- Alacard Notebook Payloads Migration
+-- Download bodies serialized once, with gzip and brotli variants
+
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS download_body BYTEA;
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS download_body_gzip BYTEA;
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS download_body_br BYTEA;
+
+-- Already compressed; skip TOAST compression but still store out of line
+ALTER TABLE public.notebooks ALTER COLUMN download_body_gzip SET STORAGE EXTERNAL;
+ALTER TABLE public.notebooks ALTER COLUMN download_body_br SET STORAGE EXTERNAL;
+
+-- Existing rows are filled in by the API on their first download
+
+-- Superseded by 20240101000012_drop_notebook_payloads.sql: with content-addressed
+-- cells these columns kept three more copies of every notebook. Downloads are
+-- now built from the cells and compressed once per process in the download
+-- cache (NOTEBOOK_DOWNLOAD_CACHE_MAX_BYTES)
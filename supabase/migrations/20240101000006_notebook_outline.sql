@@ -0,0 +1,26 @@
+-- Alacard Notebook Outline Migration
+-- Cell count and per-cell outline, so share cards never read notebook_content
+
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS cell_count INTEGER;
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS outline JSONB;
+
+-- New rows get both from the API; the outline entry shape matches
+-- NotebookStore.outline: index, cell_type and the first 120 characters of
+-- the cell's first line
+UPDATE public.notebooks n
+SET cell_count = jsonb_array_length(COALESCE(n.notebook_content->'cells', '[]'::jsonb)),
+    outline = COALESCE((
+        SELECT jsonb_agg(
+            jsonb_build_object(
+                'index', t.ord - 1,
+                'cell_type', t.cell->>'cell_type',
+                'first_line', left(split_part(
+                    CASE jsonb_typeof(t.cell->'source')
+                        WHEN 'array' THEN COALESCE(t.cell->'source'->>0, '')
+                        ELSE COALESCE(t.cell->>'source', '')
+                    END, E'\n', 1), 120)
+            ) ORDER BY t.ord
+        )
+        FROM jsonb_array_elements(COALESCE(n.notebook_content->'cells', '[]'::jsonb)) WITH ORDINALITY AS t(cell, ord)
+    ), '[]'::jsonb)
+WHERE n.outline IS NULL;
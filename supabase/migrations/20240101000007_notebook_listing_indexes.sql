@@ -0,0 +1,32 @@
+-- Alacard Notebook Listing Indexes Migration
+-- Keyset pagination by recency and per model, ordered by (created_at, id)
+
+-- id breaks created_at ties, so a cursor always names exactly one row. The
+-- existing notebooks_created_idx and notebooks_model_idx cannot serve
+-- `(created_at, id) < (%s, %s) ORDER BY created_at DESC, id DESC`, and a
+-- btree cannot gain a column in place, so these replace them.
+--
+-- Migrations run in a transaction, where CREATE INDEX CONCURRENTLY is not
+-- allowed. On a large table, build both indexes by hand first with
+-- CREATE INDEX CONCURRENTLY under these names; IF NOT EXISTS then skips them.
+CREATE INDEX IF NOT EXISTS notebooks_created_id_idx
+  ON public.notebooks(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS notebooks_model_created_idx
+  ON public.notebooks(hf_model_id, created_at DESC, id DESC);
+
+-- Both originals are prefixes of the new indexes. They are dropped only once
+-- both replacements are valid, e.g. not left INVALID by a failed concurrent
+-- build, so no lookup is ever left without an index.
+DO $$
+BEGIN
+  IF (
+    SELECT count(*) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relnamespace = 'public'::regnamespace AND i.indisvalid
+      AND c.relname IN ('notebooks_created_id_idx', 'notebooks_model_created_idx')
+  ) = 2 THEN
+    DROP INDEX IF EXISTS public.notebooks_created_idx;
+    DROP INDEX IF EXISTS public.notebooks_model_idx;
+  ELSE
+    RAISE WARNING 'notebooks listing indexes are not valid; keeping notebooks_created_idx and notebooks_model_idx';
+  END IF;
+END $$;
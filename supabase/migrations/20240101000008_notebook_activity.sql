@@ -0,0 +1,18 @@
+-- Alacard Notebook Activity Migration
+-- Hourly view/download rollups that trending rankings are computed from
+
+CREATE TABLE IF NOT EXISTS public.notebook_activity_hourly (
+  share_id TEXT NOT NULL,
+  hour TIMESTAMPTZ NOT NULL,
+  downloads INTEGER NOT NULL DEFAULT 0,
+  views INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (share_id, hour)
+);
+
+-- Rankings and retention only ever read a recent range of hours
+CREATE INDEX IF NOT EXISTS notebook_activity_hour_idx ON public.notebook_activity_hourly(hour);
+
+ALTER TABLE public.notebook_activity_hourly DISABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON public.notebook_activity_hourly TO authenticated;
+GRANT ALL ON public.notebook_activity_hourly TO anon;
@@ -0,0 +1,17 @@
+-- Alacard Notebook Cells Migration
+-- Content-addressed cells shared across notebooks
+
+CREATE TABLE IF NOT EXISTS public.notebook_cells (
+  cell_hash TEXT PRIMARY KEY,  -- SHA-256 of the cell's canonical JSON
+  cell JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Ordered cell hashes; when set, notebook_content holds the notebook
+-- without its cells. Existing rows keep the full notebook and stay NULL.
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS cell_hashes TEXT[];
+
+ALTER TABLE public.notebook_cells DISABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON public.notebook_cells TO authenticated;
+GRANT ALL ON public.notebook_cells TO anon;
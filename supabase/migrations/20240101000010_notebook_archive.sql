@@ -0,0 +1,10 @@
+-- Alacard Notebook Archive Migration
+-- Cold tier: archived rows keep their summary columns and point at the
+-- compressed notebook in cold storage
+
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS archive_key TEXT;
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ;
+
+-- Archiving scans the oldest rows that are still hot
+CREATE INDEX IF NOT EXISTS notebooks_unarchived_created_idx
+  ON public.notebooks(created_at) WHERE archived_at IS NULL;
@@ -0,0 +1,93 @@
+-- Alacard Notebook Partitioning Migration
+-- Range-partition notebooks by created_at, one partition per month, and keep
+-- a single index per purpose
+
+-- 1. Global share_id registry. A partitioned table can only enforce
+-- uniqueness together with the partition key, so share IDs are reserved
+-- here. The primary key covers created_at, so resolving a share to its
+-- partition is an index-only scan.
+CREATE TABLE IF NOT EXISTS public.notebook_shares (
+  share_id TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT notebook_shares_pkey PRIMARY KEY (share_id) INCLUDE (created_at)
+);
+
+INSERT INTO public.notebook_shares (share_id, created_at)
+SELECT share_id, created_at FROM public.notebooks
+ON CONFLICT (share_id) DO NOTHING;
+
+-- 2. Partitioned table with the same columns, defaults and storage settings
+ALTER TABLE public.notebooks RENAME TO notebooks_unpartitioned;
+
+CREATE TABLE public.notebooks (
+  LIKE public.notebooks_unpartitioned INCLUDING DEFAULTS INCLUDING STORAGE,
+  CONSTRAINT notebooks_partitioned_pkey PRIMARY KEY (id, created_at),
+  -- The only share_id index: serves lookups resolved through notebook_shares
+  CONSTRAINT notebooks_share_created_key UNIQUE (share_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- 3. Monthly partitions from from_month through months_ahead months from
+-- now; returns how many were created. Run daily by the Celery beat task
+-- app.tasks.maintenance_tasks.create_notebook_partitions.
+CREATE OR REPLACE FUNCTION public.create_notebook_partitions(
+  months_ahead INTEGER DEFAULT 3,
+  from_month DATE DEFAULT NULL
+) RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  month_start DATE := date_trunc('month', COALESCE(from_month, NOW()::date))::date;
+  last_month DATE := (date_trunc('month', NOW()) + make_interval(months => months_ahead))::date;
+  partition_name TEXT;
+  created INTEGER := 0;
+BEGIN
+  WHILE month_start <= last_month LOOP
+    partition_name := format('notebooks_%s', to_char(month_start, 'YYYY_MM'));
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE public.%I PARTITION OF public.notebooks FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, (month_start + INTERVAL '1 month')::date
+      );
+      created := created + 1;
+    END IF;
+    month_start := (month_start + INTERVAL '1 month')::date;
+  END LOOP;
+  RETURN created;
+END;
+$$;
+
+SELECT public.create_notebook_partitions(3, (SELECT min(created_at)::date FROM public.notebooks_unpartitioned));
+
+-- Catches rows outside every partition; the maintenance task warns if it is
+-- not empty, because a non-empty default blocks new partitions for its rows
+CREATE TABLE IF NOT EXISTS public.notebooks_default PARTITION OF public.notebooks DEFAULT;
+
+-- 4. Move the rows and drop the old heap, together with its duplicate
+-- notebooks_share_idx next to the share_id UNIQUE constraint
+INSERT INTO public.notebooks SELECT * FROM public.notebooks_unpartitioned;
+DROP TABLE public.notebooks_unpartitioned;
+
+ALTER TABLE public.notebooks RENAME CONSTRAINT notebooks_partitioned_pkey TO notebooks_pkey;
+
+-- 5. Secondary indexes, created on every partition
+CREATE INDEX IF NOT EXISTS notebooks_created_id_idx
+  ON public.notebooks(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS notebooks_model_created_idx
+  ON public.notebooks(hf_model_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS notebooks_unarchived_created_idx
+  ON public.notebooks(created_at) WHERE archived_at IS NULL;
+CREATE INDEX IF NOT EXISTS notebooks_recipe_idx ON public.notebooks USING GIN (recipe);
+CREATE INDEX IF NOT EXISTS notebooks_remix_idx ON public.notebooks(remix_count DESC);
+CREATE INDEX IF NOT EXISTS notebooks_user_idx ON public.notebooks(user_id);
+CREATE INDEX IF NOT EXISTS notebooks_public_idx ON public.notebooks(is_public) WHERE is_public = true;
+
+ALTER TABLE public.notebooks ADD FOREIGN KEY (user_id) REFERENCES auth.users(id);
+
+-- 6. Access, as for the original table
+ALTER TABLE public.notebooks DISABLE ROW LEVEL SECURITY;
+ALTER TABLE public.notebook_shares DISABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON public.notebooks TO authenticated;
+GRANT ALL ON public.notebooks TO anon;
+GRANT ALL ON public.notebook_shares TO authenticated;
+GRANT ALL ON public.notebook_shares TO anon;
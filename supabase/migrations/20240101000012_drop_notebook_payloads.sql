@@ -0,0 +1,10 @@
+-- Alacard Notebook Payloads Removal Migration
+-- Download bodies are built from the shared cells and cached by the API, so
+-- rows no longer keep three more copies of the notebook
+
+ALTER TABLE public.notebooks DROP COLUMN IF EXISTS download_body;
+ALTER TABLE public.notebooks DROP COLUMN IF EXISTS download_body_gzip;
+ALTER TABLE public.notebooks DROP COLUMN IF EXISTS download_body_br;
+
+-- Dropped columns free their TOAST space once rows are rewritten, e.g. by
+-- VACUUM FULL on each partition during a quiet period
@@ -0,0 +1,20 @@
+-- Alacard Notebook Last Access Migration
+-- Archiving picks notebooks by their last read, kept on the row itself so it
+-- does not depend on the trending rollups
+
+ALTER TABLE public.notebooks ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMPTZ;
+
+-- Existing rows start from their latest rolled-up activity, or creation
+UPDATE public.notebooks n
+SET last_accessed_at = GREATEST(n.created_at, (
+    SELECT MAX(a.hour) FROM public.notebook_activity_hourly a WHERE a.share_id = n.share_id
+))
+WHERE n.last_accessed_at IS NULL;
+
+ALTER TABLE public.notebooks ALTER COLUMN last_accessed_at SET DEFAULT NOW();
+ALTER TABLE public.notebooks ALTER COLUMN last_accessed_at SET NOT NULL;
+
+-- Archiving scans the least recently read rows that are still hot
+DROP INDEX IF EXISTS public.notebooks_unarchived_created_idx;
+CREATE INDEX IF NOT EXISTS notebooks_unarchived_accessed_idx
+  ON public.notebooks(last_accessed_at) WHERE archived_at IS NULL;